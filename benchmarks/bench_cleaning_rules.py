@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+Benchmark: the TMDB cleaning rules as one fused pass (pipeline/cleaning_rules.py)
+against the original chain of convert / filter / .copy() steps.
+
+The synthetic TMDB frame has the raw export's dtypes (as read_csv returns them)
+with zeros, missing values and empty genre lists sprinkled in, so every rule
+drops something. Both versions are timed and their peak traced memory
+(tracemalloc) is reported. The script exits non-zero if the cleaned frames
+differ (assert_frame_equal) or if the report's rejected counts don't add up to
+the rows dropped.
+
+Usage:
+    python benchmarks/bench_cleaning_rules.py --sizes 100000 1000000
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_genres import make_raw_genres
+from pipeline.cleaning_rules import CleaningRules, Rule, numeric, to_millions, year_of_date
+from pipeline.genres import decode_genres
+
+# The rules of Week_2_Cleaning_TMDB_Data.py
+TMDB_RULES = CleaningRules(
+    convert={
+        "budget": ("budget", to_millions),
+        "genre": ("genres", decode_genres),
+        "popularity": ("popularity", numeric),
+        "release_year": ("release_date", year_of_date),
+        "revenue": ("revenue", to_millions),
+        "runtime": ("runtime", numeric),
+        "vote_average": ("vote_average", numeric),
+        "vote_count": ("vote_count", numeric),
+    },
+    drop=["genres", "release_date"],
+    rename={"budget": "budget_in_millions", "revenue": "revenue_in_millions", "runtime": "runtime_in_minutes"},
+    rules=[
+        Rule("budget_in_millions", ">", 0),
+        Rule("genre", "notna"),
+        Rule("popularity", ">", 0),
+        Rule("release_year", "notna"),
+        Rule("revenue_in_millions", ">", 0),
+        Rule("runtime_in_minutes", ">", 0),
+        Rule("vote_average", ">", 0),
+        Rule("vote_count", ">", 10),
+    ],
+)
+
+
+def make_raw_tmdb(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+
+    def sometimes(values, p, fill):
+        values = values.astype(object) if fill is None else values
+        values[rng.random(n_rows) < p] = np.nan if fill is None else fill
+        return values
+
+    dates = pd.to_datetime("1950-01-01") + pd.to_timedelta(rng.integers(0, 25_000, size=n_rows), unit="D")
+    return pd.DataFrame({
+        "budget": sometimes(rng.integers(1, 300, size=n_rows) * 1_000_000, 0.2, 0),
+        "genres": make_raw_genres(n_rows, seed=seed),
+        "popularity": sometimes(rng.gamma(2, 10, size=n_rows), 0.01, 0.0),
+        "release_date": sometimes(dates.strftime("%Y-%m-%d").to_numpy(dtype=object), 0.01, None),
+        "revenue": sometimes(rng.integers(1, 3000, size=n_rows) * 1_000_000, 0.25, 0),
+        "runtime": sometimes(rng.integers(60, 200, size=n_rows).astype(float), 0.02, np.nan),
+        "title": [f"Movie {i}" for i in range(n_rows)],
+        "vote_average": sometimes(np.round(rng.uniform(1, 10, size=n_rows), 1), 0.02, 0.0),
+        "vote_count": rng.integers(0, 20_000, size=n_rows) // rng.integers(1, 500, size=n_rows),
+    })
+
+
+def legacy_chain(tmdb):
+    """
+    clean_tmdb exactly as the TMDB cleaner had it before the rules.
+    """
+    tmdb['budget'] = pd.to_numeric(tmdb['budget'], errors='coerce') / 1000000
+    tmdb = tmdb.rename(columns={'budget': 'budget_in_millions'})
+    tmdb = tmdb[tmdb['budget_in_millions'] > 0].copy()
+    tmdb['genre'] = decode_genres(tmdb['genres'])
+    tmdb = tmdb.drop(columns=['genres'])
+    tmdb = tmdb.dropna(subset=['genre'])
+    tmdb['popularity'] = pd.to_numeric(tmdb['popularity'], errors='coerce')
+    tmdb = tmdb[tmdb['popularity'] > 0].copy()
+    tmdb['release_date'] = pd.to_datetime(tmdb['release_date'], errors='coerce')
+    tmdb['release_year'] = tmdb['release_date'].dt.year.astype('Int64')
+    tmdb = tmdb.dropna(subset=['release_year'])
+    tmdb = tmdb.drop(columns=['release_date'])
+    tmdb['revenue'] = pd.to_numeric(tmdb['revenue'], errors='coerce') / 1000000
+    tmdb = tmdb.rename(columns={'revenue': 'revenue_in_millions'})
+    tmdb = tmdb[tmdb['revenue_in_millions'] > 0].copy()
+    tmdb['runtime'] = pd.to_numeric(tmdb['runtime'], errors='coerce')
+    tmdb = tmdb.rename(columns={'runtime': 'runtime_in_minutes'})
+    tmdb = tmdb[tmdb['runtime_in_minutes'] > 0].copy()
+    tmdb['vote_average'] = pd.to_numeric(tmdb['vote_average'], errors='coerce')
+    tmdb = tmdb[tmdb['vote_average'] > 0].copy()
+    tmdb['vote_count'] = pd.to_numeric(tmdb['vote_count'], errors='coerce')
+    tmdb = tmdb[tmdb['vote_count'] > 10]
+    return tmdb
+
+
+def measure(function, df):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(df.copy())
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'rows':>10} {'kept':>9} {'chain_s':>8} {'rules_s':>8} {'chain_MB':>9} {'rules_MB':>9} {'same':>5}")
+    for n_rows in args.sizes:
+        raw = make_raw_tmdb(n_rows)
+        expected, chain_s, chain_mb = measure(legacy_chain, raw)
+        (cleaned, report), rules_s, rules_mb = measure(TMDB_RULES.apply, raw)
+        try:
+            pd.testing.assert_frame_equal(cleaned, expected)
+            same = report["rejected"].sum() == n_rows - len(cleaned)
+        except AssertionError as err:
+            print(err)
+            same = False
+        failed |= not same
+        print(f"{n_rows:>10} {len(cleaned):>9} {chain_s:8.2f} {rules_s:8.2f} {chain_mb:9.1f} {rules_mb:9.1f} "
+              f"{'yes' if same else 'NO':>5}")
+    print(report)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Benchmark: Week 4/5 summary tables from pandas vs. from the aggregate cube.
+
+Tiles the checked-in merged_movies.csv up to each requested size (jittering
+the years so the cube has realistic cell counts) and times:
+
+- pandas: describe(), corr(), genre_summary, year_summary and per-genre corr,
+  each rescanning the whole frame (what the scripts did)
+- cube:   the one-off build, then the same five tables from the cube, and an
+  incremental update with 1% new rows
+
+It also checks that the cube answers match pandas exactly (counts, means,
+standard deviations, min/max and correlations; the medians and quartiles are
+not in the cube, the scripts compute them from the rows) and exits non-zero
+if they don't.
+
+Usage:
+    python benchmarks/bench_cube.py --sizes 100000 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from pipeline.cube import AggregateCube, prepare_cube_input
+
+MERGED_CSV = ROOT / "data_integration" / "integration_output" / "merged_movies.csv"
+NUMERIC_VARS = ["budget_in_millions", "revenue_in_millions", "popularity", "rating_imdb",
+                "vote_average_tmdb", "runtime_imdb", "runtime_tmdb"]
+PAIR = ["rating_imdb", "popularity"]
+
+
+def pandas_tables(df):
+    return {
+        "describe": df[NUMERIC_VARS].describe().T.drop(columns=["25%", "50%", "75%"]),
+        "corr": df[NUMERIC_VARS].corr(),
+        "genre_summary": df.groupby("genre_simple")[PAIR].agg(["mean", "count"]),
+        "year_summary": df.dropna(subset=["release_year"] + PAIR).groupby("release_year")[PAIR].mean(),
+        "genre_corr": df.dropna(subset=PAIR).groupby("genre_simple")[PAIR].corr().unstack(),
+    }
+
+
+def cube_tables(cube):
+    return {
+        "describe": cube.describe(NUMERIC_VARS),
+        "corr": cube.corr(measures=NUMERIC_VARS),
+        "genre_summary": cube.summary("genre_simple", PAIR, ["mean", "count"]),
+        "year_summary": cube.pair_means("release_year", *PAIR),
+        "genre_corr": cube.pair_corr("genre_simple", *PAIR),
+    }
+
+
+def mismatches(expected, got):
+    """
+    Names of tables where the cube disagrees with pandas.
+    """
+    bad = []
+    for name, ref in expected.items():
+        ans = got[name].reindex(index=ref.index, columns=ref.columns).astype(float)
+        if not np.allclose(ref.astype(float), ans, rtol=1e-9, atol=1e-9, equal_nan=True):
+            bad.append(name)
+    return bad
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    base = prepare_cube_input(pd.read_csv(MERGED_CSV).convert_dtypes())
+    rng = np.random.default_rng(0)
+    failed = False
+    print(f"{'rows':>10} {'cells':>6} {'pandas_s':>9} {'build_s':>8} {'cube_s':>8} {'update_1%_s':>12} {'match':>6}")
+    for n_rows in args.sizes:
+        reps = -(-n_rows // len(base))
+        df = pd.concat([base] * reps, ignore_index=True).iloc[:n_rows].copy()
+        df["release_year"] = (df["release_year"] + pd.array(rng.integers(-3, 4, size=n_rows), dtype="Int64"))
+
+        start = time.perf_counter()
+        expected = pandas_tables(df)
+        pandas_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cube = AggregateCube.build(df)
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        got = cube_tables(cube)
+        cube_s = time.perf_counter() - start
+
+        new_rows = df.sample(max(1, n_rows // 100), random_state=0)
+        start = time.perf_counter()
+        cube.update(new_rows)
+        update_s = time.perf_counter() - start
+
+        bad = mismatches(expected, got)
+        failed |= bool(bad)
+        print(f"{n_rows:>10} {len(cube):>6} {pandas_s:9.2f} {build_s:8.2f} {cube_s:8.3f} {update_s:12.3f} {'yes' if not bad else 'NO':>6}")
+        if bad:
+            print("  mismatched tables:", ", ".join(bad))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
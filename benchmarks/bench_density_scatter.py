@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Benchmark: point scatter vs. density-aggregated scatter at catalogue scale.
+
+Draws a synthetic budget-vs-revenue table colored by a raw genre string (a few
+dozen distinct values, like genre_imdb) and saves it as a PNG with the Agg
+backend, once with sns.scatterplot (one marker per movie) and once with
+pipeline.density.density_scatter (a fixed grid per genre group). The point
+plot is skipped above --points-max-rows because it takes minutes there.
+
+Usage:
+    python benchmarks/bench_density_scatter.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pipeline.density import density_scatter
+
+GENRES = ["Action", "Adventure", "Animation", "Comedy", "Crime", "Drama", "Fantasy", "Horror", "Romance", "Thriller"]
+
+
+def make_movies(n_rows, n_genre_strings=40, seed=0):
+    rng = np.random.default_rng(seed)
+    combos = [", ".join(sorted(rng.choice(GENRES, size=rng.integers(1, 4), replace=False))) for _ in range(n_genre_strings)]
+    budget = rng.lognormal(3, 1, size=n_rows)
+    return pd.DataFrame({
+        "budget_in_millions": budget,
+        "revenue_in_millions": budget * rng.lognormal(0.8, 0.9, size=n_rows),
+        "genre_imdb": np.array(combos, dtype=object)[rng.integers(0, n_genre_strings, size=n_rows)],
+    })
+
+
+def timed_png(draw, path):
+    start = time.perf_counter()
+    fig = plt.figure(figsize=(8, 6))
+    draw()
+    fig.savefig(path, dpi=100)
+    plt.close(fig)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--points-max-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'points_s':>9} {'density_s':>10} {'png_kb (points/density)':>24}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.sizes:
+            df = make_movies(n_rows)
+            x, y, hue = "budget_in_millions", "revenue_in_millions", "genre_imdb"
+
+            dens_path = Path(tmp) / f"density_{n_rows}.png"
+            dens_s = timed_png(lambda: density_scatter(df, x, y, hue=hue), dens_path)
+
+            if n_rows <= args.points_max_rows:
+                pts_path = Path(tmp) / f"points_{n_rows}.png"
+                pts_s = timed_png(lambda: sns.scatterplot(data=df, x=x, y=y, hue=hue, alpha=0.6), pts_path)
+                pts_cell, pts_kb = f"{pts_s:9.2f}", f"{pts_path.stat().st_size / 1024:.0f}"
+            else:
+                pts_cell, pts_kb = f"{'skipped':>9}", "-"
+            sizes = f"{pts_kb}/{dens_path.stat().st_size / 1024:.0f}"
+            print(f"{n_rows:>10} {pts_cell} {dens_s:10.2f} {sizes:>24}")
+
+
+if __name__ == "__main__":
+    main()
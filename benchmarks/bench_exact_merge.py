@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Benchmark: the exact (title_norm, release_year) match stage.
+
+Builds synthetic IMDb and TMDB tables shaped like the normalized integration
+inputs (string titles, nullable years, a handful of value columns; about half
+of the IMDb rows have an exact TMDB partner, some with duplicate TMDB rows)
+and compares:
+
+- merge: the original exact_merge, imdb.copy() / tmdb.copy() and pd.merge on
+  the string + nullable year columns with indicator=True
+- keys:  pipeline.exact_join.match_keys for both tables (done once, in the
+  normalize step of the integration script)
+- join:  pipeline.exact_join.left_join on those keys
+- asof:  the +/- 1 year as-of tier (pipeline.exact_join.asof_match) on the
+  rows the exact join left unmatched; a tenth of the TMDB copies have their
+  year shifted by one, so those are the rows it should rescue before fuzzy
+  scoring
+
+The merge and join results must be identical (the script exits non-zero otherwise).
+
+Usage:
+    python benchmarks/bench_exact_merge.py --sizes 100000 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pipeline.exact_join import asof_match, left_join, match_keys
+
+ON = ["title_norm", "release_year"]
+
+
+def make_tables(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    words = np.array([f"w{i}" for i in range(5000)], dtype=object)
+
+    def titles(n):
+        parts = [words[rng.integers(0, len(words), n)] for _ in range(3)]
+        return pd.Series([" ".join(t) for t in zip(*parts)], dtype="str")
+
+    def years(n):
+        values = rng.integers(1920, 2020, n).astype(object)
+        values[rng.random(n) < 0.02] = None
+        return pd.array(values, dtype="Int64")
+
+    imdb = pd.DataFrame({"title_norm": titles(n_rows), "release_year": years(n_rows),
+                         "rating": rng.uniform(7, 9.5, n_rows).round(1), "genre": titles(n_rows)})
+    # TMDB: half of the IMDb title/year pairs (some twice) plus unrelated rows
+    shared = rng.choice(n_rows, size=n_rows // 2, replace=False)
+    dupes = rng.choice(shared, size=n_rows // 50, replace=False)
+    shifted = rng.choice(np.setdiff1d(np.arange(n_rows), shared), size=n_rows // 10, replace=False)
+    rows = np.concatenate([shared, dupes, shifted])
+    n_other = n_rows - len(rows)
+    shared_years = imdb["release_year"].to_numpy(dtype=object)[rows].copy()
+    shared_years[len(shared) + len(dupes):] = [None if pd.isna(y) else y + 1 for y in shared_years[len(shared) + len(dupes):]]
+    tmdb = pd.DataFrame({
+        "title_norm": pd.concat([imdb["title_norm"].iloc[rows], titles(n_other)], ignore_index=True),
+        "release_year": pd.array(np.concatenate([shared_years, years(n_other).to_numpy(dtype=object)]), dtype="Int64"),
+    })
+    tmdb["popularity"] = rng.lognormal(3, 1, len(tmdb))
+    tmdb["vote_count"] = rng.integers(0, 10_000, len(tmdb))
+    tmdb["genre"] = titles(len(tmdb))
+    return imdb, tmdb.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'rows':>10} {'merge_s':>8} {'keys_s':>7} {'join_s':>7} {'matched':>8} {'asof_s':>7} {'asof_matched':>13} {'same':>5}")
+    for n_rows in args.sizes:
+        imdb, tmdb = make_tables(n_rows)
+
+        start = time.perf_counter()
+        old = pd.merge(imdb.copy(), tmdb.copy(), how="left", on=ON, suffixes=("_imdb", "_tmdb"), indicator=True)
+        merge_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        imdb_keys = match_keys(imdb["title_norm"], imdb["release_year"])
+        tmdb_keys = match_keys(tmdb["title_norm"], tmdb["release_year"])
+        keys_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new = left_join(imdb, tmdb, ON, imdb_keys, tmdb_keys, suffixes=("_imdb", "_tmdb"), indicator=True)
+        join_s = time.perf_counter() - start
+
+        left_only = new[new["_merge"] == "left_only"]
+        start = time.perf_counter()
+        asof = asof_match(left_only, tmdb, tolerance=1)
+        asof_s = time.perf_counter() - start
+
+        try:
+            pd.testing.assert_frame_equal(old, new)
+            same = True
+        except AssertionError:
+            same = False
+        failed |= not same
+        matched = int((new["_merge"] == "both").sum())
+        print(f"{n_rows:>10} {merge_s:8.2f} {keys_s:7.2f} {join_s:7.2f} {matched:>8} {asof_s:7.2f} {len(asof):>13} {'yes' if same else 'NO':>5}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+"""
+Benchmark: batched fuzzy linker vs. the original iterrows loop.
+
+Builds synthetic IMDb/TMDB title frames of the requested sizes, runs the old
+per-pair rapidfuzz loop and pipeline.fuzzy_matching.link_by_year_blocks on the
+same input, checks that both return the same matches and prints the timings.
+It also times the linker with a BlockCheckpoint (pipeline/checkpoint.py), and
+a resume after a run interrupted halfway through the year blocks. The script
+exits non-zero if any of the results differ.
+
+Usage:
+    python benchmarks/bench_fuzzy_linking.py --sizes 10000 100000 1000000
+
+The old loop is quadratic per year block, so it is skipped above
+--legacy-max-rows (it takes hours at 1M rows).
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pipeline.fuzzy_matching as fuzzy_matching
+from pipeline.checkpoint import BlockCheckpoint
+from pipeline.fuzzy_matching import link_by_year_blocks
+
+WORDS = [
+    "the", "dark", "night", "return", "of", "king", "star", "war", "love", "story",
+    "last", "city", "lost", "river", "man", "woman", "dead", "blue", "red", "house",
+    "secret", "life", "time", "game", "road", "home", "girl", "boy", "fire", "ice",
+]
+
+
+def make_titles(n, rng):
+    lengths = rng.integers(1, 6, size=n)
+    picks = rng.integers(0, len(WORDS), size=lengths.sum())
+    titles = []
+    pos = 0
+    for length in lengths:
+        titles.append(" ".join(WORDS[i] for i in picks[pos:pos + length]) + f" {rng.integers(0, 1_000_000)}")
+        pos += length
+    return titles
+
+
+def make_frames(n_rows, seed=0):
+    """
+    IMDb side: n_rows unmatched titles. TMDB side: n_rows titles, a third of
+    which are lightly typo'd copies of IMDb titles from the same year.
+    """
+    rng = np.random.default_rng(seed)
+    left_titles = make_titles(n_rows, rng)
+    left_years = rng.integers(1950, 2021, size=n_rows)
+
+    right_titles = make_titles(n_rows, rng)
+    right_years = rng.integers(1950, 2021, size=n_rows)
+    copied = rng.choice(n_rows, size=n_rows // 3, replace=False)
+    for target, source in zip(copied, rng.permutation(n_rows)[: len(copied)]):
+        title = left_titles[source]
+        cut = rng.integers(0, len(title))
+        right_titles[target] = title[:cut] + title[cut + 1:]
+        right_years[target] = left_years[source]
+
+    left = pd.DataFrame({
+        "imdb_index": np.arange(n_rows),
+        "title_norm": left_titles,
+        "release_year": pd.array(left_years, dtype="Int64"),
+    })
+    right = pd.DataFrame({
+        "tmdb_index": np.arange(n_rows),
+        "title_norm": right_titles,
+        "release_year": pd.array(right_years, dtype="Int64"),
+    })
+    return left, right
+
+
+def legacy_loop(left_only, tmdb_candidates, threshold=0.90):
+    """
+    The rapidfuzz fallback exactly as it was written in fuzzy_link_remaining.
+    """
+    matches = []
+    tmdb_by_year = {}
+    for _, r in tmdb_candidates.iterrows():
+        yr = r["release_year"]
+        tmdb_by_year.setdefault(int(yr) if not pd.isna(yr) else None, []).append(r)
+
+    for _, lm in left_only.iterrows():
+        yr = lm["release_year"]
+        candidates = tmdb_by_year.get(int(yr) if not pd.isna(yr) else None, [])
+        best_score = 0
+        best_idx = None
+        for cand in candidates:
+            score = fuzz.token_sort_ratio(lm["title_norm"], cand["title_norm"]) / 100.0
+            if score > best_score:
+                best_score = score
+                best_idx = cand["tmdb_index"]
+        if best_score >= threshold and best_idx is not None:
+            matches.append((lm["imdb_index"], best_idx, best_score))
+    return pd.DataFrame(matches, columns=["imdb_index", "tmdb_index", "score"])
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupted_run(left, right, checkpoint, after_blocks, workers):
+    """
+    link_by_year_blocks that stops with an exception after after_blocks blocks
+    (as if the process had been killed), leaving those blocks in checkpoint.
+    """
+    scored = 0
+    best_matches = fuzzy_matching.best_matches
+
+    def stopping(*args, **kwargs):
+        nonlocal scored
+        if scored == after_blocks:
+            raise Interrupted()
+        scored += 1
+        return best_matches(*args, **kwargs)
+
+    fuzzy_matching.best_matches = stopping
+    try:
+        link_by_year_blocks(left, right, threshold=0.90, workers=workers, checkpoint=checkpoint)
+    except Interrupted:
+        pass
+    finally:
+        fuzzy_matching.best_matches = best_matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max-rows", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=-1)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'rows':>10} {'legacy_s':>10} {'batched_s':>10} {'speedup':>8} {'ckpt_s':>8} {'resume_s':>8} "
+          f"{'matches':>8} {'same':>5}")
+    for n_rows in args.sizes:
+        left, right = make_frames(n_rows)
+
+        start = time.perf_counter()
+        batched = link_by_year_blocks(left, right, threshold=0.90, workers=args.workers)
+        batched_s = time.perf_counter() - start
+
+        legacy_s = None
+        same = "-"
+        if n_rows <= args.legacy_max_rows:
+            start = time.perf_counter()
+            legacy = legacy_loop(left, right)
+            legacy_s = time.perf_counter() - start
+            same = "yes" if legacy.astype(float).equals(batched.astype(float)) else "NO"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            checkpointed = link_by_year_blocks(left, right, threshold=0.90, workers=args.workers,
+                                               checkpoint=BlockCheckpoint(Path(tmp) / "full.jsonl"))
+            ckpt_s = time.perf_counter() - start
+
+            path = Path(tmp) / "resume.jsonl"
+            n_blocks = left["release_year"].nunique(dropna=False)
+            interrupted_run(left, right, BlockCheckpoint(path), n_blocks // 2, args.workers)
+            start = time.perf_counter()
+            resumed = link_by_year_blocks(left, right, threshold=0.90, workers=args.workers,
+                                          checkpoint=BlockCheckpoint(path))
+            resume_s = time.perf_counter() - start
+        if not (checkpointed.astype(float).equals(batched.astype(float))
+                and resumed.astype(float).equals(batched.astype(float))):
+            same = "NO"
+        failed |= same == "NO"
+
+        legacy_txt = f"{legacy_s:10.2f}" if legacy_s is not None else f"{'skipped':>10}"
+        speedup = f"{legacy_s / batched_s:7.1f}x" if legacy_s is not None else f"{'-':>8}"
+        print(f"{n_rows:>10} {legacy_txt} {batched_s:10.2f} {speedup} {ckpt_s:8.2f} {resume_s:8.2f} "
+              f"{len(batched):>8} {same:>5}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+Benchmark: genre labelling and per-genre statistics.
+
+On synthetic IMDb-style genre columns ("Action, Adventure, Sci-Fi", a few
+hundred repeating combinations plus missing values) this compares:
+
+- labels: Series.apply(simplify_genre) (what Week 5 did) vs.
+  pipeline.genres.encode_genres(...).labels()
+- per-genre stats: str.split + explode + groupby mean/count vs.
+  GenreEncoding.stats (bincount by distinct string, then one matrix product)
+
+and checks that both ways give the same answer.
+
+Usage:
+    python benchmarks/bench_genre_encoder.py --sizes 100000 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pipeline.genres import encode_genres, simplify_genre
+
+IMDB_GENRES = [
+    "Action", "Adventure", "Animation", "Biography", "Comedy", "Crime", "Drama", "Family",
+    "Fantasy", "History", "Horror", "Music", "Mystery", "Romance", "Sci-Fi", "Sport",
+    "Thriller", "War", "Western",
+]
+
+
+def make_genres(n_rows, n_combinations=400, seed=0):
+    rng = np.random.default_rng(seed)
+    combos = [
+        ", ".join(sorted(rng.choice(IMDB_GENRES, size=rng.integers(1, 4), replace=False)))
+        for _ in range(n_combinations)
+    ]
+    values = np.array(combos, dtype=object)[rng.integers(0, len(combos), size=n_rows)]
+    values[rng.random(n_rows) < 0.02] = None
+    return pd.Series(values, dtype="string")
+
+
+def explode_stats(genres, values):
+    exploded = values.assign(genre=genres.str.split(", ")).explode("genre").dropna(subset=["genre"])
+    return exploded.groupby("genre")[list(values.columns)].agg(["count", "mean"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    print(f"{'rows':>10} {'apply_s':>8} {'labels_s':>9} {'explode_s':>10} {'stats_s':>8} {'same':>5}")
+    for n_rows in args.sizes:
+        genres = make_genres(n_rows)
+        values = pd.DataFrame({
+            "rating_imdb": np.round(rng.uniform(7.5, 9.3, n_rows), 1),
+            "popularity": np.where(rng.random(n_rows) < 0.3, np.nan, rng.lognormal(3, 1, n_rows)),
+        })
+
+        start = time.perf_counter()
+        old_labels = genres.apply(simplify_genre)
+        apply_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        encoding = encode_genres(genres)
+        new_labels = encoding.labels()
+        labels_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        old_stats = explode_stats(genres, values)
+        explode_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new_stats = encoding.stats(values)
+        stats_s = time.perf_counter() - start
+
+        same = old_labels.astype(str).equals(new_labels.astype(str)) and np.allclose(
+            old_stats.astype(float).to_numpy(),
+            new_stats.loc[old_stats.index, old_stats.columns].astype(float).to_numpy(),
+            equal_nan=True,
+        )
+        print(f"{n_rows:>10} {apply_s:8.2f} {labels_s:9.3f} {explode_s:10.2f} {stats_s:8.3f} {'yes' if same else 'NO':>5}")
+
+
+if __name__ == "__main__":
+    main()
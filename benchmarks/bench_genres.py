@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Benchmark: TMDB genre decoding throughput.
+
+Compares the original per-row approach (Series.apply with ast.literal_eval,
+as parse_genres did) with pipeline.genres.decode_genres (JSON decoder, one
+parse per distinct string) and multi_hot, on synthetic genres columns drawn
+from a few hundred repeating combinations like the real TMDB export.
+
+Usage:
+    python benchmarks/bench_genres.py --sizes 100000 1000000
+"""
+
+import argparse
+import ast
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pipeline.genres import decode_genres, multi_hot, parse_genre_json
+from synthetic_data import TMDB_GENRES
+
+
+def make_raw_genres(n_rows, n_combinations=400, seed=0):
+    rng = np.random.default_rng(seed)
+    combos = []
+    for _ in range(n_combinations):
+        picks = rng.choice(len(TMDB_GENRES), size=rng.integers(1, 5), replace=False)
+        combos.append(json.dumps([{"id": TMDB_GENRES[i][0], "name": TMDB_GENRES[i][1]} for i in picks]))
+    combos.append("[]")
+    return pd.Series(np.array(combos, dtype=object)[rng.integers(0, len(combos), size=n_rows)])
+
+
+def literal_eval_genres(genre_str):
+    """
+    parse_genres from the TMDB cleaner, with the missing ast import fixed.
+    """
+    if pd.isna(genre_str) or genre_str == "[]":
+        return np.nan
+    try:
+        genre_list = [d["name"] for d in ast.literal_eval(genre_str)]
+        genre_list.sort()
+        return ", ".join(genre_list)
+    except Exception:
+        return np.nan
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'literal_eval rows/s':>20} {'decode rows/s':>15} {'multi_hot rows/s':>17} {'same':>5}")
+    for n_rows in args.sizes:
+        raw = make_raw_genres(n_rows)
+        parse_genre_json.cache_clear()
+
+        start = time.perf_counter()
+        old = raw.apply(literal_eval_genres)
+        old_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new = decode_genres(raw)
+        new_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        multi_hot(new)
+        hot_s = time.perf_counter() - start
+
+        same = "yes" if old.fillna("").astype(str).equals(new.fillna("").astype(str)) else "NO"
+        print(f"{n_rows:>10} {n_rows / old_s:>20,.0f} {n_rows / new_s:>15,.0f} {n_rows / hot_s:>17,.0f} {same:>5}")
+
+
+if __name__ == "__main__":
+    main()
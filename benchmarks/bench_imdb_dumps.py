@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+"""
+Benchmark: streaming ingest of the IMDb TSV datasets (pipeline/imdb_dumps.py)
+against loading the four files whole and merging them.
+
+Generates title.basics, title.ratings, title.crew and name.basics as gzip
+compressed TSVs with the real files' columns and proportions:
+- about 6% of titles are movies, most of the rest are TV episodes and shorts
+- about 13% of titles have a rating (half of the movies)
+- every title has a crew row, and there are 1.2 names per title
+- "\\N" is used for missing values, and some titles contain quotes
+
+At --titles 11000000 the row counts are close to the real files (11M
+titles, 1.4M ratings, 13M names). Each loader then runs in a fresh subprocess,
+so its time and peak RSS are measured in isolation (--skip-naive leaves
+out load + merge, which needs several GB at full size). The per-file rows/s
+and MB/s (compressed) of the streaming ingest are printed. The script exits
+non-zero if the two loaders produce different tables.
+
+Usage:
+    python benchmarks/bench_imdb_dumps.py --titles 1000000
+    python benchmarks/bench_imdb_dumps.py --titles 11000000 --skip-naive
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from pipeline.paths import IMDB_NAME_BASICS, IMDB_TITLE_BASICS, IMDB_TITLE_CREW, IMDB_TITLE_RATINGS
+
+TITLE_TYPES = ["tvEpisode", "short", "movie", "video", "tvSeries", "tvMovie", "tvMiniSeries", "tvSpecial",
+               "videoGame", "tvShort"]
+TITLE_TYPE_SHARES = [0.76, 0.09, 0.062, 0.027, 0.024, 0.013, 0.006, 0.005, 0.004, 0.009]
+GENRES = np.array(["Action", "Adult", "Adventure", "Animation", "Biography", "Comedy", "Crime", "Documentary",
+                   "Drama", "Family", "Fantasy", "History", "Horror", "Music", "Musical", "Mystery", "News",
+                   "Reality-TV", "Romance", "Sci-Fi", "Short", "Sport", "Talk-Show", "Thriller", "War", "Western"])
+WORDS = np.array(["The", "Night", "Love", "Last", "Story", "City", "Man", "Girl", "House", "Dark", "Return",
+                  "Blood", "River", "Summer", "King", "Secret", "Road", "Dead", "Life", "Sea", 'a "Quoted"'])
+MISSING = "\\N"
+
+# Runs in the child process: import first, record the RSS baseline, then load. The peak is read from VmHWM
+# because ru_maxrss starts at the parent's peak (which is high after generating the files)
+LOADER = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+sys.path.insert(0, sys.argv[1] + "/benchmarks")
+from bench_imdb_dumps import load_everything
+from pipeline.imdb_dumps import ingest_imdb_dumps
+def peak_kb():
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith("VmHWM"))
+mode, out, chunk_rows, files = sys.argv[2], sys.argv[3], int(sys.argv[4]), sys.argv[5:]
+base = peak_kb()
+start = time.perf_counter()
+if mode == "streaming":
+    df, stats = ingest_imdb_dumps(*files, chunk_rows=chunk_rows)
+else:
+    df, stats = load_everything(*files), {}
+seconds = time.perf_counter() - start
+peak = peak_kb()
+df.to_parquet(out)
+print(json.dumps({"seconds": seconds, "peak_mb": (peak - base) / 1024, "rows": len(df), "stats": stats}))
+"""
+
+
+def ids(prefix, numbers):
+    return np.char.add(prefix, np.char.zfill(numbers.astype(str), 7))
+
+
+def sometimes_missing(rng, values, p):
+    values = values.astype(object)
+    values[rng.random(len(values)) < p] = MISSING
+    return values
+
+
+def joined(picks, counts):
+    # picks[:, :counts] joined with "," per row (MISSING for a count of 0)
+    two = np.char.add(np.char.add(picks[:, 0], ","), picks[:, 1])
+    three = np.char.add(np.char.add(two, ","), picks[:, 2])
+    return np.where(counts == 0, MISSING, np.where(counts == 1, picks[:, 0], np.where(counts == 2, two, three)))
+
+
+def make_block(rng, first_title, n_titles, first_name, n_names, total_names):
+    """
+    One block of each file: titles first_title.. and names first_name.., as DataFrames.
+    """
+    tconst = ids("tt", np.arange(first_title, first_title + n_titles))
+    title_type = np.array(TITLE_TYPES)[rng.choice(len(TITLE_TYPES), size=n_titles, p=TITLE_TYPE_SHARES)]
+    words = WORDS[rng.integers(0, len(WORDS), size=(n_titles, 3))]
+    titles = np.char.add(np.char.add(np.char.add(words[:, 0], " "), np.char.add(words[:, 1], " ")), words[:, 2])
+    basics = pd.DataFrame({
+        "tconst": tconst,
+        "titleType": title_type,
+        "primaryTitle": titles,
+        "originalTitle": titles,
+        "isAdult": (rng.random(n_titles) < 0.02).astype(int),
+        "startYear": sometimes_missing(rng, rng.integers(1890, 2026, size=n_titles), 0.1),
+        "endYear": np.full(n_titles, MISSING),
+        "runtimeMinutes": sometimes_missing(rng, rng.integers(1, 240, size=n_titles), 0.5),
+        "genres": joined(GENRES[rng.integers(0, len(GENRES), size=(n_titles, 3))], rng.integers(0, 4, size=n_titles)),
+    })
+
+    # Half of the movies and a tenth of everything else are rated
+    rated = rng.random(n_titles) < np.where(title_type == "movie", 0.5, 0.1)
+    n_rated = int(rated.sum())
+    ratings = pd.DataFrame({
+        "tconst": tconst[rated],
+        "averageRating": np.round(rng.uniform(1, 10, size=n_rated), 1),
+        "numVotes": rng.integers(5, 3_000_000, size=n_rated) // rng.integers(1, 10_000, size=n_rated) + 5,
+    })
+
+    n_directors = rng.choice(4, size=n_titles, p=[0.2, 0.65, 0.1, 0.05])
+    people = ids("nm", rng.integers(1, total_names + 1, size=(n_titles, 3)))
+    crew = pd.DataFrame({"tconst": tconst, "directors": joined(people, n_directors),
+                         "writers": np.where(n_directors == 0, MISSING, people[:, 2])})
+
+    first = np.array(["Ana", "Ben", "Chloe", "David", "Eva", "Frank", "Grace", "Hiro", "Ines", "Jack"])
+    last = np.array(["Smith", "Garcia", "Kim", "Müller", "Rossi", "Silva", "Chen", "Nowak", "O'Brien", "Dubois"])
+    name_picks = rng.integers(0, 10, size=(n_names, 2))
+    names = pd.DataFrame({
+        "nconst": ids("nm", np.arange(first_name, first_name + n_names)),
+        "primaryName": np.char.add(np.char.add(first[name_picks[:, 0]], " "), last[name_picks[:, 1]]),
+        "birthYear": sometimes_missing(rng, rng.integers(1850, 2010, size=n_names), 0.8),
+        "deathYear": np.full(n_names, MISSING),
+        "primaryProfession": np.full(n_names, "actor,director"),
+        "knownForTitles": tconst[rng.integers(0, n_titles, size=n_names)],
+    })
+    return basics, ratings, crew, names
+
+
+def make_dumps(folder, n_titles, seed=0, block_titles=1_000_000):
+    """
+    Writes the four .tsv.gz files into folder, block_titles titles at a time,
+    and returns their paths (basics, ratings, crew, names).
+    """
+    rng = np.random.default_rng(seed)
+    total_names = int(n_titles * 1.2)
+    paths = [folder / path.name for path in (IMDB_TITLE_BASICS, IMDB_TITLE_RATINGS, IMDB_TITLE_CREW, IMDB_NAME_BASICS)]
+    files = [gzip.open(path, "wt", compresslevel=6, encoding="utf-8", newline="") for path in paths]
+    try:
+        for first_title in range(1, n_titles + 1, block_titles):
+            n = min(block_titles, n_titles + 1 - first_title)
+            first_name = int((first_title - 1) * 1.2) + 1
+            n_names = int((first_title - 1 + n) * 1.2) - first_name + 1
+            for file, block in zip(files, make_block(rng, first_title, n, first_name, n_names, total_names)):
+                block.to_csv(file, sep="\t", index=False, header=first_title == 1, quoting=csv.QUOTE_NONE)
+    finally:
+        for file in files:
+            file.close()
+    return paths
+
+
+def load_everything(basics, ratings, crew, names):
+    """
+    The same table as ingest_imdb_dumps, from the four files read whole and merged.
+    """
+    options = dict(sep="\t", dtype=str, na_values=["\\N"], keep_default_na=False, quoting=csv.QUOTE_NONE)
+    movies = pd.read_csv(basics, **options)
+    movies = movies[movies["titleType"] == "movie"]
+    movies = movies.merge(pd.read_csv(ratings, **options), on="tconst")
+    movies = movies.merge(pd.read_csv(crew, **options), on="tconst", how="left")
+    movies["nconst"] = movies["directors"].str.split(",").str[0]
+    movies = movies.merge(pd.read_csv(names, **options), on="nconst", how="left")
+    return pd.DataFrame({
+        "title": movies["primaryTitle"].astype("string"),
+        "director": movies["primaryName"].astype("string"),
+        "release_year": pd.to_numeric(movies["startYear"]).astype("Int64"),
+        "genre": movies["genres"].str.replace(",", ", ").astype("string"),
+        "rating": pd.to_numeric(movies["averageRating"]).astype("Float64"),
+        "metascore": pd.array([pd.NA] * len(movies), dtype="Int64"),
+        "runtime_in_minutes": pd.to_numeric(movies["runtimeMinutes"]).astype("Int64"),
+        "gross_in_millions": pd.array([pd.NA] * len(movies), dtype="Float64"),
+    })
+
+
+def measure(mode, out, chunk_rows, paths):
+    command = [sys.executable, "-c", LOADER, str(ROOT), mode, str(out), str(chunk_rows)] + [str(p) for p in paths]
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--titles", type=int, default=1_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=500_000)
+    parser.add_argument("--skip-naive", action="store_true", help="only run the streaming ingest")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        start = time.perf_counter()
+        paths = make_dumps(tmp, args.titles)
+        sizes = {path.name: path.stat().st_size / 2 ** 20 for path in paths}
+        print(f"generated {args.titles:,} titles in {time.perf_counter() - start:.0f}s: "
+              + ", ".join(f"{name} {mb:.0f} MB" for name, mb in sizes.items()))
+
+        streaming = measure("streaming", tmp / "streaming.parquet", args.chunk_rows, paths)
+        print(f"{'file':>14} {'rows':>11} {'kept':>9} {'seconds':>8} {'rows/s':>11} {'MB/s':>6}")
+        for path, (name, s) in zip(paths, streaming["stats"].items()):
+            print(f"{name:>14} {s['rows']:>11,} {s['kept']:>9,} {s['seconds']:8.2f} "
+                  f"{s['rows'] / s['seconds']:>11,.0f} {sizes[path.name] / s['seconds']:6.1f}")
+
+        print(f"{'loader':>14} {'movies':>9} {'seconds':>8} {'peak_mb':>8}")
+        print(f"{'streaming':>14} {streaming['rows']:>9,} {streaming['seconds']:8.2f} {streaming['peak_mb']:8.1f}")
+        if args.skip_naive:
+            return
+        naive = measure("naive", tmp / "naive.parquet", args.chunk_rows, paths)
+        print(f"{'load + merge':>14} {naive['rows']:>9,} {naive['seconds']:8.2f} {naive['peak_mb']:8.1f}")
+
+        try:
+            pd.testing.assert_frame_equal(pd.read_parquet(tmp / "streaming.parquet"), pd.read_parquet(tmp / "naive.parquet"))
+        except AssertionError as err:
+            print(f"streaming ingest DIFFERS from load + merge:\n{err}")
+            sys.exit(1)
+        print("same table: yes")
+
+
+if __name__ == "__main__":
+    main()
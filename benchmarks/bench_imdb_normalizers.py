@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Benchmark: IMDb release_year / runtime / gross normalization.
+
+Writes a synthetic IMDb file in the scraped format ("(1994)", "(I) (2016)",
+"142 min", "$28.34M", plus some blanks and junk), loads it, and times the
+original chain of .str.replace / .str.strip / pd.to_numeric calls from the
+IMDb cleaner against pipeline.imdb_normalizers (one extraction per field).
+
+The two only disagree on "(I) (2016)"-style years, which the old chain turned
+into NaN; the script reports how many rows that affects.
+
+Usage:
+    python benchmarks/bench_imdb_normalizers.py --rows 1000000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pipeline.imdb_normalizers import normalize_imdb_fields
+
+
+def make_raw_imdb(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    years = rng.integers(1920, 2024, size=n_rows).astype(str)
+    prefix = rng.choice(["", "(I) ", "(II) "], size=n_rows, p=[0.96, 0.03, 0.01])
+    release_year = np.char.add(np.char.add(prefix, "("), np.char.add(years, ")"))
+    runtime = np.char.add(rng.integers(60, 240, size=n_rows).astype(str), " min")
+    gross = np.char.add(np.char.add("$", np.round(rng.gamma(1.5, 40, size=n_rows), 2).astype(str)), "M")
+
+    df = pd.DataFrame({
+        "title": [f"Movie {i}" for i in range(n_rows)],
+        "release_year": release_year,
+        "runtime": runtime,
+        "gross": gross,
+    })
+    df.loc[rng.random(n_rows) < 0.02, "gross"] = "0"
+    df.loc[rng.random(n_rows) < 0.01, "runtime"] = "unknown"
+    df.loc[rng.random(n_rows) < 0.01, "release_year"] = np.nan
+    return df
+
+
+def legacy_chain(imdb):
+    """
+    The release_year, runtime and gross steps exactly as the IMDb cleaner had them.
+    """
+    imdb = imdb.copy()
+    imdb['release_year'] = imdb['release_year'].str.replace(r'\(|\)', '', regex=True)
+    imdb['release_year'] = imdb['release_year'].str.replace(r'(I+)$', '', regex=True)
+    imdb['release_year'] = imdb['release_year'].str.strip()
+    imdb['release_year'] = pd.to_numeric(imdb['release_year'], errors='coerce').astype('Int64')
+    imdb['release_year'] = pd.to_numeric(imdb['release_year'], errors='coerce')
+
+    imdb['runtime_in_minutes'] = imdb['runtime'].str.replace('min', '', regex=False).str.strip()
+    imdb['runtime_in_minutes'] = pd.to_numeric(imdb['runtime_in_minutes'], errors='coerce').astype('Int64')
+    imdb = imdb.drop(columns=['runtime'])
+
+    imdb['gross_in_millions'] = imdb['gross'].str.replace('$', '', regex=False).str.replace('M', '', regex=False).str.strip()
+    imdb['gross_in_millions'] = pd.to_numeric(imdb['gross_in_millions'], errors='coerce')
+    imdb = imdb.drop(columns=['gross'])
+    return imdb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "imdb_raw.csv"
+        make_raw_imdb(args.rows).to_csv(path, index=False)
+        raw = pd.read_csv(path, dtype=str)
+
+    start = time.perf_counter()
+    old = legacy_chain(raw)
+    old_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new, rejected = normalize_imdb_fields(raw)
+    new_s = time.perf_counter() - start
+
+    print(f"rows: {args.rows:,}")
+    print(f"legacy chain:   {old_s:6.2f} s")
+    print(f"normalizers:    {new_s:6.2f} s  ({old_s / new_s:.1f}x)")
+    print(f"rejected values: {rejected}")
+
+    years_differ = int((old["release_year"].isna() & new["release_year"].notna()).sum())
+    runtime_same = old["runtime_in_minutes"].astype("Float64").equals(new["runtime_in_minutes"].astype("Float64"))
+    gross_same = old["gross_in_millions"].astype("Float64").equals(new["gross_in_millions"])
+    print(f"release_year recovered from '(I) (YYYY)' values: {years_differ:,}")
+    print(f"runtime identical: {runtime_same}, gross identical: {gross_same}")
+
+
+if __name__ == "__main__":
+    main()
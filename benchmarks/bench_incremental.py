@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Regression check + benchmark for incremental integration runs.
+
+Runs the integration script's main() on the checked-in cleaned data, with every
+output redirected to a temporary folder:
+
+- a full run, then an incremental run with nothing changed, which must reuse
+  every IMDb row and write the same merged_movies.csv
+- for each linking setting in CHANGES, an incremental run after changing it,
+  which must re-link every IMDb row and write the same merged_movies.csv as a
+  full run with that setting
+
+The script exits non-zero if any of these checks fail.
+
+Usage:
+    python benchmarks/bench_incremental.py
+"""
+
+import functools
+import importlib.util
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from pipeline.instrumentation import StageProfiler  # noqa: E402
+
+# (setting, value) pairs; each one is applied on its own to the script's defaults
+CHANGES = [
+    ("FUZZY_THRESHOLD", 0.70),
+    ("ASOF_YEAR_TOLERANCE", None),
+    ("FUZZY_YEAR_WINDOW", 1),
+]
+
+
+def load_integration():
+    path = ROOT / "data_integration" / "Week_3_IMDB_TMDB_Integration.py"
+    spec = importlib.util.spec_from_file_location("week_3_integration", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def redirect_outputs(integration, folder):
+    integration.OUTPUT_DIR = folder
+    integration.MERGED_CSV = folder / "merged_movies"
+    integration.LOG_JSON = folder / "merge_log.json"
+    integration.LINK_TABLE_CSV = folder / "link_table.csv"
+    integration.AGGREGATE_CUBE = folder / "aggregate_cube.npz"
+    integration.SIMILARITY_CACHE_PATH = folder / "similarity_cache.npz"
+    integration.FUZZY_CHECKPOINT_PATH = folder / "fuzzy_checkpoint.jsonl"
+    integration.TITLE_INDEX_PATH = folder / "tmdb_title_index.npz"
+    integration.FUZZY_PROGRESS = False
+    integration.StageProfiler = functools.partial(StageProfiler, log_path=folder / "integration.jsonl")
+
+
+def run(integration, incremental):
+    """
+    One quiet run of main(). Returns (seconds, merge_log counts, merged_movies.csv bytes).
+    """
+    stdout, sys.stdout = sys.stdout, open("/dev/null", "w")
+    try:
+        start = time.perf_counter()
+        integration.main(incremental=incremental)
+        seconds = time.perf_counter() - start
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    counts = json.loads(Path(integration.LOG_JSON).read_text())
+    merged = Path(f"{integration.MERGED_CSV}.csv").read_bytes()
+    return seconds, counts, merged
+
+
+def main():
+    integration = load_integration()
+    defaults = {name: getattr(integration, name) for name, _ in CHANGES}
+    failures = []
+
+    print(f"{'run':<40} {'seconds':>8} {'reused':>7} {'relinked':>9}  check")
+    with tempfile.TemporaryDirectory() as tmp:
+        redirect_outputs(integration, Path(tmp))
+
+        def report(label, result, reused, expected):
+            seconds, counts, merged = result
+            ok = counts["imdb_rows_reused"] == reused and merged == expected
+            print(f"{label:<40} {seconds:8.2f} {counts['imdb_rows_reused']:>7} "
+                  f"{counts['imdb_rows_recomputed']:>9}  {'ok' if ok else 'FAILED'}")
+            if not ok:
+                failures.append(label)
+
+        full = run(integration, incremental=False)
+        total = full[1]["imdb_total_rows"]
+        report("full run", full, 0, full[2])
+        report("incremental, nothing changed", run(integration, incremental=True), total, full[2])
+
+        for name, value in CHANGES:
+            # Start from a link table written with the defaults
+            for setting, default in defaults.items():
+                setattr(integration, setting, default)
+            run(integration, incremental=False)
+            setattr(integration, name, value)
+            changed = run(integration, incremental=True)
+            expected = run(integration, incremental=False)[2]
+            report(f"incremental, {name} = {value}", changed, 0, expected)
+
+    if failures:
+        print("\nFailed: " + ", ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Benchmark: replaying the IMDb OpenRefine history with pipeline/openrefine.py.
+
+First replays the history on the real raw file and checks the result against
+IMDB_OpenRefine_Semi_Clean.csv. Then, for each size, samples rows of the raw
+file (with fresh gross values, so the column isn't limited to the 1000
+originals) and times the fused replay (one program per column) against the
+same history with every operation run on its own. The script exits non-zero
+if the first check fails or the two replays disagree.
+
+Usage:
+    python benchmarks/bench_openrefine_replay.py --sizes 100000 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pipeline.openrefine import compile_history, load_history, read_raw, replay
+from pipeline.paths import IMDB_OPENREFINE_HISTORY, IMDB_RAW, IMDB_SEMI_CLEAN
+
+
+def make_raw(raw, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = raw.iloc[rng.integers(0, len(raw), size=n_rows)].reset_index(drop=True)
+    gross = np.char.add(np.char.add("$", np.round(rng.gamma(1.5, 40, size=n_rows), 2).astype(str)), "M")
+    df["gross"] = np.where(df["gross"] == "0", "0", gross)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    raw = read_raw(IMDB_RAW)
+    ops = load_history(IMDB_OPENREFINE_HISTORY)
+    matches = replay(raw, ops).equals(read_raw(IMDB_SEMI_CLEAN))
+    plan = compile_history(ops, raw.columns)
+    print(f"{len(ops)} operations -> {len(plan['programs'])} column programs, "
+          f"{sum(len(p.steps) for p in plan['programs'])} steps; "
+          f"replay {'matches' if matches else 'DIFFERS from'} {IMDB_SEMI_CLEAN.name}")
+    failed = not matches
+
+    print(f"{'rows':>10} {'fused_s':>8} {'unfused_s':>9} {'speedup':>8} {'same':>5}")
+    for n_rows in args.sizes:
+        df = make_raw(raw, n_rows)
+
+        start = time.perf_counter()
+        fused = replay(df, ops)
+        fused_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        unfused = replay(df, ops, fuse=False)
+        unfused_s = time.perf_counter() - start
+
+        same = fused.equals(unfused)
+        failed |= not same
+        print(f"{n_rows:>10} {fused_s:8.2f} {unfused_s:9.2f} {unfused_s / fused_s:7.1f}x {'yes' if same else 'NO':>5}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
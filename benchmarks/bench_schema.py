@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Memory report: merged_movies in its default pandas layout vs. MERGED_SCHEMA.
+
+Tiles the checked-in merged_movies.csv up to each requested size, writes it
+as CSV and as schema-typed Parquet, and loads it back three ways:
+
+- read_csv:      pd.read_csv(...)                              (the plain load)
+- schema_csv:    pd.read_csv(..., dtype=MERGED_SCHEMA) via read_table
+- schema_parquet: read_table(..., schema=MERGED_SCHEMA)        (what the scripts do)
+
+For each it prints the in-memory size (DataFrame.memory_usage(deep=True)) and
+load time, then a per-column breakdown for the largest size.
+
+Usage:
+    python benchmarks/bench_schema.py --sizes 100000 1000000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from pipeline import storage
+from pipeline.schema import MERGED_SCHEMA, apply_schema
+from pipeline.storage import read_table, write_table
+
+MERGED_CSV = ROOT / "data_integration" / "integration_output" / "merged_movies.csv"
+
+
+def load(how, stem):
+    if how == "read_csv":
+        return pd.read_csv(stem.with_suffix(".csv"))
+    if how == "schema_csv":
+        # Hide the Parquet file so read_table parses the CSV with the schema's dtypes
+        parquet = stem.with_suffix(".parquet")
+        hidden = stem.with_suffix(".parquet.hidden")
+        if parquet.exists():
+            parquet.rename(hidden)
+        try:
+            return read_table(stem, schema=MERGED_SCHEMA)
+        finally:
+            if hidden.exists():
+                hidden.rename(parquet)
+    return read_table(stem, schema=MERGED_SCHEMA)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    base = pd.read_csv(MERGED_CSV)
+    ways = ["read_csv", "schema_csv"] + (["schema_parquet"] if storage.PARQUET_AVAILABLE else [])
+    print(f"{'rows':>10} {'load':>15} {'memory_mb':>10} {'vs_read_csv':>12} {'load_s':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.sizes:
+            reps = -(-n_rows // len(base))
+            df = pd.concat([base] * reps, ignore_index=True).iloc[:n_rows]
+            stem = Path(tmp) / f"merged_{n_rows}"
+            write_table(apply_schema(df, MERGED_SCHEMA), stem, csv=True)
+
+            usage = {}
+            for how in ways:
+                start = time.perf_counter()
+                loaded = load(how, stem)
+                seconds = time.perf_counter() - start
+                usage[how] = loaded.memory_usage(deep=True, index=False)
+                total = usage[how].sum() / 1e6
+                ratio = usage[how].sum() / usage["read_csv"].sum()
+                print(f"{n_rows:>10} {how:>15} {total:10.1f} {ratio:11.0%} {seconds:7.2f}")
+
+    print(f"\nPer column at {args.sizes[-1]:,} rows (MB):")
+    print((pd.DataFrame(usage) / 1e6).round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
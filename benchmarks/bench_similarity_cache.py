@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+Benchmark: fuzzy linking with the on-disk similarity cache and threshold sweeps.
+
+For each size it links synthetic IMDb/TMDB title frames at 0.90 without a
+cache, then with an empty cache (scores every block once and saves the
+scores above the 0.60 floor), then again at 0.80 from the saved cache (no
+scoring), and sweeps 21 thresholds with precision/recall against the known
+true pairs (every other candidate pair is labelled a non-match). Cached
+results are checked against uncached links at both thresholds and the
+sweep's match counts against the linker; the script exits non-zero on any
+mismatch.
+
+Usage:
+    python benchmarks/bench_similarity_cache.py --sizes 10000 100000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_fuzzy_linking import make_titles
+from pipeline.fuzzy_matching import link_by_year_blocks, scored_year_block_pairs
+from pipeline.similarity_cache import SimilarityCache
+from pipeline.threshold_sweep import DEFAULT_THRESHOLDS, sweep
+
+
+def make_labelled_frames(n_rows, seed=0):
+    """
+    Like bench_fuzzy_linking.make_frames (a third of the TMDB titles are typo'd
+    copies of same-year IMDb titles), plus the true (IMDb title, TMDB title) pairs.
+    """
+    rng = np.random.default_rng(seed)
+    left_titles = make_titles(n_rows, rng)
+    left_years = rng.integers(1950, 2021, size=n_rows)
+    right_titles = make_titles(n_rows, rng)
+    right_years = rng.integers(1950, 2021, size=n_rows)
+
+    copied = rng.choice(n_rows, size=n_rows // 3, replace=False)
+    sources = rng.permutation(n_rows)[: len(copied)]
+    for target, source in zip(copied, sources):
+        title = left_titles[source]
+        cut = rng.integers(0, len(title))
+        right_titles[target] = title[:cut] + title[cut + 1:]
+        right_years[target] = left_years[source]
+
+    left = pd.DataFrame({"imdb_index": np.arange(n_rows), "title_norm": left_titles,
+                         "release_year": pd.array(left_years, dtype="Int64")})
+    right = pd.DataFrame({"tmdb_index": np.arange(n_rows), "title_norm": right_titles,
+                          "release_year": pd.array(right_years, dtype="Int64")})
+    labels = pd.DataFrame({"title_norm_imdb": [left_titles[s] for s in sources],
+                           "title_norm_tmdb": [right_titles[t] for t in copied], "is_match": True})
+    return left, right, labels
+
+
+def titled_pairs(scored, left, right):
+    scored["title_norm_imdb"] = left["title_norm"].to_numpy()[scored["_left_pos"].to_numpy()]
+    scored["title_norm_tmdb"] = right["title_norm"].to_numpy()[scored["_right_pos"].to_numpy()]
+    return scored
+
+
+def same(a, b):
+    return a.reset_index(drop=True).astype(float).equals(b.reset_index(drop=True).astype(float))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--workers", type=int, default=-1)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'rows':>10} {'plain_s':>8} {'cold_s':>8} {'warm_s':>8} {'sweep_s':>8} {'pairs':>10} "
+          f"{'m@0.90':>7} {'m@0.80':>7} {'p@0.80':>7} {'r@0.80':>7} {'same':>5}")
+    for n_rows in args.sizes:
+        left, right, labels = make_labelled_frames(n_rows)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "similarity_cache.npz"
+
+            start = time.perf_counter()
+            plain = link_by_year_blocks(left, right, threshold=0.90, workers=args.workers)
+            plain_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            cache = SimilarityCache.open(path, fuzz.token_sort_ratio)
+            cold = link_by_year_blocks(left, right, threshold=0.90, workers=args.workers, cache=cache)
+            cache.save()
+            cold_s = time.perf_counter() - start
+
+            # A new threshold, from the saved scores only
+            start = time.perf_counter()
+            cache = SimilarityCache.open(path, fuzz.token_sort_ratio)
+            warm = link_by_year_blocks(left, right, threshold=0.80, workers=args.workers, cache=cache)
+            warm_s = time.perf_counter() - start
+            rescored = cache.misses
+
+            # Label every other candidate pair as a non-match, so precision counts all false positives
+            candidates = titled_pairs(scored_year_block_pairs(left, right, cache), left, right)
+            negatives = candidates[["title_norm_imdb", "title_norm_tmdb"]].assign(is_match=False)
+            labels = pd.concat([negatives, labels]).drop_duplicates(["title_norm_imdb", "title_norm_tmdb"], keep="last")
+
+            start = time.perf_counter()
+            scored = titled_pairs(scored_year_block_pairs(left, right, cache), left, right)
+            table = sweep(scored, DEFAULT_THRESHOLDS, labels=labels, imdb_titles=left["title_norm"])
+            sweep_s = time.perf_counter() - start
+            pairs = len(cache)
+
+        at = table.set_index(table["threshold"].round(2))
+        plain_80 = link_by_year_blocks(left, right, threshold=0.80, workers=args.workers)
+        ok = (same(plain, cold) and same(plain_80, warm) and rescored == 0
+              and at.loc[0.90, "matches"] == len(plain) and at.loc[0.80, "matches"] == len(plain_80))
+        failed |= not ok
+        print(f"{n_rows:>10} {plain_s:8.2f} {cold_s:8.2f} {warm_s:8.2f} {sweep_s:8.2f} {pairs:>10} "
+              f"{at.loc[0.90, 'matches']:>7} {at.loc[0.80, 'matches']:>7} {at.loc[0.80, 'precision']:7.3f} "
+              f"{at.loc[0.80, 'recall']:7.3f} {'yes' if ok else 'NO':>5}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Benchmark: load time and peak memory of the CSV vs. Parquet intermediates.
+
+Tiles the checked-in merged_movies.csv up to each requested size, writes it with
+pipeline.storage.write_table (Parquet + CSV) and then loads it back in a fresh
+subprocess per format, so peak RSS is measured in isolation:
+
+- csv:     pd.read_csv(...).convert_dtypes()  (what every stage used to do)
+- parquet: pd.read_parquet(...)               (what read_table does now)
+
+Usage:
+    python benchmarks/bench_storage.py --sizes 100000 1000000
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from pipeline.storage import write_table
+
+MERGED_CSV = ROOT / "data_integration" / "integration_output" / "merged_movies.csv"
+
+# Runs in the child process: import first, record the RSS baseline, then load
+LOADER = """
+import json, resource, sys, time
+import pandas as pd
+import pyarrow.parquet
+fmt, path = sys.argv[1], sys.argv[2]
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+df = pd.read_csv(path).convert_dtypes() if fmt == "csv" else pd.read_parquet(path)
+seconds = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": seconds, "peak_mb": (peak - base) / 1024, "rows": len(df)}))
+"""
+
+
+def measure(fmt, path):
+    out = subprocess.run([sys.executable, "-c", LOADER, fmt, str(path)], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    base = pd.read_csv(MERGED_CSV).convert_dtypes()
+    print(f"{'rows':>10} {'format':>8} {'file_mb':>8} {'load_s':>8} {'peak_mb':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.sizes:
+            reps = -(-n_rows // len(base))
+            df = pd.concat([base] * reps, ignore_index=True).iloc[:n_rows]
+            stem = Path(tmp) / f"merged_{n_rows}"
+            write_table(df, stem, csv=True)
+            for fmt in ("csv", "parquet"):
+                path = stem.with_suffix(f".{fmt}")
+                result = measure(fmt, path)
+                size_mb = path.stat().st_size / 1e6
+                print(f"{n_rows:>10} {fmt:>8} {size_mb:8.1f} {result['seconds']:8.2f} {result['peak_mb']:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
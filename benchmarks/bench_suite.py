@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+"""
+End-to-end benchmark suite: every stage of the pipeline on synthetic data at
+several sizes, compared with a saved JSON baseline.
+
+For each size, synthetic_data.write_dataset writes raw IMDb and TMDB files of
+that many rows into a temporary folder, and the stages run on them in order:
+- clean_imdb, clean_tmdb: the two cleaning scripts, run unchanged (runpy) with
+  pipeline.paths pointed at the temporary folder
+- normalize_columns, exact_merge, asof_link, fuzzy_rapidfuzz,
+  fuzzy_recordlinkage, fuse: the functions of Week_3_IMDB_TMDB_Integration.py
+  (fuzzy_link_remaining once per backend; a backend whose package is not
+  installed is reported as skipped)
+- derived_columns: the Week 5 columns (pipeline/derived.py) on the fused
+  table, with MERGED_SCHEMA applied as Week 5 reads it
+
+Every stage runs --repeat times and keeps its best wall time and its lowest
+peak memory. Peak memory is how far the resident set grew above its size when
+the stage started (the peak is reset through /proc/self/clear_refs on Linux;
+elsewhere tracemalloc's peak of Python allocations is used, which is slower).
+
+--save writes the results as the baseline (sizes that were not run are kept).
+Otherwise the run is compared with the baseline, and the script exits
+non-zero if a stage got slower than --tolerance (0.25 = 25%) or grew its peak
+memory by more than --memory-tolerance. Changes smaller than --min-seconds
+or --min-mb are noise and never fail. Stages whose output row count changed
+are flagged too, since the speed of a stage that now does something else says
+little. Times and memory only compare on the machine that recorded the
+baseline: on any other machine (or Python/pandas/numpy version) only the row
+counts are checked, and --save starts a new baseline instead of adding to it.
+The baseline is per machine and not checked in (benchmarks/baselines/ is
+ignored by git); record one with --save before changing the code.
+
+Usage:
+    python benchmarks/bench_suite.py --save
+    python benchmarks/bench_suite.py --sizes 10000 50000 --tolerance 0.2
+"""
+
+import argparse
+import contextlib
+import ctypes
+import gc
+import importlib.util
+import io
+import json
+import os
+import platform
+import runpy
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except Exception:
+    pa = None
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import pipeline.instrumentation as instrumentation
+import pipeline.paths as paths
+from pipeline.derived import add_derived_columns
+from pipeline.schema import MERGED_SCHEMA, apply_schema
+from synthetic_data import write_dataset
+
+SCRIPTS = ROOT / "data_cleaning" / "python_cleaning_scripts"
+BASELINE = ROOT / "benchmarks" / "baselines" / "bench_suite.json"
+BACKENDS = ["rapidfuzz", "recordlinkage"]
+WARM_UP_ROWS = 1000
+
+# The cleaning scripts' StageProfilers open peak windows of their own inside a measurement
+RSS_PEAK = instrumentation.PEAK_RESET_AVAILABLE
+
+# Freed memory often stays resident (in malloc's and Arrow's pools), and a stage that reuses it would show no
+# growth at all, so both pools hand their free memory back before every measurement
+try:
+    _LIBC = ctypes.CDLL("libc.so.6")
+except OSError:
+    _LIBC = None
+
+
+def _release_free_memory():
+    gc.collect()
+    if pa is not None:
+        pa.default_memory_pool().release_unused()
+    if _LIBC is not None:
+        _LIBC.malloc_trim(0)
+
+
+def measure(function, *args, **kwargs):
+    """
+    function(*args, **kwargs), its wall and CPU seconds, and its peak memory
+    growth in MB.
+    """
+    _release_free_memory()
+    if RSS_PEAK:
+        window = instrumentation.start_peak_window()
+    else:
+        tracemalloc.start()
+    start, cpu_start = time.perf_counter(), time.process_time()
+    result = function(*args, **kwargs)
+    seconds, cpu_s = time.perf_counter() - start, time.process_time() - cpu_start
+    if RSS_PEAK:
+        peak_mb = instrumentation.end_peak_window(window) - window["start"]
+    else:
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return result, {"seconds": seconds, "cpu_s": cpu_s, "peak_mb": peak_mb}
+
+
+def _rows(result):
+    if isinstance(result, tuple):
+        return sum(_rows(part) for part in result)
+    return result if isinstance(result, int) else len(result)
+
+
+def run_stage(results, name, repeat, function, *args, rows_in=None, **kwargs):
+    """
+    Runs a stage repeat times, records its best time and lowest peak in
+    results[name], and returns the result of the last run.
+    """
+    runs = []
+    for _ in range(repeat):
+        result, run = measure(function, *args, **kwargs)
+        runs.append(run)
+    results[name] = {
+        "seconds": round(min(run["seconds"] for run in runs), 4),
+        "cpu_s": round(min(run["cpu_s"] for run in runs), 4),
+        "peak_mb": round(max(min(run["peak_mb"] for run in runs), 0.0), 1),
+        "rows_in": rows_in,
+        "rows_out": _rows(result),
+    }
+    return result
+
+
+@contextlib.contextmanager
+def redirected_paths(folder):
+    """
+    pipeline.paths (and the profiler's log folder) pointed into folder, so a
+    script reads the synthetic raw files and writes its outputs next to them.
+    """
+    overrides = {
+        "IMDB_RAW": folder / "imdb_raw.csv",
+        "TMDB_RAW": folder / "tmdb_5000_movies.csv",
+        "IMDB_CLEANED": folder / "imdb_cleaned",
+        "TMDB_CLEANED": folder / "tmdb_cleaned",
+    }
+    saved = {name: getattr(paths, name) for name in overrides}
+    saved_profiles = instrumentation.PROFILE_DIR
+    try:
+        for name, path in overrides.items():
+            setattr(paths, name, path)
+        instrumentation.PROFILE_DIR = folder / "profiles"
+        yield
+    finally:
+        for name, path in saved.items():
+            setattr(paths, name, path)
+        instrumentation.PROFILE_DIR = saved_profiles
+
+
+def run_cleaner(script, output):
+    """
+    Runs a cleaning script as __main__ with its printing silenced, and returns
+    the number of rows it kept (len of its output variable).
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        namespace = runpy.run_path(str(script), run_name="__main__")
+    return len(namespace[output])
+
+
+def load_integration():
+    path = ROOT / "data_integration" / "Week_3_IMDB_TMDB_Integration.py"
+    spec = importlib.util.spec_from_file_location("week_3_integration", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def available_backends(integration):
+    """
+    The fuzzy backends that can run here. The integration script only imports
+    the one it uses, so the other one is added to the module when installed.
+    """
+    backends = []
+    try:
+        from rapidfuzz import fuzz
+        from pipeline.fuzzy_matching import link_by_year_blocks, link_candidate_pairs
+        integration.fuzz = fuzz
+        integration.link_by_year_blocks = link_by_year_blocks
+        integration.link_candidate_pairs = link_candidate_pairs
+        backends.append("rapidfuzz")
+    except ImportError:
+        pass
+    try:
+        import recordlinkage
+        integration.rl = recordlinkage
+        backends.append("recordlinkage")
+    except ImportError:
+        pass
+    return backends
+
+
+def fuzzy_with_backend(integration, backend, merged_exact, tmdb):
+    saved = integration.USE_RECORDLINKAGE
+    integration.USE_RECORDLINKAGE = backend == "recordlinkage"
+    try:
+        return integration.fuzzy_link_remaining(merged_exact, tmdb)
+    finally:
+        integration.USE_RECORDLINKAGE = saved
+
+
+def run_size(size, folder, repeat, integration, backends):
+    """
+    All stages on size synthetic rows per side; returns {stage: record}.
+    """
+    results = {}
+    write_dataset(folder, size)
+
+    with redirected_paths(folder):
+        run_stage(results, "clean_imdb", repeat, run_cleaner, SCRIPTS / "Week_2_Cleaning_IMDB_Data.py", "imdb_clean",
+                  rows_in=size)
+        run_stage(results, "clean_tmdb", repeat, run_cleaner, SCRIPTS / "Week_2_Cleaning_TMDB_Data.py", "tmdb",
+                  rows_in=size)
+
+    imdb, tmdb = integration.load_and_preview(folder / "imdb_cleaned", folder / "tmdb_cleaned")
+    imdb, tmdb = run_stage(results, "normalize_columns", repeat, integration.normalize_columns, imdb, tmdb,
+                           rows_in=len(imdb) + len(tmdb))
+    merged_exact = run_stage(results, "exact_merge", repeat, integration.exact_merge, imdb, tmdb, rows_in=len(imdb))
+    left_only = int((merged_exact["_merge"] == "left_only").sum())
+    asof_df = run_stage(results, "asof_link", repeat, integration.asof_link_remaining, merged_exact, tmdb,
+                        rows_in=left_only)
+
+    # The fuzzy tier gets the rows the as-of tier left, as in main()
+    fuzzy_input = merged_exact.drop(index=asof_df["imdb_index"])
+    matches = {}
+    for backend in backends:
+        matches[backend] = run_stage(results, f"fuzzy_{backend}", repeat, fuzzy_with_backend, integration, backend,
+                                     fuzzy_input, tmdb, rows_in=left_only - len(asof_df))
+    matches_df = next(iter(matches.values()))
+
+    fused = run_stage(results, "fuse", repeat, integration.apply_matches_and_fuse, merged_exact, matches_df, imdb, tmdb,
+                      asof_matches=asof_df, rows_in=len(merged_exact))
+    merged = apply_schema(fused, MERGED_SCHEMA)
+    run_stage(results, "derived_columns", repeat, lambda df: add_derived_columns(df)[0], merged, rows_in=len(merged))
+    return results
+
+
+def machine():
+    return {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def compare(record, base, args, timings=True):
+    """
+    The problems of one stage record against its baseline (empty if none).
+    Without timings (a baseline from another machine) only rows_out is checked.
+    """
+    problems = []
+    if timings and record["seconds"] > base["seconds"] * (1 + args.tolerance) and \
+            record["seconds"] - base["seconds"] > args.min_seconds:
+        if base["seconds"] > 0:
+            problems.append(f"{record['seconds'] / base['seconds']:.2f}x the baseline time")
+        else:
+            problems.append(f"{record['seconds']:.3f}s against a baseline of 0s")
+    if timings and record["peak_mb"] > base["peak_mb"] * (1 + args.memory_tolerance) and \
+            record["peak_mb"] - base["peak_mb"] > args.min_mb:
+        problems.append(f"peak memory {base['peak_mb']:.0f} -> {record['peak_mb']:.0f} MB")
+    if record["rows_out"] != base["rows_out"]:
+        problems.append(f"rows out {base['rows_out']} -> {record['rows_out']}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 200_000], help="raw rows per side")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage (the best one is kept)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="write this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=None,
+                        help="allowed peak memory growth (default: --tolerance)")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="time differences below this never fail")
+    parser.add_argument("--min-mb", type=float, default=10.0, help="memory differences below this never fail")
+    args = parser.parse_args()
+    if args.memory_tolerance is None:
+        args.memory_tolerance = args.tolerance
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+    same_machine = baseline is not None and baseline["machine"] == machine()
+    if baseline is not None and not same_machine and not args.save:
+        print(f"Warning: {args.baseline} was recorded on {baseline['machine']}, this is {machine()}.\n"
+              f"Only the row counts are compared; run with --save to record a baseline for this machine.")
+
+    integration = load_integration()
+    backends = available_backends(integration)
+    if not backends:
+        sys.exit("Neither rapidfuzz nor recordlinkage is installed")
+    skipped = [backend for backend in BACKENDS if backend not in backends]
+
+    results, failures = {}, []
+    print(f"{'rows':>8} {'stage':<20} {'seconds':>8} {'base_s':>8} {'peak_MB':>8} {'base_MB':>8} {'rows_out':>9}  status")
+    with tempfile.TemporaryDirectory() as tmp:
+        integration.FUZZY_CHECKPOINT_PATH = Path(tmp) / "fuzzy_checkpoint.jsonl"
+        integration.FUZZY_PROGRESS = False
+        # An untimed run on a small table first, so no stage pays for imports the first time a script runs
+        run_size(WARM_UP_ROWS, Path(tmp) / "warm_up", 1, integration, backends)
+        for size in args.sizes:
+            results[str(size)] = run_size(size, Path(tmp) / str(size), args.repeat, integration, backends)
+            for stage, record in results[str(size)].items():
+                base = None if baseline is None else baseline["results"].get(str(size), {}).get(stage)
+                problems = [] if base is None or args.save else compare(record, base, args, same_machine)
+                failures += [f"{size} rows, {stage}: {problem}" for problem in problems]
+                status = "new" if base is None else "; ".join(problems) or "ok"
+                print(f"{size:>8} {stage:<20} {record['seconds']:8.3f} "
+                      f"{'' if base is None else format(base['seconds'], '.3f'):>8} {record['peak_mb']:8.1f} "
+                      f"{'' if base is None else format(base['peak_mb'], '.1f'):>8} {record['rows_out']:>9}  {status}")
+            for backend in skipped:
+                print(f"{size:>8} {'fuzzy_' + backend:<20} skipped ({backend} is not installed)")
+
+    if args.save:
+        # Timings from another machine can't be mixed with this one's
+        saved = baseline["results"] if same_machine else {}
+        saved.update(results)
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({
+            "machine": machine(),
+            "recorded": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "repeat": args.repeat,
+            "memory": "rss" if RSS_PEAK else "tracemalloc",
+            "results": dict(sorted(saved.items(), key=lambda item: int(item[0]))),
+        }, indent=2) + "\n")
+        print(f"Saved the baseline to {args.baseline}")
+    elif baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save to record one")
+    elif failures:
+        print("\nRegressions:")
+        for failure in failures:
+            print("  " + failure)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python
+"""
+Synthetic raw IMDb and TMDB files for load-testing the pipeline at any size.
+
+write_dataset writes, into one folder:
+- imdb_raw.csv: the scraped IMDb list's columns and formats ("(1994)" and
+  "(I) (2016)" years, "142 min" runtimes, "$28.34M" gross, "0" for a missing
+  metascore or gross), as Week_2_Cleaning_IMDB_Data.py reads it
+- tmdb_5000_movies.csv: the 20 columns of the Kaggle TMDB export (JSON
+  genres, keywords and companies, dollar budgets and revenues, ISO release
+  dates, votes), as Week_2_Cleaning_TMDB_Data.py reads it
+- truth.csv: every planted IMDb/TMDB pair (kind, title and year on both sides)
+
+Every title is unique, so the planted pairs are the only true matches:
+- exact: the same title and year in TMDB (a tenth of them with different case
+  or spacing, which norm_title removes)
+- year: the same title one year earlier or later (the as-of tier)
+- typo: one letter deleted, replaced or swapped, same year (the fuzzy tier)
+
+The shares are fractions of the IMDb rows. A --dirty share of the other rows
+break one cleaning rule each (metascore "0", budget 0, vote_count <= 10, ...),
+so the cleaners have something to reject. Planted rows are always clean,
+so every pair in truth.csv reaches the integration step.
+
+Rows are generated and appended CHUNK_ROWS at a time (the TMDB side of a
+pair lands in the same chunk, at a random row), so memory stays flat from
+10k to 100M rows.
+
+Usage:
+    python benchmarks/synthetic_data.py --rows 100000 --out /tmp/synthetic
+    python benchmarks/synthetic_data.py --rows 10000000 --tmdb-rows 5000000 --typo 0.1 --out /data/synthetic
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# pyarrow writes the CSV chunks over ten times faster than DataFrame.to_csv (it quotes every text field,
+# which read_csv parses the same way); without it to_csv is used
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    ARROW_AVAILABLE = True
+except Exception:
+    ARROW_AVAILABLE = False
+
+CHUNK_ROWS = 250_000
+KINDS = ["exact", "year", "typo"]
+
+IMDB_GENRES = ["Action", "Adventure", "Animation", "Biography", "Comedy", "Crime", "Drama", "Family", "Fantasy",
+               "Film-Noir", "History", "Horror", "Music", "Musical", "Mystery", "Romance", "Sci-Fi", "Sport",
+               "Thriller", "War", "Western"]
+# (id, name) of the TMDB genres, as they appear in the export's genres JSON
+TMDB_GENRES = [
+    (28, "Action"), (12, "Adventure"), (16, "Animation"), (35, "Comedy"), (80, "Crime"),
+    (99, "Documentary"), (18, "Drama"), (10751, "Family"), (14, "Fantasy"), (36, "History"),
+    (27, "Horror"), (10402, "Music"), (9648, "Mystery"), (10749, "Romance"),
+    (878, "Science Fiction"), (53, "Thriller"), (10752, "War"), (37, "Western"),
+]
+TMDB_RULE_COLUMNS = ["budget", "genres", "popularity", "release_date", "revenue", "runtime", "vote_average",
+                     "vote_count"]
+
+WORDS = ["The", "Dark", "Night", "Return", "King", "Star", "War", "Love", "Story", "Last", "City", "Lost", "River",
+         "Man", "Woman", "Dead", "Blue", "Red", "House", "Secret", "Life", "Time", "Game", "Road", "Home", "Girl",
+         "Boy", "Fire", "Ice", "Shadow", "Silent", "Golden", "Wild", "Broken", "Hidden", "Final", "First", "Long",
+         "Little", "Big", "Black", "White", "Iron", "Glass", "Stone", "Summer", "Winter", "Moon", "Sun", "Sea"]
+FIRST_NAMES = ["James", "Mary", "Akira", "Sofia", "Ingmar", "Agnes", "Satyajit", "Greta", "Pedro", "Chloe", "Bong",
+               "Jane", "Federico", "Kathryn", "Wong", "Claire", "Sergio", "Ava", "Hayao", "Lucrecia"]
+LAST_NAMES = ["Smith", "Kurosawa", "Coppola", "Varda", "Bergman", "Ray", "Gerwig", "Almodovar", "Zhao", "Joon-ho",
+              "Campion", "Fellini", "Bigelow", "Kar-wai", "Denis", "Leone", "DuVernay", "Miyazaki", "Martel", "Lee"]
+SYLLABLES = np.array([c + v for c in "bdfgklmnprstvz" for v in "aeiou"])
+# Titles end in a word spelled from the row's id in base-70 syllables. The id is first multiplied by a
+# number coprime with 70**5 (mod 70**5), so neighbouring ids get unrelated words and every id below 70**5 a different one
+WORD_SYLLABLES = 5
+ID_MULTIPLIER = 1_000_003
+
+
+def coined_words(ids):
+    """
+    A unique capitalized made-up word for each id (e.g. "Lorivesa").
+    """
+    x = ((np.asarray(ids, dtype=np.int64) + 1) * ID_MULTIPLIER) % len(SYLLABLES) ** WORD_SYLLABLES
+    words = np.char.capitalize(SYLLABLES[x % len(SYLLABLES)])
+    for _ in range(WORD_SYLLABLES - 1):
+        x //= len(SYLLABLES)
+        words = np.char.add(words, SYLLABLES[x % len(SYLLABLES)])
+    return words
+
+
+def make_titles(rng, ids):
+    words = np.array(WORDS)[rng.integers(0, len(WORDS), size=(len(ids), 2))]
+    return np.char.add(np.char.add(np.char.add(words[:, 0], " "), np.char.add(words[:, 1], " ")), coined_words(ids))
+
+
+def typo(rng, title):
+    """
+    title with one letter deleted, replaced by another letter, or swapped with its neighbour.
+    """
+    letters = [i for i, c in enumerate(title) if c.isalpha()]
+    i = letters[rng.integers(0, len(letters))]
+    edit = rng.integers(0, 3)
+    if edit == 2 and i + 1 < len(title) and title[i + 1].isalpha() and title[i + 1].lower() != title[i].lower():
+        return title[:i] + title[i + 1] + title[i] + title[i + 2:]
+    if edit == 0:
+        return title[:i] + title[i + 1:]
+    replacement = "abcdefghijklmnopqrstuvwxyz".replace(title[i].lower(), "")[rng.integers(0, 25)]
+    return title[:i] + replacement + title[i + 1:]
+
+
+def release_years(rng, n):
+    # Skewed towards recent years like both catalogues
+    return (2024 - np.minimum(rng.exponential(25, size=n), 104)).astype(np.int64)
+
+
+def json_pool(rng, n, items, max_items=3):
+    # n JSON lists of up to max_items of items, like the Kaggle export's keywords / companies / countries columns
+    return np.array([json.dumps([items[i] for i in rng.choice(len(items), size=rng.integers(0, max_items + 1), replace=False)])
+                     for _ in range(n)], dtype=object)
+
+
+class Pools:
+    """
+    Pre-built values for the wide TMDB columns and the genre lists; rows pick from them.
+    """
+
+    def __init__(self, rng, size=2000):
+        self.imdb_genres = np.array([", ".join(sorted(rng.choice(IMDB_GENRES, size=rng.integers(1, 4), replace=False)))
+                                     for _ in range(size)], dtype=object)
+        self.tmdb_genres = np.array([json.dumps([{"id": g, "name": name} for g, name in
+                                                 (TMDB_GENRES[i] for i in rng.choice(len(TMDB_GENRES), size=rng.integers(1, 5), replace=False))])
+                                     for _ in range(size)], dtype=object)
+        self.directors = np.array([f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES], dtype=object)
+        vocabulary = [w.lower() for w in WORDS] + ["journey", "family", "revenge", "friendship", "escape", "truth"]
+        self.keywords = json_pool(rng, size, [{"id": int(i), "name": w} for i, w in
+                                              zip(rng.integers(1, 300_000, size=len(vocabulary)), vocabulary)])
+        self.companies = json_pool(rng, size, [{"name": f"{w} {kind}", "id": int(rng.integers(1, 100_000))}
+                                               for w in WORDS for kind in ("Pictures", "Films")])
+        self.countries = json_pool(rng, 200, [{"iso_3166_1": code, "name": name} for code, name in [
+            ("US", "United States of America"), ("GB", "United Kingdom"), ("FR", "France"), ("DE", "Germany"),
+            ("JP", "Japan"), ("IN", "India"), ("CA", "Canada")]], max_items=2)
+        self.languages = json_pool(rng, 200, [{"iso_639_1": code, "name": name} for code, name in [
+            ("en", "English"), ("fr", "Français"), ("es", "Español"), ("de", "Deutsch"), ("ja", "日本語"),
+            ("hi", "हिन्दी")]], max_items=2)
+        sentences = [" ".join(rng.choice(vocabulary, size=rng.integers(8, 20))).capitalize() + "." for _ in range(size)]
+        self.overviews = np.array([" ".join(rng.choice(sentences, size=rng.integers(1, 4))) for _ in range(size)],
+                                  dtype=object)
+        self.taglines = np.array([""] + sentences[:size // 2], dtype=object)
+
+    @staticmethod
+    def pick(rng, values, n):
+        return values[rng.integers(0, len(values), size=n)]
+
+
+def imdb_chunk(rng, pools, titles, years, dirty):
+    n = len(titles)
+    roman = np.where(rng.random(n) < 0.01, np.array(["(I) ", "(II) ", "(III) "])[rng.integers(0, 3, size=n)], "")
+    gross = np.char.add(np.char.add("$", np.char.mod("%.2f", np.round(rng.gamma(1.2, 60, size=n), 2))), "M")
+    metascore = rng.integers(30, 101, size=n).astype(str)
+    # A dirty row misses its metascore, its gross, or both (the cleaner keeps neither)
+    which = rng.integers(0, 3, size=n)
+    metascore = np.where(dirty & (which != 1), "0", metascore)
+    gross = np.where(dirty & (which != 0), "0", gross)
+    return pd.DataFrame({
+        "title": titles,
+        "director": pools.pick(rng, pools.directors, n),
+        "release_year": np.char.add(np.char.add(np.char.add(roman, "("), years.astype(str)), ")"),
+        "runtime": np.char.add(rng.integers(70, 210, size=n).astype(str), " min"),
+        "genre": pools.pick(rng, pools.imdb_genres, n),
+        "rating": np.round(rng.uniform(5.0, 9.3, size=n), 1),
+        "metascore": metascore,
+        "gross": gross,
+    })
+
+
+def tmdb_chunk(rng, pools, titles, years, dirty, first_id):
+    n = len(titles)
+    dates = np.char.add(np.char.add(years.astype(str), "-"), np.char.add(
+        np.char.zfill(rng.integers(1, 13, size=n).astype(str), 2),
+        np.char.add("-", np.char.zfill(rng.integers(1, 29, size=n).astype(str), 2))))
+    df = pd.DataFrame({
+        "budget": rng.integers(1, 300, size=n) * 1_000_000 + rng.integers(0, 1000, size=n) * 1000,
+        "genres": pools.pick(rng, pools.tmdb_genres, n),
+        "homepage": np.where(rng.random(n) < 0.35, np.char.add("http://www.", np.char.add(
+            np.char.lower(np.char.replace(titles.astype(str), " ", "")), ".com/")), ""),
+        "id": np.arange(first_id, first_id + n),
+        "keywords": pools.pick(rng, pools.keywords, n),
+        "original_language": np.array(["en", "en", "en", "fr", "es", "ja", "hi"])[rng.integers(0, 7, size=n)],
+        "original_title": titles,
+        "overview": pools.pick(rng, pools.overviews, n),
+        "popularity": np.round(rng.gamma(1.5, 15, size=n) + 0.001, 6),
+        "production_companies": pools.pick(rng, pools.companies, n),
+        "production_countries": pools.pick(rng, pools.countries, n),
+        "release_date": dates,
+        "revenue": rng.integers(1, 2000, size=n) * 1_000_000 + rng.integers(0, 1000, size=n) * 1000,
+        "runtime": rng.integers(70, 210, size=n).astype(float),
+        "spoken_languages": pools.pick(rng, pools.languages, n),
+        "status": "Released",
+        "tagline": pools.pick(rng, pools.taglines, n),
+        "title": titles,
+        "vote_average": np.round(rng.uniform(4.0, 9.0, size=n), 1),
+        "vote_count": rng.integers(11, 15_000, size=n),
+    })
+
+    # A dirty row breaks one of the TMDB cleaner's rules
+    broken = np.flatnonzero(dirty)
+    rule = rng.integers(0, len(TMDB_RULE_COLUMNS), size=len(broken))
+    for i, column in enumerate(TMDB_RULE_COLUMNS):
+        rows = broken[rule == i]
+        df.loc[rows, column] = {"genres": "[]", "release_date": None, "runtime": np.nan, "vote_count": 7}.get(column, 0)
+    return df
+
+
+def append_csv(df, path, header):
+    """
+    Writes df to path (header=True: a new file with a header row, else appended).
+    """
+    if not ARROW_AVAILABLE:
+        df.to_csv(path, mode="w" if header else "a", header=header, index=False)
+        return
+    with open(path, "wb" if header else "ab") as f:
+        pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), f,
+                         pa_csv.WriteOptions(include_header=header, quoting_style="needed"))
+
+
+def _plant(rng, n_imdb, n_tmdb, shares):
+    # IMDb and TMDB positions (within the chunk) of each kind's pairs, and the dirty masks
+    counts = [int(round(share * n_imdb)) for share in shares[:-1]]
+    imdb_pos = rng.permutation(n_imdb)[:sum(counts)]
+    tmdb_pos = rng.permutation(n_tmdb)[:sum(counts)]
+    kinds = np.repeat(np.arange(len(KINDS)), counts)
+    imdb_dirty = (rng.random(n_imdb) < shares[-1])
+    tmdb_dirty = (rng.random(n_tmdb) < shares[-1])
+    imdb_dirty[imdb_pos] = False
+    tmdb_dirty[tmdb_pos] = False
+    return imdb_pos, tmdb_pos, kinds, imdb_dirty, tmdb_dirty
+
+
+def write_dataset(out, n_imdb, n_tmdb=None, exact=0.3, year=0.05, typo_share=0.05, dirty=0.3, seed=0,
+                  chunk_rows=CHUNK_ROWS):
+    """
+    Writes imdb_raw.csv, tmdb_5000_movies.csv and truth.csv into out and returns their paths.
+    """
+    n_tmdb = n_imdb if n_tmdb is None else n_tmdb
+    if exact + year + typo_share > min(1.0, n_tmdb / n_imdb):
+        raise ValueError("the planted pairs need more TMDB rows than --tmdb-rows")
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    paths = out / "imdb_raw.csv", out / "tmdb_5000_movies.csv", out / "truth.csv"
+    rng = np.random.default_rng(seed)
+    pools = Pools(rng)
+
+    n_chunks = max(1, -(-max(n_imdb, n_tmdb) // chunk_rows))
+    imdb_bounds = np.linspace(0, n_imdb, n_chunks + 1).astype(np.int64)
+    tmdb_bounds = np.linspace(0, n_tmdb, n_chunks + 1).astype(np.int64)
+    for k in range(n_chunks):
+        i0, i1, t0, t1 = imdb_bounds[k], imdb_bounds[k + 1], tmdb_bounds[k], tmdb_bounds[k + 1]
+        imdb_pos, tmdb_pos, kinds, imdb_dirty, tmdb_dirty = _plant(rng, i1 - i0, t1 - t0,
+                                                                   [exact, year, typo_share, dirty])
+
+        # IMDb ids are 0..n_imdb-1 and TMDB-only ids follow them, so no two titles share a coined word
+        imdb_titles = make_titles(rng, np.arange(i0, i1)).astype(object)
+        imdb_years = release_years(rng, i1 - i0)
+        tmdb_titles = make_titles(rng, n_imdb + np.arange(t0, t1)).astype(object)
+        tmdb_years = release_years(rng, t1 - t0)
+
+        planted_titles = imdb_titles[imdb_pos].copy()
+        planted_years = imdb_years[imdb_pos].copy()
+        is_exact = kinds == KINDS.index("exact")
+        restyle = np.flatnonzero(is_exact & (rng.random(len(kinds)) < 0.1))
+        planted_titles[restyle[::2]] = [t.lower() for t in planted_titles[restyle[::2]]]
+        planted_titles[restyle[1::2]] = [t.replace(" ", "  ", 1) for t in planted_titles[restyle[1::2]]]
+        is_year = kinds == KINDS.index("year")
+        planted_years[is_year] += rng.choice([-1, 1], size=is_year.sum())
+        planted_titles[kinds == KINDS.index("typo")] = [typo(rng, t) for t in planted_titles[kinds == KINDS.index("typo")]]
+        tmdb_titles[tmdb_pos] = planted_titles
+        tmdb_years[tmdb_pos] = planted_years
+
+        first = k == 0
+        append_csv(imdb_chunk(rng, pools, imdb_titles, imdb_years, imdb_dirty), paths[0], first)
+        append_csv(tmdb_chunk(rng, pools, tmdb_titles, tmdb_years, tmdb_dirty, first_id=int(t0) + 1), paths[1], first)
+        append_csv(pd.DataFrame({
+            "kind": np.array(KINDS)[kinds],
+            "title_imdb": imdb_titles[imdb_pos],
+            "release_year_imdb": imdb_years[imdb_pos],
+            "title_tmdb": planted_titles,
+            "release_year_tmdb": planted_years,
+        }), paths[2], first)
+    return paths
+
+
+def _norm(titles):
+    # norm_title of the integration script: lowercase, single spaces
+    return pd.Series(titles, dtype="str").str.lower().str.split().str.join(" ")
+
+
+def score_links(truth, links):
+    """
+    Accuracy of predicted links (a DataFrame with title_imdb and title_tmdb
+    columns, raw or normalized) against truth.csv. Returns one row per kind
+    with the planted pairs, the ones found and the recall, plus an "all" row
+    whose precision is the share of links that are planted pairs.
+    """
+    planted = pd.DataFrame({"kind": truth["kind"].to_numpy(), "imdb": _norm(truth["title_imdb"]).to_numpy(),
+                            "tmdb": _norm(truth["title_tmdb"]).to_numpy()})
+    predicted = pd.DataFrame({"imdb": _norm(links["title_imdb"]).to_numpy(),
+                              "tmdb": _norm(links["title_tmdb"]).to_numpy()}).drop_duplicates()
+    found = planted.merge(predicted, on=["imdb", "tmdb"], how="inner")
+    report = pd.DataFrame({"planted": planted["kind"].value_counts(), "found": found["kind"].value_counts()})
+    report = report.reindex(KINDS).fillna(0).astype("int64")
+    report.loc["all"] = report.sum()
+    report["recall"] = report["found"] / report["planted"].where(report["planted"] > 0)
+    report["precision"] = np.nan
+    report.loc["all", "precision"] = len(found) / len(predicted) if len(predicted) else np.nan
+    report.index.name = "kind"
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="IMDb rows")
+    parser.add_argument("--tmdb-rows", type=int, default=None, help="TMDB rows (default: --rows)")
+    parser.add_argument("--exact", type=float, default=0.3, help="share of IMDb rows with an exact TMDB copy")
+    parser.add_argument("--year", type=float, default=0.05, help="share with a TMDB copy one year off")
+    parser.add_argument("--typo", type=float, default=0.05, help="share with a typo'd TMDB copy")
+    parser.add_argument("--dirty", type=float, default=0.3, help="share of the other rows that break a cleaning rule")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--out", type=Path, required=True)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    paths = write_dataset(args.out, args.rows, args.tmdb_rows, exact=args.exact, year=args.year, typo_share=args.typo,
+                          dirty=args.dirty, seed=args.seed, chunk_rows=args.chunk_rows)
+    seconds = time.perf_counter() - start
+    for path in paths:
+        print(f"{path}: {path.stat().st_size / 2 ** 20:.1f} MB")
+    print(f"written in {seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
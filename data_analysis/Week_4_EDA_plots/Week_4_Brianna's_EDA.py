@@ -26,12 +26,37 @@
 
 #I will begin by reading in the integrated set to confirm it can be read in properly
 
+import sys
+from pathlib import Path
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# Shared pipeline helpers live in the top-level pipeline/ package
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from pipeline.density import SCATTER_MODE, scatterplot
+from pipeline.cube import load_or_build_cube
+from pipeline.figures import FigureRegistry
+from pipeline.paths import AGGREGATE_CUBE, MERGED_MOVIES, WEEK4_FIGURES_DIR
+from pipeline.schema import MERGED_SCHEMA
+from pipeline.storage import read_table
+
 sns.set(style="whitegrid")
-df = pd.read_csv("integration_output/merged_movies.csv")
+
+# Every figure below is registered by name. Run interactively, each cell draws its figure and shows it;
+# with RENDER_FIGURES=1 (as run_all.py does) the last cell renders all of them to PNG files in
+# Week_4_EDA_plots/figures/, in parallel, without opening any windows.
+# The scatter plots go through pipeline/density.py: one marker per movie for a table this size, and a
+# binned density grid per genre for very large tables (SCATTER_MODE=density or points forces either one).
+FIGURES = FigureRegistry(WEEK4_FIGURES_DIR)
+# read_table loads the typed merged_movies.parquet when it exists (no re-parsing of the CSV), in the
+# compact column types declared in pipeline/schema.py
+df = read_table(MERGED_MOVIES, schema=MERGED_SCHEMA)
+
+# The descriptive statistics and correlations below are read from the aggregate cube the integration
+# step saves (precomputed sums per genre x year x match status, see pipeline/cube.py)
+cube = load_or_build_cube(AGGREGATE_CUBE, df)
 df.head()
 
 
@@ -61,17 +86,18 @@ numeric_vars = [
     "runtime_tmdb",
 ]
 
-plt.figure(figsize=(15, 18))
+@FIGURES.figure("numeric_distributions", columns=numeric_vars, figsize=(15, 18))
+def numeric_distributions(df):
+    for i, col in enumerate(numeric_vars, 1):
+        plt.subplot(4, 2, i)
+        df[col].hist(bins=30)
+        plt.title(f"Distribution of {col}")
+        plt.xlabel(col)
+        plt.ylabel("Count")
 
-for i, col in enumerate(numeric_vars, 1):
-    plt.subplot(4, 2, i)
-    df[col].hist(bins=30)
-    plt.title(f"Distribution of {col}")
-    plt.xlabel(col)
-    plt.ylabel("Count")
+    plt.tight_layout()
 
-plt.tight_layout()
-plt.show()
+FIGURES.show("numeric_distributions", df)
 
 
 # In[ ]:
@@ -106,20 +132,21 @@ plt.show()
 # Distribution of Genre Variables
 # This plot allows us to visualize the frequency of genres in IMDb and TMDB listings.
 
-plt.figure(figsize=(14,6))
+@FIGURES.figure("genre_counts", columns=["genre_imdb", "genre_tmdb"], figsize=(14, 6))
+def genre_counts(df):
+    plt.subplot(1,2,1)
+    df['genre_imdb'].value_counts().head(15).plot(kind='bar')
+    plt.title("Top IMDb Genres")
+    plt.xticks(rotation=45)
 
-plt.subplot(1,2,1)
-df['genre_imdb'].value_counts().head(15).plot(kind='bar')
-plt.title("Top IMDb Genres")
-plt.xticks(rotation=45)
+    plt.subplot(1,2,2)
+    df['genre_tmdb'].value_counts().head(15).plot(kind='bar')
+    plt.title("Top TMDB Genres")
+    plt.xticks(rotation=45)
 
-plt.subplot(1,2,2)
-df['genre_tmdb'].value_counts().head(15).plot(kind='bar')
-plt.title("Top TMDB Genres")
-plt.xticks(rotation=45)
+    plt.tight_layout()
 
-plt.tight_layout()
-plt.show()
+FIGURES.show("genre_counts", df)
 
 
 # In[ ]:
@@ -148,12 +175,14 @@ plt.show()
 # Release Year Distribution
 # Here, I create a simple histogram to show trends in the number of movies released per year.
 
-plt.figure(figsize=(12,5))
-df["release_year"].dropna().astype(int).hist(bins=30)
-plt.title("Distribution of Release Years")
-plt.xlabel("Year")
-plt.ylabel("Count")
-plt.show()
+@FIGURES.figure("release_years", columns=["release_year"], figsize=(12, 5))
+def release_years(df):
+    df["release_year"].dropna().astype(int).hist(bins=30)
+    plt.title("Distribution of Release Years")
+    plt.xlabel("Year")
+    plt.ylabel("Count")
+
+FIGURES.show("release_years", df)
 
 
 # In[ ]:
@@ -182,10 +211,13 @@ plt.show()
 # Descriptive Statistics
 # Computing the mean, median, std, min, max, and missing values for all numeric columns.
 
-desc_stats = df[numeric_vars].describe().T
-missing = df[numeric_vars].isna().sum()
-
-desc_stats["missing_values"] = missing
+# (count, mean, std, min/max and the missing-value counts come from the cube; the quartiles and median
+# can't be added up from its sums, so they are computed from the movies themselves)
+quartiles = df[numeric_vars].quantile([0.25, 0.5, 0.75]).T
+quartiles.columns = ["25%", "50%", "75%"]
+desc_stats = pd.concat([cube.describe(numeric_vars), quartiles], axis=1)[
+    ["count", "mean", "std", "min", "25%", "50%", "75%", "max", "missing_values"]
+]
 desc_stats
 
 
@@ -225,7 +257,7 @@ desc_stats
 
 # Correlation Matrix with Numeric Values
 
-corr = df[numeric_vars].corr()
+corr = cube.corr(measures=numeric_vars)
 corr
 
 
@@ -274,10 +306,12 @@ corr
 # Darker blue squares indicate stronger correlations, while lighter blue indicates weaker ones.
 # It makes patterns easier to spot at a glance, such as the strong link between budget and revenue
 # and the moderate relationship between ratings and popularity. We'll explore these further in Week 5.
-plt.figure(figsize=(10,8))
-sns.heatmap(corr, annot=True, fmt=".2f", cmap="Blues")
-plt.title("Correlation Heatmap of Numeric Variables")
-plt.show()
+@FIGURES.figure("correlation_heatmap", columns=numeric_vars, figsize=(10, 8))
+def correlation_heatmap(df):
+    sns.heatmap(df[numeric_vars].corr(), annot=True, fmt=".2f", cmap="Blues")
+    plt.title("Correlation Heatmap of Numeric Variables")
+
+FIGURES.show("correlation_heatmap", df)
 
 
 # In[13]:
@@ -290,16 +324,19 @@ plt.show()
 # but there are some outliers that deviate from this moderate positively correlation pattern. 
 # I will investigate these interesting cases and genre-specific trends more thoroughly in Week 5
 
-plt.figure(figsize=(8,6))
-sns.scatterplot(
-    data=df,
-    x="budget_in_millions",
-    y="revenue_in_millions",
-    hue="genre_imdb",
-    alpha=0.6
-)
-plt.title("Budget vs Revenue (colored by IMDb genre)")
-plt.show()
+@FIGURES.figure("budget_vs_revenue", columns=["budget_in_millions", "revenue_in_millions", "genre_imdb"], figsize=(8, 6), mode=SCATTER_MODE)
+def budget_vs_revenue(df, mode):
+    scatterplot(
+        data=df,
+        x="budget_in_millions",
+        y="revenue_in_millions",
+        hue="genre_imdb",
+        alpha=0.6,
+        mode=mode
+    )
+    plt.title("Budget vs Revenue (colored by IMDb genre)")
+
+FIGURES.show("budget_vs_revenue", df)
 
 
 # In[14]:
@@ -311,16 +348,19 @@ plt.show()
 # We can see general trends where higher-rated movies may have higher popularity, 
 # but there are outliers and exceptions that stand out.
 # These interesting cases and potential genre influences will be explored more in Week 5. 
-plt.figure(figsize=(8,6))
-sns.scatterplot(
-    data=df,
-    x="rating_imdb",
-    y="popularity",
-    hue="genre_tmdb",
-    alpha=0.6
-)
-plt.title("IMDb Rating vs TMDB Popularity")
-plt.show()
+@FIGURES.figure("rating_vs_popularity", columns=["rating_imdb", "popularity", "genre_tmdb"], figsize=(8, 6), mode=SCATTER_MODE)
+def rating_vs_popularity(df, mode):
+    scatterplot(
+        data=df,
+        x="rating_imdb",
+        y="popularity",
+        hue="genre_tmdb",
+        alpha=0.6,
+        mode=mode
+    )
+    plt.title("IMDb Rating vs TMDB Popularity")
+
+FIGURES.show("rating_vs_popularity", df)
 
 
 # In[15]:
@@ -332,16 +372,26 @@ plt.show()
 # We can spot some patterns, like whether longer movies tend to have higher ratings,
 # as well as outliers that deviate from the general moderate positive trend/correlation.
 # These observations will be examined in more detail in Week 5 analysis.
-plt.figure(figsize=(8,6))
-sns.scatterplot(
-    data=df,
-    x="runtime_imdb",
-    y="rating_imdb",
-    hue="genre_imdb",
-    alpha=0.6
-)
-plt.title("Runtime vs IMDb Rating")
-plt.show()
+@FIGURES.figure("runtime_vs_rating", columns=["runtime_imdb", "rating_imdb", "genre_imdb"], figsize=(8, 6), mode=SCATTER_MODE)
+def runtime_vs_rating(df, mode):
+    scatterplot(
+        data=df,
+        x="runtime_imdb",
+        y="rating_imdb",
+        hue="genre_imdb",
+        alpha=0.6,
+        mode=mode
+    )
+    plt.title("Runtime vs IMDb Rating")
+
+FIGURES.show("runtime_vs_rating", df)
+
+
+# In[ ]:
+
+
+# Batch mode: render every figure registered above (does nothing when run interactively)
+FIGURES.render_all(df)
 
 
 # In[ ]:
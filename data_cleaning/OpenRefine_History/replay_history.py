@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Replay the OpenRefine histories on the raw downloads (pipeline/openrefine.py).
+
+For each dataset I load the raw CSV the way OpenRefine imports it, apply every
+operation of its *_OpenRefine_History.json, and compare the result with the
+*_OpenRefine_Semi_Clean.csv exported from OpenRefine. The script exits
+non-zero if any cell differs. A dataset whose raw file is only a placeholder
+(tmdb_5000_movies.csv in this repository) is reported and skipped.
+
+Usage:
+    python data_cleaning/OpenRefine_History/replay_history.py
+    python data_cleaning/OpenRefine_History/replay_history.py --dataset imdb --out replayed/
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from pipeline.openrefine import load_history, read_raw, replay
+from pipeline.paths import (
+    IMDB_OPENREFINE_HISTORY,
+    IMDB_RAW,
+    IMDB_SEMI_CLEAN,
+    TMDB_OPENREFINE_HISTORY,
+    TMDB_RAW,
+    TMDB_SEMI_CLEAN,
+)
+
+DATASETS = {
+    "imdb": (IMDB_RAW, IMDB_OPENREFINE_HISTORY, IMDB_SEMI_CLEAN),
+    "tmdb": (TMDB_RAW, TMDB_OPENREFINE_HISTORY, TMDB_SEMI_CLEAN),
+}
+
+
+def differences(replayed, expected):
+    """
+    Short description of how the replayed table differs from the expected one ("" if it doesn't).
+    """
+    if list(replayed.columns) != list(expected.columns):
+        return f"columns {list(replayed.columns)} instead of {list(expected.columns)}"
+    if len(replayed) != len(expected):
+        return f"{len(replayed)} rows instead of {len(expected)}"
+    lines = []
+    for column in expected.columns:
+        bad = replayed[column].to_numpy() != expected[column].to_numpy()
+        if bad.any():
+            row = bad.argmax()
+            lines.append(f"{column}: {bad.sum()} cells differ, e.g. row {row}: "
+                         f"{replayed[column].iloc[row]!r} instead of {expected[column].iloc[row]!r}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", nargs="+", choices=sorted(DATASETS), default=sorted(DATASETS))
+    parser.add_argument("--out", type=Path, help="also write <dataset>_replayed.csv to this folder")
+    args = parser.parse_args()
+
+    failed = False
+    for name in args.dataset:
+        raw_path, history_path, semi_clean_path = DATASETS[name]
+        try:
+            raw = read_raw(raw_path)
+        except pd.errors.EmptyDataError:
+            print(f"{name}: skipped, {raw_path.name} has no data (see data_documentation/README.md)")
+            continue
+
+        # Here I replay the whole history and time it
+        start = time.perf_counter()
+        replayed = replay(raw, load_history(history_path))
+        seconds = time.perf_counter() - start
+        if args.out is not None:
+            args.out.mkdir(parents=True, exist_ok=True)
+            replayed.to_csv(args.out / f"{name}_replayed.csv", index=False)
+
+        diff = differences(replayed, read_raw(semi_clean_path))
+        failed |= bool(diff)
+        status = "matches" if not diff else "DIFFERS from"
+        print(f"{name}: {len(replayed)} rows replayed in {seconds:.3f}s, {status} {semi_clean_path.name}")
+        if diff:
+            print(diff)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
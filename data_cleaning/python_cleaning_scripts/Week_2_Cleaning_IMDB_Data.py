@@ -26,16 +26,28 @@ import os
 import hashlib
 from pathlib import Path
 import numpy as np
-import gzip
-import io
+import sys
+
+# Shared pipeline helpers (typed table output) live in the top-level pipeline/ package
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from pipeline.cleaning_rules import CleaningRules, Rule, numeric, stripped
+from pipeline.instrumentation import StageProfiler
+from pipeline.imdb_normalizers import normalize_gross, normalize_release_year, normalize_runtime
+from pipeline.paths import IMDB_CLEANED, IMDB_RAW
+from pipeline.storage import write_table
 
 
 # In[21]:
 
 
 #confirm raw dataset is read in properly
+# (the raw IMDb Top 1000 export is stored as data_documentation/imdb_raw.csv, see pipeline/paths.py)
 
-imdb = pd.read_csv('imdb_top_1000.csv')
+# Each cleaning stage is timed (wall/CPU time, peak memory, rows in and out) into profiles/clean_imdb.jsonl
+profiler = StageProfiler("clean_imdb")
+profiler.start("load")
+imdb = pd.read_csv(IMDB_RAW)
+profiler.stop(rows_out=len(imdb))
 
 
 # In[22]:
@@ -67,89 +79,83 @@ duplicate_titles
 # In[26]:
 
 
-# Strip whitespace from director names to avoid any hidden inconsistencies
-imdb['director'] = imdb['director'].str.strip()
-
-# Check unique director count and sample a few names to confirm theres no odd whitespaces
-print("Unique directors:", imdb['director'].nunique())
-imdb['director'].sample(5)
-
-
-# In[27]:
-
-
-# Remove parentheses and Roman numeral suffixes like (I), (II), (III)
-imdb['release_year'] = imdb['release_year'].str.replace(r'\(|\)', '', regex=True)
-imdb['release_year'] = imdb['release_year'].str.replace(r'(I+)$', '', regex=True)
+# All the cleaning steps below are declared once in IMDB_RULES (pipeline/cleaning_rules.py): every column is
+# converted once, the rules are combined into one mask, and the frame is copied once at the end.
 
-# Strip any trailing whitespaces to confirm its read in correctly 
-imdb['release_year'] = imdb['release_year'].str.strip()
+# Remove parentheses and Roman numeral suffixes like (I), (II), (III) and convert to integer.
+# normalize_release_year does this with one precompiled pattern, so "(1994)" and "(I) (2016)" both become a year,
+# and empty or invalid release years become NaN (the number of rejected values is printed)
+def release_years(raw):
+    years, rejected = normalize_release_year(raw)
+    print("Rejected release_year values:", rejected)
+    return years
 
-# Convert to numeric (integer)
-imdb['release_year'] = pd.to_numeric(imdb['release_year'], errors='coerce').astype('Int64')
 
-# Mark empty or invalid release years as NaN
-imdb['release_year'] = pd.to_numeric(imdb['release_year'], errors='coerce')
-
-# Drop rows where release_year is missing
-imdb = imdb.dropna(subset=['release_year'])
-
-
-# In[28]:
-
-
-# Remove the "min" text, strip spaces, convert to integer
-imdb['runtime_in_minutes'] = imdb['runtime'].str.replace('min', '', regex=False).str.strip()
-imdb['runtime_in_minutes'] = pd.to_numeric(imdb['runtime_in_minutes'], errors='coerce').astype('Int64')
-
-# Drop the old runtime column
-imdb.drop(columns=['runtime'], inplace=True)
-
-
-# In[29]:
-
-
-# Strip whitespace and check unique values to confirm everything is read in correctly 
-imdb['genre'] = imdb['genre'].str.strip()
-imdb['genre'].value_counts().head(10)
-
-
-# In[30]:
-
-
-# Convert rating from string to float for ease of analysis
-imdb['rating'] = pd.to_numeric(imdb['rating'], errors='coerce')
-
-
-# In[31]:
+# Remove the "min" text, strip spaces, convert to integer (one extraction pass, see pipeline/imdb_normalizers.py)
+def runtimes(raw):
+    minutes, rejected = normalize_runtime(raw)
+    print("Rejected runtime values:", rejected)
+    return minutes
 
 
 # Convert to numeric values to ensure it is ready for integration and analysis
-imdb['metascore'] = pd.to_numeric(imdb['metascore'], errors='coerce')
-
 # Replace 0 with NaN (missing data), it makes it easier to drop these values, as they are missing data points that could skew our data
-imdb['metascore'].replace(0, np.nan, inplace=True)
+def metascores(raw):
+    return pd.to_numeric(raw, errors='coerce').replace(0, np.nan)
+
+
+# Remove "$" and "M", strip spaces, and convert the variables to numeric values (one extraction pass), then replace 0s with NaN
+def gross_values(raw):
+    gross, rejected = normalize_gross(raw)
+    print("Rejected gross values:", rejected)
+    return gross.replace(0, np.nan)
+
+
+IMDB_RULES = CleaningRules(
+    convert={
+        # Strip whitespace from director names to avoid any hidden inconsistencies
+        'director': ('director', stripped),
+        'release_year': ('release_year', release_years),
+        'runtime_in_minutes': ('runtime', runtimes),
+        # Strip whitespace to confirm everything is read in correctly
+        'genre': ('genre', stripped),
+        # Convert rating from string to float for ease of analysis
+        'rating': ('rating', numeric),
+        'metascore': ('metascore', metascores),
+        'gross_in_millions': ('gross', gross_values),
+    },
+    # Drop the old runtime and gross columns
+    drop=['runtime', 'gross'],
+    rules=[
+        # Drop rows where release_year is missing
+        Rule('release_year', 'notna'),
+        # Drop rows where critical variables are missing to avoid bias/skews in data
+        Rule('metascore', 'notna'),
+        Rule('gross_in_millions', 'notna'),
+    ],
+)
 
 
-# In[32]:
+# In[27]:
 
 
-# Remove "$" and "M", strip spaces, and convert the variables to numeric values 
-imdb['gross_in_millions'] = imdb['gross'].str.replace('$', '', regex=False).str.replace('M', '', regex=False).str.strip()
-imdb['gross_in_millions'] = pd.to_numeric(imdb['gross_in_millions'], errors='coerce')
+profiler.start("clean", rows_in=len(imdb))
+imdb_clean, report = IMDB_RULES.apply(imdb)
+profiler.stop(rows_out=len(imdb_clean))
 
-# Replace 0s with NaN
-imdb['gross_in_millions'].replace(0, np.nan, inplace=True)
+# Rows each rule dropped (rejected counts add up to the rows removed)
+print(report)
 
-# Drop old column name 
-imdb.drop(columns=['gross'], inplace=True)
 
+# In[29]:
 
-# In[34]:
 
+# Check unique director count and sample a few names to confirm theres no odd whitespaces
+print("Unique directors:", imdb_clean['director'].nunique())
+imdb_clean['director'].sample(5)
 
-# Drop rows where critical variables are missing to avoid bias/skews in data
-imdb_clean = imdb.dropna(subset=['metascore', 'gross_in_millions'])
+# Check unique genre values to confirm everything is read in correctly
+imdb_clean['genre'].value_counts().head(10)
 
 # Confirm cleaning results
 imdb_clean.info()
@@ -160,7 +166,11 @@ imdb_clean.head()
 
 
 #Make finalized clean data file and confirm everything is up to par
-imdb_clean.to_csv('imdb_cleaned.csv', index=False)
+# This writes a typed imdb_cleaned.parquet for the integration step, plus the imdb_cleaned.csv export
+profiler.start("write", rows_in=len(imdb_clean))
+write_table(imdb_clean, IMDB_CLEANED)
+profiler.stop(rows_out=len(imdb_clean))
+profiler.write()
 imdb_clean
 
 
@@ -28,186 +28,178 @@ from pathlib import Path
 import numpy as np
 import gzip
 import io
+import sys
 
-
-# In[93]:
-
-
-#confirm raw dataset is read in properly
-
-tmdb = pd.read_csv('tmdb_5000_movies.csv')
-
-
-# In[94]:
-
-
-tmdb.head()
-
-
-# In[95]:
-
-
-# Check data types, missing values, and overall info
-tmdb.info()
-
-
-# In[96]:
+# Shared pipeline helpers (typed table output) live in the top-level pipeline/ package
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from pipeline.cleaning_rules import CleaningRules, Rule, numeric, to_millions, year_of_date
+from pipeline.genres import decode_genres
+from pipeline.instrumentation import StageProfiler
+from pipeline.paths import TMDB_CLEANED, TMDB_RAW
+from pipeline.storage import TableWriter, write_table
 
 
-# Look for duplicate rows (just to confirm none slipped in)
-tmdb.duplicated().sum()
-
-
-# In[97]:
+# In[93]:
 
 
-# Drop columns that are not relevant to the project goals
+# Columns that are not relevant to the project goals. These include the wide JSON/text columns
+# (overview, keywords, production_companies, spoken_languages, ...), so they are never loaded at all:
+# read_csv only reads the columns we keep (usecols), which saves a lot of memory on the full TMDB export.
 cols_to_drop = [
     'homepage', 'id', 'keywords', 'original_language', 'overview', 
     'production_companies', 'production_countries', 'spoken_languages', 
     'status', 'tagline', 'original_title'
 ]
-tmdb.drop(columns=cols_to_drop, inplace=True)
-
-
-# In[98]:
-
-
-# Confirm column removal
-tmdb.head()
-
-
-# In[99]:
-
-
-# Ensure 'budget' is numeric and convert to millions to match IMDb
-tmdb['budget'] = pd.to_numeric(tmdb['budget'], errors='coerce') / 1000000
-tmdb.rename(columns={'budget': 'budget_in_millions'}, inplace=True)
-
-
-# In[100]:
-
-
-# Drop rows with zero budget (unreleased movies)
-tmdb = tmdb[tmdb['budget_in_millions'] > 0]
-
-
-# In[101]:
+TMDB_USE_COLS = [
+    'budget', 'genres', 'popularity', 'release_date', 'revenue',
+    'runtime', 'title', 'vote_average', 'vote_count'
+]
 
+TMDB_RAW_PATH = TMDB_RAW
 
-# Confirm 'budget'
+# Streaming mode for exports that don't fit in memory: the raw file is read CHUNK_SIZE rows at a time,
+# each chunk goes through the same cleaning steps below, and is appended to tmdb_cleaned.
+# Peak memory then depends on the chunk size, not on the file size.
+STREAMING = False
+CHUNK_SIZE = 100_000
 
-tmdb.head(10)
+# Output dtypes, fixed up front so every streamed chunk is written with the same schema
+TMDB_CLEANED_DTYPES = {
+    'budget_in_millions': 'Float64',
+    'popularity': 'Float64',
+    'revenue_in_millions': 'Float64',
+    'runtime_in_minutes': 'Float64',
+    'title': 'string',
+    'vote_average': 'Float64',
+    'vote_count': 'Int64',
+    'genre': 'string',
+    'release_year': 'Int64',
+}
 
 
 # In[102]:
 
 
 # TMDB genres column is complex JSON-like string that is quite confusing. Here I am extracting just the genre names, alphabetizing them, and separating them by commas to match the IMDB data set
+# The parsing lives in pipeline/genres.py: it uses a real JSON decoder and only parses each distinct
+# genres string once, since the same few hundred combinations repeat across thousands of movies.
 
-def parse_genres(genre_str):
-    if pd.isna(genre_str) or genre_str == '[]':
-        return np.nan
-    try:
-        genre_list = [d['name'] for d in ast.literal_eval(genre_str)]
-        genre_list.sort()
-        return ', '.join(genre_list)
-    except:
-        return np.nan
-
-# I will apply parsing function to get rid of unecessary characters
-tmdb['genre'] = tmdb['genres'].apply(parse_genres)
-
-# Drop the original 'genres' column
-tmdb.drop(columns=['genres'], inplace=True)
-
-# Drop rows where genre is missing to avoid discrepencies in our future analysis
-tmdb = tmdb.dropna(subset=['genre'])
-
-# Confirm the result
-tmdb[['genre']].head()
-
-
-# In[103]:
-
-
-#Convert popularity to be read as a number, not a string
-tmdb['popularity'] = pd.to_numeric(tmdb['popularity'], errors='coerce')
-
-# Drop outliers / missing values
-tmdb = tmdb[tmdb['popularity'] > 0]
-
-
-# In[104]:
 
-
-# Extract year from 'release_date' and convert to integer
-tmdb['release_date'] = pd.to_datetime(tmdb['release_date'], errors='coerce')
-tmdb['release_year'] = tmdb['release_date'].dt.year.astype('Int64')
-
-# Drop rows where release_year is missing
-tmdb = tmdb.dropna(subset=['release_year'])
-
-# Drop the original release_date column
-tmdb.drop(columns=['release_date'], inplace=True)
-
-
-# In[105]:
-
-
-# Convert revenue to millions, drop zeros
-tmdb['revenue'] = pd.to_numeric(tmdb['revenue'], errors='coerce') / 1000000
-tmdb.rename(columns={'revenue': 'revenue_in_millions'}, inplace=True)
-tmdb = tmdb[tmdb['revenue_in_millions'] > 0]
-
-
-# In[106]:
-
-
-# Ensure runtime is numeric, drop zero or missing runtimes
-tmdb['runtime'] = pd.to_numeric(tmdb['runtime'], errors='coerce')
-tmdb.rename(columns={'runtime': 'runtime_in_minutes'}, inplace=True)
-tmdb = tmdb[tmdb['runtime_in_minutes'] > 0]
+# In[ ]:
 
 
-# In[112]:
+# All cleaning steps are declared once in TMDB_RULES (pipeline/cleaning_rules.py), so the same rules run on the whole file or on each streamed chunk.
+# Every column is converted once, the rules are combined into one mask, and the frame is copied once at the end
+# instead of after every filter. The report shows how many rows each rule dropped.
+
+TMDB_RULES = CleaningRules(
+    convert={
+        # Ensure 'budget' is numeric and convert to millions to match IMDb
+        'budget': ('budget', to_millions),
+        # I will apply parsing function to get rid of unecessary characters
+        'genre': ('genres', decode_genres),
+        #Convert popularity to be read as a number, not a string
+        'popularity': ('popularity', numeric),
+        # Extract year from 'release_date' and convert to integer
+        'release_year': ('release_date', year_of_date),
+        # Convert revenue to millions
+        'revenue': ('revenue', to_millions),
+        # Ensure runtime is numeric
+        'runtime': ('runtime', numeric),
+        #Verify Vote Average is read correctly
+        'vote_average': ('vote_average', numeric),
+        # Confirm the count is read as a number, not a string
+        'vote_count': ('vote_count', numeric),
+    },
+    # Drop the original 'genres' and release_date columns
+    drop=['genres', 'release_date'],
+    rename={'budget': 'budget_in_millions', 'revenue': 'revenue_in_millions', 'runtime': 'runtime_in_minutes'},
+    rules=[
+        Rule('budget_in_millions', '>', 0),     # zero budget (unreleased movies)
+        Rule('genre', 'notna'),                 # missing genre would cause discrepencies in our future analysis
+        Rule('popularity', '>', 0),             # outliers / missing values
+        Rule('release_year', 'notna'),
+        Rule('revenue_in_millions', '>', 0),
+        Rule('runtime_in_minutes', '>', 0),     # zero or missing runtimes
+        Rule('vote_average', '>', 0),
+        Rule('vote_count', '>', 10),            # low-sample movies would skew later analysis
+    ],
+)
+
+
+def clean_tmdb(tmdb):
+    # Returns the cleaned frame and the per-rule report
+    return TMDB_RULES.apply(tmdb)
 
 
-# Ensure titles are unique
-tmdb.duplicated(subset='title').sum()
-# Two titles were the same, so I confirmed that they are indeed different, no further action is needed, as they are unique.
-tmdb[tmdb.duplicated(subset='title', keep=False)].sort_values('title')
+# In[ ]:
 
 
-# In[108]:
+# Streaming mode: clean the raw file chunk by chunk and append each cleaned chunk to the output
 
+def stream_clean_tmdb(raw_path=TMDB_RAW_PATH, chunk_size=CHUNK_SIZE):
+    rows_in, report = 0, None
+    with TableWriter(TMDB_CLEANED, dtypes=TMDB_CLEANED_DTYPES) as writer:
+        for chunk in pd.read_csv(raw_path, usecols=TMDB_USE_COLS, chunksize=chunk_size):
+            rows_in += len(chunk)
+            cleaned, chunk_report = clean_tmdb(chunk)
+            writer.append(cleaned)
+            report = chunk_report if report is None else report + chunk_report
+    if report is None:
+        # No chunks at all: report the rules with nothing rejected
+        report = clean_tmdb(pd.DataFrame(columns=TMDB_USE_COLS))[1]
+    print(f"Streamed {writer.rows} cleaned rows to tmdb_cleaned")
+    print(report)
+    return rows_in, writer.rows
 
-#Verify Vote Average is read correctly
 
-tmdb['vote_average'] = pd.to_numeric(tmdb['vote_average'], errors='coerce')
-tmdb = tmdb[tmdb['vote_average'] > 0]
+# In[ ]:
 
 
-# In[109]:
+# Each stage is timed (wall/CPU time, peak memory, rows in and out) into profiles/clean_tmdb.jsonl
+profiler = StageProfiler("clean_tmdb")
 
+if STREAMING:
+    # Reading, cleaning and writing are interleaved per chunk, so streaming is recorded as one stage
+    with profiler.stage("stream_clean") as record:
+        record["rows_in"], record["rows_out"] = stream_clean_tmdb()
+else:
+    #confirm raw dataset is read in properly (only the columns we keep)
+    profiler.start("load")
+    tmdb = pd.read_csv(TMDB_RAW_PATH, usecols=TMDB_USE_COLS)
+    profiler.stop(rows_out=len(tmdb))
 
-# Confirm the count is read as a number, not a string
-tmdb['vote_count'] = pd.to_numeric(tmdb['vote_count'], errors='coerce')
-tmdb = tmdb[tmdb['vote_count'] > 10]  # Drop low-sample movies to avoid skew in later analysis
+    tmdb.head()
 
+    # Check data types, missing values, and overall info
+    tmdb.info()
 
-# In[110]:
+    # Look for duplicate rows (just to confirm none slipped in)
+    tmdb.duplicated().sum()
 
+    profiler.start("clean", rows_in=len(tmdb))
+    tmdb, report = clean_tmdb(tmdb)
+    profiler.stop(rows_out=len(tmdb))
 
-#Confirm everything looks correct
-tmdb.info()
-tmdb.head()
+    # Rows each rule dropped (rejected counts add up to the rows removed)
+    print(report)
 
+    # Ensure titles are unique
+    tmdb.duplicated(subset='title').sum()
+    # Two titles were the same, so I confirmed that they are indeed different, no further action is needed, as they are unique.
+    tmdb[tmdb.duplicated(subset='title', keep=False)].sort_values('title')
 
-# In[113]:
+    #Confirm everything looks correct
+    tmdb.info()
+    tmdb.head()
 
+    # This writes a typed tmdb_cleaned.parquet for the integration step, plus the tmdb_cleaned.csv export.
+    # It uses the same dtypes as streaming mode, so both modes write the same Parquet schema.
+    profiler.start("write", rows_in=len(tmdb))
+    write_table(tmdb, TMDB_CLEANED, dtypes=TMDB_CLEANED_DTYPES)
+    profiler.stop(rows_out=len(tmdb))
 
-tmdb.to_csv('tmdb_cleaned.csv', index=False)
+profiler.write()
 
 
 # In[ ]:
@@ -4,7 +4,8 @@
 # In[20]:
 
 
-get_ipython().system('pip install recordlinkage rapidfuzz')
+# Run this in the notebook if the fuzzy matching packages are missing:
+# !pip install recordlinkage rapidfuzz
 
 
 # In[29]:
@@ -14,8 +15,25 @@ import pandas as pd
 import numpy as np
 import json
 import os
+import sys
 from pathlib import Path
 
+# The shared pipeline helpers live in the top-level pipeline/ package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from pipeline.title_index import load_or_build
+from pipeline.cube import AggregateCube, cube_fingerprint, prepare_cube_input
+from pipeline.exact_join import asof_match, left_join, match_keys, title_keys
+from pipeline.paths import AGGREGATE_CUBE, IMDB_CLEANED, INTEGRATION_OUTPUT_DIR, MERGE_LOG, TMDB_CLEANED
+from pipeline.schema import MERGED_SCHEMA, apply_schema
+from pipeline.checkpoint import BlockCheckpoint
+from pipeline.similarity_cache import SimilarityCache
+from pipeline.threshold_sweep import DEFAULT_THRESHOLDS, sweep
+from pipeline.storage import read_table, write_table
+from pipeline.instrumentation import StageProfiler
+from pipeline.incremental import (assemble, config_digest, dependency_digests, load_previous, reusable_rows,
+                                  row_hashes, row_keys)
+from pipeline.similarity_cache import scorer_name
+
 # First I will try to import recordlinkage, if not, it the funtion should fallback to rapidfuzz
 USE_RECORDLINKAGE = False
 try:
@@ -24,17 +42,60 @@ try:
 except Exception:
     try:
         from rapidfuzz import fuzz, process
+        from pipeline.fuzzy_matching import link_by_year_blocks, link_candidate_pairs
     except Exception:
         raise RuntimeError("Please install either 'recordlinkage' or 'rapidfuzz' to run fuzzy linking.")
 
-IMDB_PATH = "imdb_cleaned.csv"
-TMDB_PATH = "tmdb_cleaned.csv"
+# Cleaned inputs and the output folder come from pipeline/paths.py, so the script works from any folder
+IMDB_PATH = IMDB_CLEANED
+TMDB_PATH = TMDB_CLEANED
 
-OUTPUT_DIR = "integration_output"
+OUTPUT_DIR = INTEGRATION_OUTPUT_DIR
 Path(OUTPUT_DIR).mkdir(exist_ok=True)
 
 MERGED_CSV = Path(OUTPUT_DIR) / "merged_movies.csv"
-LOG_JSON = Path(OUTPUT_DIR) / "merge_log.json"
+LOG_JSON = MERGE_LOG
+
+# Candidate blocking for the fuzzy stage. None keeps the original exact release_year blocks.
+# Setting a number (e.g. 1) instead pulls the FUZZY_TOP_K most similar TMDB titles within
+# +/- that many years from a trigram index, so IMDb/TMDB dates that are a year apart can still match.
+# The index is built once, saved next to the outputs, and only rebuilt when the TMDB titles change.
+FUZZY_YEAR_WINDOW = None
+FUZZY_TOP_K = 10
+
+# As-of tier between the exact and fuzzy stages: an IMDb row left unmatched by the exact merge is linked
+# to the TMDB row with exactly the same normalized title and the nearest release year at most this many
+# years away (IMDb and TMDB often disagree by one year). These rows get _merge_status "asof" and skip
+# fuzzy scoring. None turns the tier off.
+ASOF_YEAR_TOLERANCE = 1
+TITLE_INDEX_PATH = Path(OUTPUT_DIR) / "tmdb_title_index.npz"
+
+# I will accept fuzzy matches with a score of >= 0.90 to ensure optimal accuracy, this can also be altered if needed
+FUZZY_THRESHOLD = 0.90
+
+# Every title pair score at or above the cache floor (0.60) is saved here, keyed by both normalized titles,
+# so changing FUZZY_THRESHOLD (or sweeping it, see sweep_fuzzy_thresholds) does not rescore any pair.
+# Set USE_SIMILARITY_CACHE = False to always score from scratch.
+USE_SIMILARITY_CACHE = True
+SIMILARITY_CACHE_PATH = Path(OUTPUT_DIR) / "similarity_cache.npz"
+
+# Hand-checked title pairs (imdb_title, tmdb_title, is_match) for the precision/recall of a threshold sweep
+FUZZY_LABELS_CSV = Path(OUTPUT_DIR).parent / "fuzzy_labels.csv"
+SWEEP_CSV = Path(OUTPUT_DIR) / "threshold_sweep.csv"
+
+# On big inputs the fuzzy stage runs for a long time, so each release_year block is a unit of work:
+# finished blocks are checkpointed (in the similarity cache, or without it in FUZZY_CHECKPOINT_PATH)
+# and a restarted run resumes after them. The checkpoint file is removed once the stage finishes.
+# FUZZY_PROGRESS shows a progress bar with pairs/s and the ETA when running in a terminal.
+FUZZY_CHECKPOINT_PATH = Path(OUTPUT_DIR) / "fuzzy_checkpoint.jsonl"
+FUZZY_PROGRESS = True
+
+# Incremental runs reuse the previous output for IMDb rows whose cleaned data (and TMDB candidates)
+# did not change. The link table records which IMDb row each merged row came from, and a digest of
+# linking_settings(): after changing any of the settings above, the whole table is re-linked.
+# Set INCREMENTAL = False to force a full re-link.
+INCREMENTAL = True
+LINK_TABLE_CSV = Path(OUTPUT_DIR) / "link_table.csv"
 
 # These will be the Mapping rules (which columns to keep & which hold precedence/priority over other columns)
 # I will keep all imdb columns, and add tmdb-specific columns that imdb does not have to aid in our project endeavors.
@@ -49,8 +110,10 @@ TMDB_KEEP = ["budget_in_millions", "popularity", "revenue_in_millions", "runtime
 # - Title matching uses normalized title + release_year. If release_year missing, block less strictly but prefer exact title.
 
 def load_and_preview(imdb_path=IMDB_PATH, tmdb_path=TMDB_PATH):
-    imdb = pd.read_csv(imdb_path).convert_dtypes()
-    tmdb = pd.read_csv(tmdb_path).convert_dtypes()
+    # The cleaning scripts write a typed Parquet copy next to each CSV, which loads without
+    # re-inferring the dtypes. If only the CSV is there, it is parsed and converted as before.
+    imdb = read_table(imdb_path)
+    tmdb = read_table(tmdb_path)
 
     # Remove any duplicate columns, this ensures a clean schema before merging, as I ran into issues when columns were named the same
     imdb = imdb.loc[:, ~imdb.columns.duplicated()]
@@ -58,6 +121,11 @@ def load_and_preview(imdb_path=IMDB_PATH, tmdb_path=TMDB_PATH):
 
     return imdb, tmdb
 
+def norm_title(s):
+    if pd.isna(s):
+        return ""
+    return " ".join(str(s).strip().lower().split())
+
 def normalize_columns(imdb, tmdb):
     imdb = imdb.rename(columns=lambda c: c.strip())
     tmdb = tmdb.rename(columns=lambda c: c.strip())
@@ -105,12 +173,7 @@ def normalize_columns(imdb, tmdb):
         if col in tmdb.columns:
             tmdb[col] = pd.to_numeric(tmdb[col], errors="coerce")
 
-    # Here I Normalize title strings by using strip, lower, and remove extra whitespace
-    def norm_title(s):
-        if pd.isna(s):
-            return ""
-        return " ".join(str(s).strip().lower().split())
-
+    # Here I Normalize title strings by using strip, lower, and remove extra whitespace (norm_title below)
     imdb["title_norm"] = imdb["title"].apply(norm_title)
     tmdb["title_norm"] = tmdb["title"].apply(norm_title)
 
@@ -120,51 +183,89 @@ def normalize_columns(imdb, tmdb):
 
     return imdb, tmdb
 
-def exact_merge(imdb, tmdb):
+def exact_merge(imdb, tmdb, imdb_keys=None, tmdb_keys=None):
     """
     Exact matching on normalized title + release_year
     Keep all imdb rows (left join), bring tmdb columns.
     Ensures no duplicate columns appear in the merge.
+    The join runs on 64-bit keys of (title_norm, release_year) (pipeline/exact_join.py);
+    pass the keys from match_keys when they are already computed.
     """
-    left = imdb.copy()
-    right = tmdb.copy()
+    if imdb_keys is None:
+        imdb_keys = match_keys(imdb["title_norm"], imdb["release_year"])
+    if tmdb_keys is None:
+        tmdb_keys = match_keys(tmdb["title_norm"], tmdb["release_year"])
 
     # Columns to bring from TMDB (exclude title, title_norm, genre_norm, release_year to avoid duplicates)
     tmdb_cols_to_add = [
-        c for c in right.columns 
+        c for c in tmdb.columns 
         if c not in ["title", "title_norm", "genre_norm", "release_year"]
     ]
 
-    right_for_merge = right[["title_norm", "release_year"] + tmdb_cols_to_add]
+    right_for_merge = tmdb[["title_norm", "release_year"] + tmdb_cols_to_add]
 
-    # Merge left (IMDb) with right (TMDB)
-    merged_exact = pd.merge(
-        left,
+    # Merge left (IMDb) with right (TMDB), same result as pd.merge(how="left", indicator=True)
+    merged_exact = left_join(
+        imdb,
         right_for_merge,
-        how="left",
         on=["title_norm", "release_year"],
+        left_keys=imdb_keys,
+        right_keys=tmdb_keys,
         suffixes=("_imdb", "_tmdb"),
         indicator=True
     )
 
     return merged_exact
 
-def fuzzy_link_remaining(merged_exact, tmdb):
+def asof_link_remaining(merged_exact, tmdb, tolerance=ASOF_YEAR_TOLERANCE, tmdb_title_keys=None):
+    """
+    For rows where _merge == 'left_only', look for a TMDB row with the same
+    title_norm and a release_year within +/- tolerance years (the nearest one).
+    Returns the matches as imdb_index, tmdb_index, year_gap.
+    """
+    columns = ["imdb_index", "tmdb_index", "year_gap"]
+    if tolerance is None:
+        return pd.DataFrame(columns=columns)
+    left_only = merged_exact[merged_exact["_merge"] == "left_only"]
+    pairs = asof_match(left_only, tmdb, tolerance, right_keys=tmdb_title_keys)
+    return pd.DataFrame({
+        "imdb_index": left_only.index[pairs["left_pos"]],
+        "tmdb_index": tmdb.index[pairs["right_pos"]],
+        "year_gap": pairs["year_gap"].to_numpy(),
+    }, columns=columns)
+
+def fuzzy_inputs(merged_exact, tmdb, year_window=FUZZY_YEAR_WINDOW, top_k=FUZZY_TOP_K):
+    """
+    The left_only rows to fuzzy match, the TMDB candidates, and (with year_window
+    set) the candidate pairs from the saved TMDB title index.
+    """
+    left_only = merged_exact[merged_exact["_merge"] == "left_only"].copy()
+    left_only = left_only.reset_index().rename(columns={"index": "imdb_index"})
+    tmdb_candidates = tmdb.copy().reset_index().rename(columns={"index": "tmdb_index"})
+
+    # When a year window is set, the title index gives a bounded candidate set instead
+    candidate_pairs = None
+    if year_window is not None:
+        title_index = load_or_build(TITLE_INDEX_PATH, tmdb_candidates)
+        candidate_pairs = title_index.candidate_pairs(left_only, window=year_window, top_k=top_k)
+    return left_only, tmdb_candidates, candidate_pairs
+
+def fuzzy_link_remaining(merged_exact, tmdb, year_window=FUZZY_YEAR_WINDOW, top_k=FUZZY_TOP_K,
+                         threshold=FUZZY_THRESHOLD, cache=None):
     """
     For rows where _merge == 'left_only', try to fuzzy match with tmdb candidates
     Block by release_year when possible to reduce false positives.
+    With year_window set, candidates come from the saved TMDB title index instead
+    (top_k titles within +/- year_window years).
     Uses recordlinkage when available, otherwise uses rapidfuzz as a fallback.
+    With a SimilarityCache (rapidfuzz only), cached pair scores are reused and new ones are added.
     """
 
-    left_only = merged_exact[merged_exact["_merge"] == "left_only"].copy()
-    left_only = left_only.reset_index().rename(columns={"index": "imdb_index"})
-
     # Now I'll Determine the different tmdb rows that matched in exact merge:
-    
     matched_tmdb_rows = merged_exact[merged_exact["_merge"] == "both"]["title_norm"].astype(str).tolist()
-    tmdb_candidates = tmdb.copy().reset_index().rename(columns={"index": "tmdb_index"})
 
     # I'll block by release_year where available and only compare rows with same release_year
+    left_only, tmdb_candidates, candidate_pairs = fuzzy_inputs(merged_exact, tmdb, year_window, top_k)
     matches = [] 
 
     if USE_RECORDLINKAGE:
@@ -174,7 +275,10 @@ def fuzzy_link_remaining(merged_exact, tmdb):
         # Then I will prepare dataframes with a normalized title
         left_df = left_only.set_index("imdb_index")[["title_norm", "release_year"]]
         right_df = tmdb_candidates.set_index("tmdb_index")[["title_norm", "release_year"]]
-        pairs = indexer.index(left_df, right_df)
+        if candidate_pairs is not None:
+            pairs = pd.MultiIndex.from_frame(candidate_pairs)
+        else:
+            pairs = indexer.index(left_df, right_df)
         compare = rl.Compare()
         compare.string("title_norm", "title_norm", method="levenshtein", threshold=0.80, label="title_sim")
         features = compare.compute(pairs, left_df, right_df)
@@ -184,27 +288,20 @@ def fuzzy_link_remaining(merged_exact, tmdb):
             matches.append((im_i, tm_i, 1.0))
         # If none of the matches are exact at the threshold given, you can optionally relax/lower the threshold, this is not implemented here but its something to keep in mind
     else:
-        # Use rapidfuzz `fuzz.ratio` for pairwise scoring for the rows with the same year
-        from rapidfuzz import fuzz
-        # Now I will build the index by year for tmdb candidates
-        tmdb_by_year = {}
-        for _, r in tmdb_candidates.iterrows():
-            yr = r["release_year"]
-            tmdb_by_year.setdefault(int(yr) if not pd.isna(yr) else None, []).append(r)
-
-        for _, lm in left_only.iterrows():
-            yr = lm["release_year"]
-            candidates = tmdb_by_year.get(int(yr) if not pd.isna(yr) else None, [])
-            best_score = 0
-            best_idx = None
-            for cand in candidates:
-                score = fuzz.token_sort_ratio(lm["title_norm"], cand["title_norm"]) / 100.0
-                if score > best_score:
-                    best_score = score
-                    best_idx = cand["tmdb_index"]
-            # Now I will accept matches with a score of >= 0.90 to ensure optimal accuracy, this can also be altered if needed
-            if best_score >= 0.90 and best_idx is not None:
-                matches.append((lm["imdb_index"], best_idx, best_score))
+        # Use rapidfuzz for the rows with the same year. Each year block is scored as one
+        # matrix (process.cdist across all cores) instead of one title pair at a time,
+        # which is what makes this usable on the full IMDb/TMDB dumps.
+        if candidate_pairs is not None:
+            year_matches = link_candidate_pairs(left_only, tmdb_candidates, candidate_pairs, threshold=threshold, cache=cache)
+        else:
+            checkpoint = BlockCheckpoint(FUZZY_CHECKPOINT_PATH) if cache is None else None
+            year_matches = link_by_year_blocks(left_only, tmdb_candidates, threshold=threshold, cache=cache,
+                                               checkpoint=checkpoint, progress=FUZZY_PROGRESS)
+            if checkpoint is not None:
+                if checkpoint.resumed:
+                    print(f"Fuzzy linking resumed {checkpoint.resumed} year blocks from {FUZZY_CHECKPOINT_PATH}")
+                checkpoint.clear()
+        matches.extend(year_matches.itertuples(index=False, name=None))
 
     # Now I'll Build the DataFrame of matches
     match_rows = []
@@ -215,9 +312,9 @@ def fuzzy_link_remaining(merged_exact, tmdb):
     return matches_df
 
 #Now I will merge IMDb and TMDB 
-def apply_matches_and_fuse(merged_exact, matches_df, imdb, tmdb):
+def apply_matches_and_fuse(merged_exact, matches_df, imdb, tmdb, asof_matches=None):
     """
-    Take the exact merge, apply fuzzy matches, and return the final cleaned DataFrame.
+    Take the exact merge, apply as-of and fuzzy matches, and return the final cleaned DataFrame.
     Ensures IMDb columns are preserved, TMDB columns are added, and conflicts are handled.
     """
 
@@ -228,29 +325,34 @@ def apply_matches_and_fuse(merged_exact, matches_df, imdb, tmdb):
     # Then I'll prepare the TMDB map by indexing for an easier lookup
     tmdb_map = tmdb.reset_index().rename(columns={"index": "tmdb_index"}).set_index("tmdb_index")
 
-    # Apply fuzzy matches
-    for _, r in matches_df.iterrows():
-        imdb_idx = r["imdb_index"]
-        tmdb_idx = r["tmdb_index"]
-
-        # This code will then find rows in the result where index matches imdb_idx
-        mask = result.index == imdb_idx
-        if mask.sum() == 0:
-            continue
-
-        # Fill in TMDB columns only where missing
-        for col in tmdb.columns:
-            if col in ["title", "title_norm", "genre", "genre_norm", "release_year"]:
-                continue
+    # Apply all matches of one tier at once: join the matches to TMDB, then fill the TMDB columns
+    # only where they are still missing. If an IMDb row has several matches, the first
+    # non-missing value wins (same result as filling match by match in order).
+    def fill_matches(matches, status):
+        matched = matches[matches["imdb_index"].isin(result.index)]
+        fill_cols = [
+            c for c in tmdb.columns
+            if c not in ["title", "title_norm", "genre", "genre_norm", "release_year"]
+        ]
+        fills = tmdb_map.loc[matched["tmdb_index"], fill_cols]
+        fills.index = matched["imdb_index"].to_numpy()
+        fills = fills.groupby(level=0, sort=False).first()
+
+        for col in fill_cols:
             target_col = col if col in result.columns else col + "_tmdb"
-            val = tmdb_map.loc[tmdb_idx].get(col)
+            col_fill = fills[col].reindex(result.index)
             if target_col in result.columns:
-                if pd.isna(result.loc[imdb_idx, target_col]):
-                    result.loc[imdb_idx, target_col] = val
+                result[target_col] = result[target_col].fillna(col_fill)
             else:
-                result.loc[imdb_idx, target_col] = val
+                result[target_col] = col_fill
+
+        result.loc[fills.index, "_merge"] = status
 
-        result.loc[imdb_idx, "_merge"] = "fuzzy"
+    # The as-of and fuzzy tiers link different IMDb rows, so the order doesn't matter
+    if asof_matches is not None and len(asof_matches) > 0:
+        fill_matches(asof_matches, "asof")
+    if len(matches_df) > 0:
+        fill_matches(matches_df, "fuzzy")
 
     # This cleans the runtime columns
     def clean_runtime(col):
@@ -328,6 +430,25 @@ def apply_matches_and_fuse(merged_exact, matches_df, imdb, tmdb):
     return final
               
     
+def linking_settings():
+    """
+    Every setting that changes which rows get linked, so an incremental run never
+    reuses links made under other settings.
+    """
+    if USE_RECORDLINKAGE:
+        scorer = f"recordlinkage {rl.__version__} levenshtein 0.80"
+    else:
+        scorer = scorer_name(fuzz.token_sort_ratio)
+    return {
+        "fuzzy_threshold": FUZZY_THRESHOLD,
+        "asof_year_tolerance": ASOF_YEAR_TOLERANCE,
+        "fuzzy_year_window": FUZZY_YEAR_WINDOW,
+        "fuzzy_top_k": FUZZY_TOP_K,
+        "use_recordlinkage": USE_RECORDLINKAGE,
+        "scorer": scorer,
+    }
+
+
 def make_unique_cols(df):
     """
     Ensure all column names in the DataFrame are unique by appending _1, _2, etc. 
@@ -340,11 +461,25 @@ def make_unique_cols(df):
     df.columns = cols
     return df
 
-def main():
-    imdb, tmdb = load_and_preview()
-    imdb = make_unique_cols(imdb)
-    tmdb = make_unique_cols(tmdb)
-    imdb, tmdb = normalize_columns(imdb, tmdb)
+def main(incremental=INCREMENTAL):
+    # Each step below is timed (wall/CPU time, peak memory, rows in and out). The records go into
+    # merge_log.json under "stages" and are appended to profiles/integration.jsonl.
+    # Run with PIPELINE_PROFILE=1 to also save a cProfile dump of the slowest step.
+    profiler = StageProfiler("integration")
+
+    with profiler.stage("load") as record:
+        imdb, tmdb = load_and_preview()
+        record["rows_out"] = len(imdb) + len(tmdb)
+
+    with profiler.stage("normalize_columns", rows_in=len(imdb) + len(tmdb)) as record:
+        imdb = make_unique_cols(imdb)
+        tmdb = make_unique_cols(tmdb)
+        imdb, tmdb = normalize_columns(imdb, tmdb)
+        # 64-bit keys of (title_norm, release_year) for the exact match, computed once per row
+        imdb_match_keys = match_keys(imdb["title_norm"], imdb["release_year"])
+        tmdb_match_keys = match_keys(tmdb["title_norm"], tmdb["release_year"])
+        tmdb_title_keys = title_keys(tmdb["title_norm"])
+        record["rows_out"] = len(imdb) + len(tmdb)
 
     # Here are some Basic schema prints for our discretion and documentation of the project
     print("IMDB columns:", imdb.columns.tolist())
@@ -352,40 +487,176 @@ def main():
 
     imdb = imdb.loc[:, ~imdb.columns.duplicated()]
     tmdb = tmdb.loc[:, ~tmdb.columns.duplicated()]
-    
-    merged_exact = exact_merge(imdb, tmdb)
 
+    # Incremental mode: hash every cleaned row and only re-link the IMDb rows that are new,
+    # changed, or whose TMDB candidates changed since the last run. Everything else is copied
+    # from the previous merged_movies.csv using the link table saved next to merge_log.json.
+    with profiler.stage("incremental_check", rows_in=len(imdb)) as record:
+        imdb_keys = row_keys(row_hashes(imdb))
+        # A row depends on the TMDB rows of every year the as-of or fuzzy stage can look at
+        dependency_window = max(FUZZY_YEAR_WINDOW or 0, ASOF_YEAR_TOLERANCE or 0)
+        deps = dependency_digests(imdb, tmdb, row_hashes(tmdb), year_window=dependency_window)
+        settings_digest = config_digest(linking_settings())
+        previous_merged, previous_links = (None, None)
+        if incremental:
+            previous_merged, previous_links = load_previous(MERGED_CSV, LINK_TABLE_CSV, settings_digest)
+        reuse = reusable_rows(imdb_keys, deps, previous_links)
+        imdb_dirty = imdb[~reuse].assign(_imdb_key=imdb_keys[~reuse])
+        record["rows_out"] = len(imdb_dirty)
+
+    with profiler.stage("exact_merge", rows_in=len(imdb_dirty)) as record:
+        merged_exact = exact_merge(imdb_dirty, tmdb, imdb_match_keys[~reuse.to_numpy()], tmdb_match_keys)
+        record["rows_out"] = len(merged_exact)
+
+    # Next, the as-of tier links left_only rows whose title matches exactly but whose year is off by a little
+    with profiler.stage("asof_link", rows_in=int((merged_exact["_merge"] == "left_only").sum())) as record:
+        asof_df = asof_link_remaining(merged_exact, tmdb, tolerance=ASOF_YEAR_TOLERANCE, tmdb_title_keys=tmdb_title_keys)
+        record["rows_out"] = len(asof_df)
+
+    # Now I will run fuzzy linkage to match the left_only rows that are still unmatched
+    fuzzy_input = merged_exact.drop(index=asof_df["imdb_index"])
+    # Pair scores are looked up in (and added to) the similarity cache, so only new title pairs get scored
+    with profiler.stage("fuzzy_link", rows_in=int((fuzzy_input["_merge"] == "left_only").sum())) as record:
+        similarity_cache = None
+        if USE_SIMILARITY_CACHE and not USE_RECORDLINKAGE:
+            similarity_cache = SimilarityCache.open(SIMILARITY_CACHE_PATH, fuzz.token_sort_ratio)
+        matches_df = fuzzy_link_remaining(fuzzy_input, tmdb, year_window=FUZZY_YEAR_WINDOW, top_k=FUZZY_TOP_K,
+                                          threshold=FUZZY_THRESHOLD, cache=similarity_cache)
+        if similarity_cache is not None:
+            similarity_cache.save()
+        record["rows_out"] = len(matches_df)
+
+    with profiler.stage("fuse", rows_in=len(merged_exact)) as record:
+        merged_new = apply_matches_and_fuse(merged_exact, matches_df, imdb_dirty, tmdb, asof_matches=asof_df)
+        merged_final, link_table = assemble(
+            imdb_keys, deps, reuse, previous_merged, previous_links,
+            merged_new, merged_exact.loc[merged_new.index, "_imdb_key"], settings_digest
+        )
+        record["rows_out"] = len(merged_final)
+
+    # Finally, I will save the results to use for analysis, in the compact column types declared in
+    # pipeline/schema.py (categorical genres/directors, 16-bit years and runtimes, _merge_status as an enum)
+    with profiler.stage("write", rows_in=len(merged_final)) as record:
+        merged_final = apply_schema(merged_final, MERGED_SCHEMA)
+        merged_parquet = write_table(merged_final, MERGED_CSV)
+        link_table.to_csv(LINK_TABLE_CSV, index=False)
+        record["rows_out"] = len(merged_final)
+
+    # I also save an aggregate cube of the merged table (sums per genre x year x match status, see
+    # pipeline/cube.py) so the Week 4/5 summary tables don't rescan every row. When this run only
+    # added rows to the previous output, the previous cube is updated with them instead of rebuilt.
+    with profiler.stage("aggregate_cube", rows_in=len(merged_final)) as record:
+        cube = None
+        if previous_links is not None and previous_links["imdb_key"].isin(imdb_keys[reuse]).all():
+            try:
+                previous_cube = AggregateCube.load(AGGREGATE_CUBE)
+                # Only a cube built from exactly the previous merged_movies can be updated with the new rows
+                if previous_merged is not None and previous_cube.fingerprint == cube_fingerprint(previous_merged):
+                    cube = previous_cube.update(prepare_cube_input(merged_new))
+            except (OSError, ValueError, KeyError):
+                cube = None
+        if cube is None:
+            cube = AggregateCube.build(prepare_cube_input(merged_final))
+        cube.fingerprint = cube_fingerprint(merged_final)
+        cube.save(AGGREGATE_CUBE)
+        record["rows_out"] = len(cube)
+
+    status = merged_final["_merge_status"]
+    reused_status = link_table.loc[link_table["imdb_key"].isin(imdb_keys[reuse]), "_merge_status"]
     counts = {
         "imdb_total_rows": len(imdb),
         "tmdb_total_rows": len(tmdb),
-        "exact_match_count": int((merged_exact["_merge"] == "both").sum()),
-        "left_only_before_fuzzy": int((merged_exact["_merge"] == "left_only").sum())
+        "exact_match_count": int((status == "both").sum()),
+        "left_only_before_asof": int((status != "both").sum()),
+        "asof_match_count": int(len(asof_df)) + int((reused_status == "asof").sum()),
+        "left_only_before_fuzzy": int((~status.isin(["both", "asof"])).sum()),
+        "fuzzy_match_count": int(len(matches_df)) + int((reused_status == "fuzzy").sum()),
     }
 
-    # Now I will run fuzzy linkage to match remaining left_only rows
-    matches_df = fuzzy_link_remaining(merged_exact, tmdb)
-
-    counts["fuzzy_match_count"] = int(len(matches_df))
-
-    merged_final = apply_matches_and_fuse(merged_exact, matches_df, imdb, tmdb)
-
-    # Finally, I will save the results to use for analysis
-    merged_final.to_csv(MERGED_CSV, index=False)
-
     counts["final_merged_rows"] = len(merged_final)
-    counts["exact_matches_saved"] = int((merged_final["_merge_status"] == "both").sum())
-    counts["fuzzy_matches_saved"] = int((merged_final["_merge_status"] == "fuzzy").sum())
-    counts["unmatched_imdb_saved"] = int((merged_final["_merge_status"] == "left_only").sum())
+    counts["exact_matches_saved"] = int((status == "both").sum())
+    counts["asof_matches_saved"] = int((status == "asof").sum())
+    counts["fuzzy_matches_saved"] = int((status == "fuzzy").sum())
+    counts["unmatched_imdb_saved"] = int((status == "left_only").sum())
+    counts["imdb_rows_reused"] = int(reuse.sum())
+    counts["imdb_rows_recomputed"] = int((~reuse).sum())
+    if similarity_cache is not None:
+        counts["similarity_cache_hits"] = similarity_cache.hits
+        counts["similarity_cache_misses"] = similarity_cache.misses
+    counts["stages"] = profiler.summary()
+    profile_log = profiler.write()
 
     with open(LOG_JSON, "w") as f:
         json.dump(counts, f, indent=2)
 
     print("Integration done. Outputs:")
     print(" -", MERGED_CSV)
+    print(" -", merged_parquet)
+    print(" -", AGGREGATE_CUBE)
     print(" -", LOG_JSON)
+    print(" -", profile_log)
     print(json.dumps(counts, indent=2))
 
 
+# Sweep mode: instead of re-linking at every threshold I want to try, I score the fuzzy candidates once
+# (from the similarity cache) and evaluate all thresholds in one pass, with precision and recall
+# against my hand-labelled sample. Run: python Week_3_IMDB_TMDB_Integration.py --sweep
+def sweep_fuzzy_thresholds(thresholds=DEFAULT_THRESHOLDS, labels_path=FUZZY_LABELS_CSV):
+    """
+    Match counts (and precision/recall when labels_path exists) of the fuzzy stage
+    at every threshold, computed from cached pair scores. All IMDb rows are swept
+    (not only the rows an incremental run would re-link). Saves threshold_sweep.csv.
+    The sweep always uses the rapidfuzz scorer, also when recordlinkage is installed.
+    """
+    from rapidfuzz import fuzz
+    from pipeline.fuzzy_matching import CACHE_SAVE_SECONDS, scored_candidate_pairs, scored_year_block_pairs
+
+    imdb, tmdb = load_and_preview()
+    imdb, tmdb = normalize_columns(make_unique_cols(imdb), make_unique_cols(tmdb))
+    imdb = imdb.loc[:, ~imdb.columns.duplicated()]
+    tmdb = tmdb.loc[:, ~tmdb.columns.duplicated()]
+    merged_exact = exact_merge(imdb, tmdb)
+    asof_df = asof_link_remaining(merged_exact, tmdb)
+    left_only, tmdb_candidates, candidate_pairs = fuzzy_inputs(merged_exact.drop(index=asof_df["imdb_index"]), tmdb)
+
+    cache = SimilarityCache.open(SIMILARITY_CACHE_PATH, fuzz.token_sort_ratio)
+    if min(thresholds) < cache.floor:
+        raise ValueError(f"thresholds below the similarity cache floor {cache.floor} cannot be swept")
+    if candidate_pairs is not None:
+        scored = scored_candidate_pairs(left_only, tmdb_candidates, candidate_pairs, cache)
+    else:
+        scored = scored_year_block_pairs(left_only, tmdb_candidates, cache, progress=FUZZY_PROGRESS,
+                                         save_every=CACHE_SAVE_SECONDS)
+    cache.save()
+    print(f"Similarity cache: {cache.hits} rows reused, {cache.misses} rows scored, {len(cache)} pairs stored")
+
+    scored["title_norm_imdb"] = left_only["title_norm"].to_numpy()[scored["_left_pos"].to_numpy()]
+    scored["title_norm_tmdb"] = tmdb_candidates["title_norm"].to_numpy()[scored["_right_pos"].to_numpy()]
+    labels = None
+    if Path(labels_path).exists():
+        raw_labels = pd.read_csv(labels_path)
+        labels = pd.DataFrame({
+            "title_norm_imdb": raw_labels["imdb_title"].apply(norm_title),
+            "title_norm_tmdb": raw_labels["tmdb_title"].apply(norm_title),
+            "is_match": raw_labels["is_match"].astype(bool),
+        })
+    table = sweep(scored, thresholds, labels=labels, imdb_titles=left_only["title_norm"])
+    table.to_csv(SWEEP_CSV, index=False)
+    print(table.to_string(index=False))
+    print(" -", SWEEP_CSV)
+    return table
+
+
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="IMDb/TMDB integration")
+    parser.add_argument("--sweep", action="store_true", help="evaluate fuzzy thresholds from cached scores instead of linking")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=list(DEFAULT_THRESHOLDS))
+    parser.add_argument("--labels", type=Path, default=FUZZY_LABELS_CSV)
+    args = parser.parse_args()
+    if args.sweep:
+        sweep_fuzzy_thresholds(args.thresholds, args.labels)
+    else:
+        main()
 
@@ -33,15 +33,36 @@
 # created in Week 3. All analysis in this notebook is based on the
 # merged_movies.csv file produced by the reproducible integration pipeline.
 
+import sys
+from pathlib import Path
+
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# Shared pipeline helpers live in the top-level pipeline/ package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from pipeline.density import SCATTER_MODE, scatterplot
+from pipeline.cube import load_or_build_cube
+from pipeline.figures import FigureRegistry
+from pipeline.derived import add_derived_columns
+from pipeline.paths import AGGREGATE_CUBE, MERGED_MOVIES, WEEK5_FIGURES_DIR
+from pipeline.schema import MERGED_SCHEMA
+from pipeline.storage import read_table
+
 sns.set(style="whitegrid")
 
+# Every figure below is registered by name. Run interactively, each cell draws its figure and shows it;
+# with RENDER_FIGURES=1 (as run_all.py does) the last plotting cell renders all of them to PNG files in
+# data_visualizations/figures/, in parallel, without opening any windows.
+# The scatter plots go through pipeline/density.py: one marker per movie for a table this size, and a
+# binned density grid per genre for very large tables (SCATTER_MODE=density or points forces either one).
+FIGURES = FigureRegistry(WEEK5_FIGURES_DIR)
+
 # First I will load the integrated dataset created in Week 3
-df = pd.read_csv("integration_output/merged_movies.csv")
+# (read_table prefers the typed merged_movies.parquet and falls back to the CSV; MERGED_SCHEMA gives the
+# compact column types from pipeline/schema.py, e.g. categorical genres and 16-bit years)
+df = read_table(MERGED_MOVIES, schema=MERGED_SCHEMA)
 
 # Here I generate a quick preview to confirm the structure (title, genres, ratings, popularity, budget, etc.)
 df.head()
@@ -54,41 +75,20 @@ df.head()
 # smaller set of higher-level categories. This avoids extremely long legends
 # like "Action, Adventure, Fantasy" and helps us focus on broad/general patterns.
 
-def simplify_genre(genre):
-    genre = str(genre).lower()
-
-    if "drama" in genre:
-        return "Drama"
-    elif "action" in genre:
-        return "Action"
-    elif "comedy" in genre:
-        return "Comedy"
-    elif "romance" in genre:
-        return "Romance"
-    elif "thriller" in genre:
-        return "Thriller"
-    elif "sci" in genre:  
-        return "Sci-Fi"
-    elif "fantasy" in genre:
-        return "Fantasy"
-    elif "animation" in genre:
-        return "Animation"
-    elif "horror" in genre:
-        return "Horror"
-    elif "crime" in genre:
-         return "Crime"
-    else:
-        return "Other"
-
-# Here I apply the changes to the IMDb genre column (you could also use the TMDB column, but I am staying consistent with Week 4)
-df["genre_simple"] = df["genre_imdb"].apply(simplify_genre)
-
-# Now I create log-transformed budget and revenue to handle strong right skew and to ease readibility.
-df["log_budget"] = np.log10(df["budget_in_millions"] + 1e-6)
-df["log_revenue"] = np.log10(df["revenue_in_millions"] + 1e-6)
-
-# Create a simple return-on-investment (ROI) metric when both budget & revenue exist
-df["roi"] = df["revenue_in_millions"] / df["budget_in_millions"]
+# simplify_genre (in pipeline/genres.py, shared with the aggregate cube) checks drama, action, comedy,
+# romance, thriller, sci-fi, fantasy, animation, horror and crime in that order, and falls back to "Other".
+
+# Here I apply the changes to the IMDb genre column (you could also use the TMDB column, but I am staying consistent with Week 4).
+# The genre strings repeat a lot, so each distinct combination is split and labelled only once (see encode_genres)
+
+# I also create log-transformed budget and revenue to handle strong right skew and to ease readibility,
+# and a simple return-on-investment (ROI) metric when both budget & revenue exist.
+# All four columns are added by add_derived_columns (pipeline/derived.py, also timed by benchmarks/bench_suite.py)
+df, genre_encoding = add_derived_columns(df)
+
+# The summary tables below are answered from the aggregate cube the integration step saves next to
+# merged_movies (sums per genre x year x match status, see pipeline/cube.py), instead of rescanning every movie
+cube = load_or_build_cube(AGGREGATE_CUBE, df)
 
 # These are the main columns we will use in several plots below. 
 df[["title", "genre_imdb", "genre_simple", "budget_in_millions", "revenue_in_millions", "log_budget", "log_revenue", "roi"]].head()
@@ -110,47 +110,64 @@ df[["title", "genre_imdb", "genre_simple", "budget_in_millions", "revenue_in_mil
 # In[7]:
 
 
-# Filter rows where we have both IMDb rating and simplified genre
-genre_ratings = df.dropna(subset=["rating_imdb", "genre_simple"])
-genre_pop = df.dropna(subset=["popularity", "genre_simple"])
+@FIGURES.figure("genre_boxplots", columns=["genre_simple", "rating_imdb", "popularity"], figsize=(14, 5))
+def genre_boxplots(df):
+    # Filter rows where we have both IMDb rating and simplified genre
+    genre_ratings = df.dropna(subset=["rating_imdb", "genre_simple"])
+    genre_pop = df.dropna(subset=["popularity", "genre_simple"])
+
+    # IMDb rating by genre
+    plt.subplot(1, 2, 1)
+    sns.boxplot(
+        data=genre_ratings,
+        x="genre_simple",
+        y="rating_imdb",
+        order=sorted(genre_ratings["genre_simple"].unique())
+    )
+    plt.title("IMDb Rating by Genre (Simplified)")
+    plt.xticks(rotation=45)
+    plt.ylabel("IMDb Rating")
+
+    # Popularity by genre
+    plt.subplot(1, 2, 2)
+    sns.boxplot(
+        data=genre_pop,
+        x="genre_simple",
+        y="popularity",
+        order=sorted(genre_pop["genre_simple"].unique())
+    )
+    plt.title("TMDB Popularity by Genre (Simplified)")
+    plt.xticks(rotation=45)
+    plt.ylabel("TMDB Popularity")
+
+    plt.tight_layout()
+
+FIGURES.show("genre_boxplots", df)
+
+# Here I conduct a quick group statistics for interpretation. The means and counts come from the cube;
+# a median can't be added up from the cube's sums, so the medians are computed from the movies themselves
+summary_cols = ["rating_imdb", "popularity"]
+genre_summary = (
+    pd.concat([cube.summary("genre_simple", summary_cols, ["mean", "count"]),
+               df.groupby("genre_simple")[summary_cols].agg(["median"])], axis=1)
+      [pd.MultiIndex.from_product([summary_cols, ["mean", "median", "count"]])]
+      .sort_values(("rating_imdb", "mean"), ascending=False)
+)
 
-plt.figure(figsize=(14, 5))
+genre_summary
 
-# IMDb rating by genre
-plt.subplot(1, 2, 1)
-sns.boxplot(
-    data=genre_ratings,
-    x="genre_simple",
-    y="rating_imdb",
-    order=sorted(genre_ratings["genre_simple"].unique())
-)
-plt.title("IMDb Rating by Genre (Simplified)")
-plt.xticks(rotation=45)
-plt.ylabel("IMDb Rating")
-
-# Popularity by genre
-plt.subplot(1, 2, 2)
-sns.boxplot(
-    data=genre_pop,
-    x="genre_simple",
-    y="popularity",
-    order=sorted(genre_pop["genre_simple"].unique())
-)
-plt.title("TMDB Popularity by Genre (Simplified)")
-plt.xticks(rotation=45)
-plt.ylabel("TMDB Popularity")
 
-plt.tight_layout()
-plt.show()
+# In[ ]:
 
-# Here I conduct a quick group statistics for interpretation
-genre_summary = (
-    df.groupby("genre_simple")[["rating_imdb", "popularity"]]
-      .agg(["mean", "median", "count"])
+
+# genre_simple keeps only the highest-priority genre, so an "Action, Drama" film only counts as Drama above.
+# Here I also look at every genre a film has: each film counts once under each of its IMDb genres.
+genre_multi_summary = (
+    genre_encoding.stats(df[["rating_imdb", "popularity"]])
       .sort_values(("rating_imdb", "mean"), ascending=False)
 )
 
-genre_summary
+genre_multi_summary
 
 
 # In[ ]:
@@ -171,22 +188,31 @@ genre_summary
 
 
 # Here I will gather the subset rows where budget and revenue are both available and positive values.
-fin = df[(df["budget_in_millions"] > 0) & (df["revenue_in_millions"] > 0)].copy()
-
-plt.figure(figsize=(7, 6))
-sns.scatterplot(
-    data=fin,
-    x="log_budget",
-    y="log_revenue",
-    hue="genre_simple",
-    alpha=0.6
-)
-plt.title("Log(Budget) vs Log(Revenue) by Genre")
-plt.xlabel("log10(Budget in millions)")
-plt.ylabel("log10(Revenue in millions)")
-plt.legend(bbox_to_anchor=(1.05, 1), loc="upper left")
-plt.tight_layout()
-plt.show()
+def financial_subset(df):
+    return df[(df["budget_in_millions"] > 0) & (df["revenue_in_millions"] > 0)].copy()
+
+fin = financial_subset(df)
+
+FIN_COLUMNS = ["budget_in_millions", "revenue_in_millions", "log_budget", "log_revenue", "roi"]
+
+@FIGURES.figure("log_budget_vs_log_revenue", columns=FIN_COLUMNS + ["genre_simple"], figsize=(7, 6), mode=SCATTER_MODE)
+def log_budget_vs_log_revenue(df, mode):
+    fin = financial_subset(df)
+    scatterplot(
+        data=fin,
+        x="log_budget",
+        y="log_revenue",
+        hue="genre_simple",
+        alpha=0.6,
+        mode=mode
+    )
+    plt.title("Log(Budget) vs Log(Revenue) by Genre")
+    plt.xlabel("log10(Budget in millions)")
+    plt.ylabel("log10(Revenue in millions)")
+    plt.legend(bbox_to_anchor=(1.05, 1), loc="upper left")
+    plt.tight_layout()
+
+FIGURES.show("log_budget_vs_log_revenue", df)
 
 # Correlation between raw budget and revenue for reference
 fin[["budget_in_millions", "revenue_in_millions"]].corr()
@@ -196,67 +222,76 @@ fin[["budget_in_millions", "revenue_in_millions"]].corr()
 
 
 # Rating vs log-budget
-plt.figure(figsize=(14, 5))
-
-plt.subplot(1, 2, 1)
-sns.scatterplot(
-    data=fin,
-    x="log_budget",
-    y="rating_imdb",
-    hue="genre_simple",
-    alpha=0.6
-)
-plt.title("IMDb Rating vs Log(Budget)")
-plt.xlabel("log10(Budget in millions)")
-plt.ylabel("IMDb Rating")
-plt.legend(bbox_to_anchor=(1.05, 1), loc="upper left")
-
-# Popularity vs log-budget
-plt.subplot(1, 2, 2)
-sns.scatterplot(
-    data=fin,
-    x="log_budget",
-    y="popularity",
-    hue="genre_simple",
-    alpha=0.6
-)
-plt.title("TMDB Popularity vs Log(Budget)")
-plt.xlabel("log10(Budget in millions)")
-plt.ylabel("TMDB Popularity")
-plt.legend().remove()
-
-plt.tight_layout()
-plt.show()
+@FIGURES.figure("rating_popularity_vs_log_budget", columns=FIN_COLUMNS + ["rating_imdb", "popularity", "genre_simple"], figsize=(14, 5), mode=SCATTER_MODE)
+def rating_popularity_vs_log_budget(df, mode):
+    fin = financial_subset(df)
+
+    plt.subplot(1, 2, 1)
+    scatterplot(
+        data=fin,
+        x="log_budget",
+        y="rating_imdb",
+        hue="genre_simple",
+        alpha=0.6,
+        mode=mode
+    )
+    plt.title("IMDb Rating vs Log(Budget)")
+    plt.xlabel("log10(Budget in millions)")
+    plt.ylabel("IMDb Rating")
+    plt.legend(bbox_to_anchor=(1.05, 1), loc="upper left")
+
+    # Popularity vs log-budget
+    plt.subplot(1, 2, 2)
+    scatterplot(
+        data=fin,
+        x="log_budget",
+        y="popularity",
+        hue="genre_simple",
+        alpha=0.6,
+        mode=mode
+    )
+    plt.title("TMDB Popularity vs Log(Budget)")
+    plt.xlabel("log10(Budget in millions)")
+    plt.ylabel("TMDB Popularity")
+    plt.legend().remove()
+
+    plt.tight_layout()
+
+FIGURES.show("rating_popularity_vs_log_budget", df)
 
 # ROI vs rating and popularity (filtering out extreme ROI values to reduce distortion and to ensure findings arent biased to movies with confounding variables like marketing, fan base, etc.)
-roi_subset = fin[fin["roi"].between(0, 20)]
-
-plt.figure(figsize=(14, 5))
-
-plt.subplot(1, 2, 1)
-sns.scatterplot(
-    data=roi_subset,
-    x="roi",
-    y="rating_imdb",
-    alpha=0.6
-)
-plt.title("IMDb Rating vs ROI (Revenue / Budget)")
-plt.xlabel("ROI")
-plt.ylabel("IMDb Rating")
-
-plt.subplot(1, 2, 2)
-sns.scatterplot(
-    data=roi_subset,
-    x="roi",
-    y="popularity",
-    alpha=0.6
-)
-plt.title("TMDB Popularity vs ROI (Revenue / Budget)")
-plt.xlabel("ROI")
-plt.ylabel("TMDB Popularity")
-
-plt.tight_layout()
-plt.show()
+@FIGURES.figure("rating_popularity_vs_roi", columns=FIN_COLUMNS + ["rating_imdb", "popularity"], figsize=(14, 5), mode=SCATTER_MODE)
+def rating_popularity_vs_roi(df, mode):
+    fin = financial_subset(df)
+    roi_subset = fin[fin["roi"].between(0, 20)]
+
+    plt.subplot(1, 2, 1)
+    scatterplot(
+        data=roi_subset,
+        x="roi",
+        y="rating_imdb",
+        alpha=0.6,
+        mode=mode
+    )
+    plt.title("IMDb Rating vs ROI (Revenue / Budget)")
+    plt.xlabel("ROI")
+    plt.ylabel("IMDb Rating")
+
+    plt.subplot(1, 2, 2)
+    scatterplot(
+        data=roi_subset,
+        x="roi",
+        y="popularity",
+        alpha=0.6,
+        mode=mode
+    )
+    plt.title("TMDB Popularity vs ROI (Revenue / Budget)")
+    plt.xlabel("ROI")
+    plt.ylabel("TMDB Popularity")
+
+    plt.tight_layout()
+
+FIGURES.show("rating_popularity_vs_roi", df)
 
 
 # In[ ]:
@@ -275,43 +310,48 @@ plt.show()
 # In[10]:
 
 
-runtime_subset = df.dropna(subset=["runtime_imdb", "rating_imdb"])
-
-plt.figure(figsize=(14, 5))
-
-# Runtime vs IMDb rating
-plt.subplot(1, 2, 1)
-sns.scatterplot(
-    data=runtime_subset,
-    x="runtime_imdb",
-    y="rating_imdb",
-    hue="genre_simple",
-    alpha=0.6
-)
-plt.title("Runtime vs IMDb Rating")
-plt.xlabel("Runtime (minutes)")
-plt.ylabel("IMDb Rating")
-plt.legend(bbox_to_anchor=(1.05, 1), loc="upper left")
+@FIGURES.figure("runtime_vs_rating_popularity", columns=["runtime_imdb", "rating_imdb", "popularity", "genre_simple"], figsize=(14, 5), mode=SCATTER_MODE)
+def runtime_vs_rating_popularity(df, mode):
+    runtime_subset = df.dropna(subset=["runtime_imdb", "rating_imdb"])
+
+    # Runtime vs IMDb rating
+    plt.subplot(1, 2, 1)
+    scatterplot(
+        data=runtime_subset,
+        x="runtime_imdb",
+        y="rating_imdb",
+        hue="genre_simple",
+        alpha=0.6,
+        mode=mode
+    )
+    plt.title("Runtime vs IMDb Rating")
+    plt.xlabel("Runtime (minutes)")
+    plt.ylabel("IMDb Rating")
+    plt.legend(bbox_to_anchor=(1.05, 1), loc="upper left")
+
+    # Runtime vs popularity
+    runtime_pop = df.dropna(subset=["runtime_imdb", "popularity"])
+
+    plt.subplot(1, 2, 2)
+    scatterplot(
+        data=runtime_pop,
+        x="runtime_imdb",
+        y="popularity",
+        hue="genre_simple",
+        alpha=0.6,
+        mode=mode
+    )
+    plt.title("Runtime vs TMDB Popularity")
+    plt.xlabel("Runtime (minutes)")
+    plt.ylabel("TMDB Popularity")
+    plt.legend().remove()
+
+    plt.tight_layout()
+
+FIGURES.show("runtime_vs_rating_popularity", df)
 
-# Runtime vs popularity
 runtime_pop = df.dropna(subset=["runtime_imdb", "popularity"])
 
-plt.subplot(1, 2, 2)
-sns.scatterplot(
-    data=runtime_pop,
-    x="runtime_imdb",
-    y="popularity",
-    hue="genre_simple",
-    alpha=0.6
-)
-plt.title("Runtime vs TMDB Popularity")
-plt.xlabel("Runtime (minutes)")
-plt.ylabel("TMDB Popularity")
-plt.legend().remove()
-
-plt.tight_layout()
-plt.show()
-
 # Simple correlations for reference
 runtime_pop[["runtime_imdb", "rating_imdb", "popularity"]].corr()
 
@@ -320,36 +360,43 @@ runtime_pop[["runtime_imdb", "rating_imdb", "popularity"]].corr()
 
 
 # Here I focus on rows with year + key outcome variables
-time_subset = df.dropna(subset=["release_year", "rating_imdb", "popularity"]).copy()
-time_subset["release_year"] = time_subset["release_year"].astype(int)
-
-# Compute average rating and popularity by year
-year_summary = (
-    time_subset
-    .groupby("release_year")[["rating_imdb", "popularity"]]
-    .mean()
-    .reset_index()
-)
-
-plt.figure(figsize=(12, 5))
-
-sns.lineplot(
-    data=year_summary,
-    x="release_year",
-    y="rating_imdb",
-    label="Average IMDb Rating"
-)
-sns.lineplot(
-    data=year_summary,
-    x="release_year",
-    y="popularity",
-    label="Average TMDB Popularity",
-)
-plt.title("Average IMDb Rating and TMDB Popularity Over Time")
-plt.xlabel("Release Year")
-plt.ylabel("Average Value")
-plt.legend()
-plt.show()
+def yearly_averages(df):
+    time_subset = df.dropna(subset=["release_year", "rating_imdb", "popularity"]).copy()
+    time_subset["release_year"] = time_subset["release_year"].astype(int)
+
+    # Compute average rating and popularity by year
+    return (
+        time_subset
+        .groupby("release_year")[["rating_imdb", "popularity"]]
+        .mean()
+        .reset_index()
+    )
+
+# Same averages for the table, from the cube's per-year sums over movies with both values
+year_summary = cube.pair_means("release_year", "rating_imdb", "popularity").reset_index()
+
+@FIGURES.figure("yearly_rating_popularity", columns=["release_year", "rating_imdb", "popularity"], figsize=(12, 5))
+def yearly_rating_popularity(df):
+    year_summary = yearly_averages(df)
+
+    sns.lineplot(
+        data=year_summary,
+        x="release_year",
+        y="rating_imdb",
+        label="Average IMDb Rating"
+    )
+    sns.lineplot(
+        data=year_summary,
+        x="release_year",
+        y="popularity",
+        label="Average TMDB Popularity",
+    )
+    plt.title("Average IMDb Rating and TMDB Popularity Over Time")
+    plt.xlabel("Release Year")
+    plt.ylabel("Average Value")
+    plt.legend()
+
+FIGURES.show("yearly_rating_popularity", df)
 
 year_summary.tail()
 
@@ -373,38 +420,41 @@ year_summary.tail()
 # In[12]:
 
 
-ratings_pop = df.dropna(subset=["rating_imdb", "popularity"]).copy()
+@FIGURES.figure("rating_vs_popularity_fit", columns=["rating_imdb", "popularity"], figsize=(7, 6))
+def rating_vs_popularity_fit(df):
+    ratings_pop = df.dropna(subset=["rating_imdb", "popularity"])
+    sns.regplot(
+        data=ratings_pop,
+        x="rating_imdb",
+        y="popularity",
+        scatter_kws={"alpha": 0.4},
+        line_kws={"linewidth": 2}
+    )
+    plt.title("IMDb Rating vs TMDB Popularity")
+    plt.xlabel("IMDb Rating")
+    plt.ylabel("TMDB Popularity")
 
-plt.figure(figsize=(7, 6))
-sns.regplot(
-    data=ratings_pop,
-    x="rating_imdb",
-    y="popularity",
-    scatter_kws={"alpha": 0.4},
-    line_kws={"linewidth": 2}
-)
-plt.title("IMDb Rating vs TMDB Popularity")
-plt.xlabel("IMDb Rating")
-plt.ylabel("TMDB Popularity")
-plt.show()
+FIGURES.show("rating_vs_popularity_fit", df)
 
 # Overall correlation
-corr_rating_pop = ratings_pop[["rating_imdb", "popularity"]].corr().iloc[0, 1]
+corr_rating_pop = cube.corr(measures=["rating_imdb", "popularity"]).iloc[0, 1]
 print(f"Correlation between IMDb rating and TMDB popularity: {corr_rating_pop:.3f}")
 
 # Correlation by simplified genre (for further implications or areas of interest)
-genre_corr = (
-    ratings_pop
-    .groupby("genre_simple")[["rating_imdb", "popularity"]]
-    .corr()
-    .unstack()
-)
+genre_corr = cube.pair_corr("genre_simple", "rating_imdb", "popularity")
 genre_corr
 
 
 # In[ ]:
 
 
+# Batch mode: render every figure registered above (does nothing when run interactively)
+FIGURES.render_all(df)
+
+
+# In[ ]:
+
+
 # Reproducible, Ethical, End-to-End Pipeline
 
 # This section supports Research Question 3:
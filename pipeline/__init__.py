@@ -0,0 +1,7 @@
+"""
+Shared helpers for the IMDb/TMDB pipeline.
+
+The week-by-week scripts in data_cleaning/, data_integration/, data_analysis/
+and data_visualizations/ import from here so the heavier logic lives in one
+place instead of being copied between notebooks.
+"""
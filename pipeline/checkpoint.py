@@ -0,0 +1,98 @@
+"""
+Checkpoints for stages that work through independent blocks (the fuzzy
+linker's release_year blocks).
+
+A BlockCheckpoint is an append-only JSON-lines file with one line per
+finished block: the block's key, a digest of everything its result depends
+on (titles, ids, threshold, scorer), and the result arrays. A run that is
+interrupted keeps every block written so far; the next run loads the file and
+skips blocks whose key is already there, so it resumes where the last one
+stopped. A block whose inputs changed gets a new key and is recomputed, and a
+last line cut off by a crash is ignored. The stage clears the file once it
+has finished.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def block_key(*parts):
+    """
+    Hex digest of the parts: strings, numbers, or arrays / Series (hashed by value).
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, (np.ndarray, pd.Series, pd.Index, list)):
+            values = pd.util.hash_array(np.asarray(part, dtype=object), categorize=False)
+            digest.update(values.tobytes())
+        else:
+            digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+class BlockCheckpoint:
+    """
+    Results of finished blocks, by block key. resumed counts the blocks taken
+    from the file in this run.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._torn = False
+        self.blocks = self._load()
+        self.resumed = 0
+
+    def _load(self):
+        blocks = {}
+        if not self.path.exists():
+            return blocks
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                self._torn = not line.endswith("\n")
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                blocks[entry["key"]] = {
+                    name: np.asarray(values, dtype=dtype) for name, (dtype, values) in entry["arrays"].items()
+                }
+        return blocks
+
+    def __contains__(self, key):
+        return key in self.blocks
+
+    def get(self, key):
+        """
+        The saved arrays of a finished block (a dict), or None.
+        """
+        arrays = self.blocks.get(key)
+        if arrays is not None:
+            self.resumed += 1
+        return arrays
+
+    def record(self, key, **arrays):
+        """
+        Save a finished block's result arrays, flushed to disk before returning.
+        """
+        arrays = {name: np.asarray(values) for name, values in arrays.items()}
+        self.blocks[key] = arrays
+        entry = {"key": key, "arrays": {name: [a.dtype.str, a.tolist()] for name, a in arrays.items()}}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            # Start a new line after a line cut off by a crash, so this entry stays readable
+            f.write(("\n" if self._torn else "") + json.dumps(entry) + "\n")
+            self._torn = False
+            f.flush()
+
+    def clear(self):
+        """
+        Delete the file (the stage finished, nothing left to resume).
+        """
+        self.blocks = {}
+        if self.path.exists():
+            self.path.unlink()
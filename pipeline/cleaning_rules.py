@@ -0,0 +1,132 @@
+"""
+Declarative cleaning rules for the Week 2 cleaners, applied in one pass.
+
+The cleaners used to convert a column, filter the frame on it, convert the
+next column, filter again, and so on. Every filter step
+(df = df[df[col] > 0].copy()) made a full copy of the frame, and nothing
+recorded how many rows each step dropped.
+
+A CleaningRules object lists:
+- the conversions (a function from a source column to the converted column,
+  e.g. dollars to millions)
+- the columns to drop and to rename
+- the Rules a row has to pass (budget_in_millions > 0, genre not null, ...)
+
+apply() runs each conversion once on the whole column and ANDs the rules into
+one boolean mask. It builds the output from the masked columns, which is the
+only copy of the data. It also returns a report with two counts per rule:
+- failed: the rows that fail the rule
+- rejected: the rows that fail it and no earlier rule, so the rejected counts
+  add up to the rows dropped, like the attrition of the old chain of filters
+"""
+
+import operator
+
+import numpy as np
+import pandas as pd
+
+_OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+        "==": operator.eq, "!=": operator.ne}
+
+
+class Rule:
+    """
+    A condition every kept row meets: column op value, with op one of >, >=,
+    <, <=, ==, != or "notna". A missing value never passes.
+    """
+
+    def __init__(self, column, op, value=None, name=None):
+        if op != "notna" and op not in _OPS:
+            raise ValueError(f"unknown rule operator {op!r}")
+        self.column, self.op, self.value = column, op, value
+        self.name = name or (f"{column} not null" if op == "notna" else f"{column} {op} {value}")
+
+    def __repr__(self):
+        return f"Rule({self.name!r})"
+
+    def mask(self, values):
+        """
+        Boolean array, True for the values that pass.
+        """
+        passed = values.notna()
+        if self.op != "notna":
+            passed &= _OPS[self.op](values, self.value).fillna(False).astype(bool)
+        return passed.to_numpy(dtype=bool)
+
+
+class CleaningRules:
+    """
+    convert maps each output column to (source column, function). The
+    conversions run in order, each on the current source column. A column
+    converted from itself keeps its position, and a new column is added at
+    the end. drop lists columns left out of the output, rename maps old ->
+    new names (applied last), and rules are checked on the final names.
+    """
+
+    def __init__(self, convert=None, drop=(), rename=None, rules=()):
+        self.convert = dict(convert or {})
+        self.drop = list(drop)
+        self.rename = dict(rename or {})
+        self.rules = list(rules)
+
+    def columns(self, df):
+        """
+        The converted, renamed columns of df (all rows, no filtering), as a dict of Series.
+        """
+        columns = {c: df[c] for c in df.columns}
+        for target, (source, function) in self.convert.items():
+            columns[target] = function(columns[source]).rename(target)
+        for column in self.drop:
+            del columns[column]
+        return {self.rename.get(c, c): s.rename(self.rename.get(c, c)) for c, s in columns.items()}
+
+    def apply(self, df):
+        """
+        (cleaned DataFrame, report). The report has one row per rule (index:
+        rule name) with the failed and rejected counts described above.
+        """
+        columns = self.columns(df)
+        keep = np.ones(len(df), dtype=bool)
+        failed, rejected = [], []
+        for rule in self.rules:
+            passed = rule.mask(columns[rule.column])
+            failed.append(int((~passed).sum()))
+            rejected.append(int((keep & ~passed).sum()))
+            keep &= passed
+        report = pd.DataFrame({"failed": failed, "rejected": rejected},
+                              index=pd.Index([r.name for r in self.rules], name="rule"), dtype="int64")
+
+        # The one copy: every column masked once, assembled without copying again
+        cleaned = pd.DataFrame({c: s[keep] for c, s in columns.items()}, copy=False)
+        return cleaned, report
+
+
+def numeric(values):
+    """
+    pd.to_numeric with errors='coerce' (unparseable values become NaN).
+    """
+    return pd.to_numeric(values, errors="coerce")
+
+
+def to_millions(values):
+    """
+    Numeric dollars as millions of dollars.
+    """
+    return numeric(values) / 1_000_000
+
+
+def year_of_date(values):
+    """
+    The year (Int64) of date strings; unparseable dates are missing. Each
+    distinct date is parsed once (the first one still sets the inferred format).
+    """
+    codes, uniques = pd.factorize(values)
+    years = pd.Series(pd.to_datetime(uniques, errors="coerce").year).astype("Int64")
+    return pd.Series(years.array.take(codes, allow_fill=True), index=values.index, name=values.name)
+
+
+def stripped(values):
+    """
+    Text with surrounding whitespace removed.
+    """
+    return values.str.strip()
@@ -0,0 +1,404 @@
+"""
+Aggregate cube of sufficient statistics over the merged movies table.
+
+The Week 4 and Week 5 tables (describe(), corr(), genre_summary, year_summary,
+per-genre correlations) are all sums over groups of rows. The cube stores
+those sums once per cell of genre_simple x release_year x _merge_status, so
+every table is answered by adding up cells (O(cells), a few thousand at most)
+instead of rescanning the rows.
+
+For each cell and every pair of measures (i, j) it keeps, over the rows where
+both are present:
+
+    n[i, j]    row count
+    s[i, j]    sum of measure i
+    ss[i, j]   sum of squares of measure i
+    sp[i, j]   sum of products of i and j
+
+The diagonal (i, i) gives the per-measure count, sum and sum of squares; the
+off-diagonal entries give pairwise-complete means and correlations exactly as
+pandas computes them. Per-measure min and max are kept as well. Non-finite
+values (e.g. ROI with a zero budget) count as missing.
+
+Medians and quartiles can't be rebuilt from sums, so the cube has none; the
+Week 4 and Week 5 scripts compute those from the rows.
+
+Sums, counts and min/max all merge by addition or min/max, so new rows
+update the cube with update() without touching the old rows.
+
+A saved cube carries a fingerprint of the merged-table columns it was built
+from, so a merged_movies that was regenerated or checked out with other
+links or values is never answered from a stale cube.
+"""
+
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from pipeline.genres import simplify_genre_series
+
+CUBE_DIMS = ["genre_simple", "release_year", "_merge_status"]
+
+CUBE_MEASURES = [
+    "budget_in_millions",
+    "revenue_in_millions",
+    "popularity",
+    "rating_imdb",
+    "vote_average_tmdb",
+    "runtime_imdb",
+    "runtime_tmdb",
+    "roi",
+]
+
+
+# The merged-table columns a cube is built from (genre_simple and roi are derived from them)
+CUBE_SOURCE_COLUMNS = ["genre_imdb", "release_year", "_merge_status"] + [m for m in CUBE_MEASURES if m != "roi"]
+
+
+def cube_fingerprint(merged):
+    """
+    Digest of the CUBE_SOURCE_COLUMNS of merged. Numbers are hashed as floats
+    and text as str, so the value is the same whether merged was read with
+    MERGED_SCHEMA (Week 5) or without (Week 4).
+    """
+    digest = hashlib.sha1()
+    for col in CUBE_SOURCE_COLUMNS:
+        values = merged[col]
+        if pd.api.types.is_numeric_dtype(values) or col == "release_year":
+            canonical = pd.Series(pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan))
+        else:
+            canonical = pd.Series(values.astype(object).where(values.notna(), None).to_numpy(dtype=object))
+        digest.update(col.encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(canonical, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def prepare_cube_input(merged):
+    """
+    Add the derived columns the cube is keyed on or aggregates (genre_simple
+    from genre_imdb, roi = revenue / budget), as the Week 5 script defines them.
+    """
+    out = merged.copy()
+    out["genre_simple"] = simplify_genre_series(out["genre_imdb"])
+    out["roi"] = out["revenue_in_millions"] / out["budget_in_millions"]
+    return out
+
+
+def _group_reduce(ufunc, codes, n_groups, values, fill=0):
+    # Sort once and reduce each run of equal codes (much faster than ufunc.at)
+    out = np.full((n_groups,) + values.shape[1:], fill, dtype=values.dtype)
+    if len(codes) == 0:
+        return out
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    out[sorted_codes[starts]] = ufunc.reduceat(values[order], starts, axis=0)
+    return out
+
+
+def _group_sum(codes, n_groups, values):
+    return _group_reduce(np.add, codes, n_groups, values)
+
+
+def _population_var(n, mean, ss):
+    # E[x^2] - E[x]^2 leaves rounding noise instead of 0 for constant groups; treat that as 0
+    var = ss / n - mean ** 2
+    return np.where(var > 1e-12 * mean ** 2, var, 0.0)
+
+
+class AggregateCube:
+    """
+    Sufficient statistics per (genre_simple, release_year, _merge_status) cell.
+    Build with AggregateCube.build(prepare_cube_input(merged)).
+
+    fingerprint is the cube_fingerprint of the rows it covers; build() sets it,
+    while merge(), update() and rollups leave it None (the caller sets it when
+    it knows the full table).
+    """
+
+    def __init__(self, keys, rows, n, s, ss, sp, mn, mx, measures=CUBE_MEASURES, fingerprint=None):
+        self.keys = keys.reset_index(drop=True)
+        self.rows = rows
+        self.n, self.s, self.ss, self.sp = n, s, ss, sp
+        self.mn, self.mx = mn, mx
+        self.measures = list(measures)
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, df, dims=CUBE_DIMS, measures=CUBE_MEASURES):
+        """
+        One pass over df: group rows by the dims and sum the per-pair statistics.
+        """
+        grouped = df[dims].groupby(dims, dropna=False, sort=True)
+        codes = grouped.ngroup().to_numpy()
+        keys = grouped.size().index.to_frame(index=False)
+        n_cells = len(keys)
+
+        x = np.column_stack([df[m].to_numpy(dtype=float, na_value=np.nan) for m in measures]) if len(df) else np.zeros((0, len(measures)))
+        present = np.isfinite(x)
+        x = np.where(present, x, 0.0)
+        p = present.astype(float)
+
+        k = len(measures)
+        n = np.zeros((n_cells, k, k))
+        s = np.zeros((n_cells, k, k))
+        ss = np.zeros((n_cells, k, k))
+        sp = np.zeros((n_cells, k, k))
+        # Sort the rows by cell once; then every statistic of a cell is a block of
+        # one Gram matrix [X, P, X^2]^T [X, P, X^2] over its contiguous rows
+        order = np.argsort(codes, kind="stable")
+        bounds = np.r_[0, np.cumsum(np.bincount(codes, minlength=n_cells))]
+        stacked = np.hstack([x, p, x ** 2])[order]
+        for cell in range(n_cells):
+            block = stacked[bounds[cell]:bounds[cell + 1]]
+            gram = block.T @ block
+            sp[cell] = gram[:k, :k]
+            s[cell] = gram[:k, k:2 * k]
+            n[cell] = gram[k:2 * k, k:2 * k]
+            ss[cell] = gram[2 * k:, k:2 * k]
+
+        mn = np.full((n_cells, k), np.inf)
+        mx = np.full((n_cells, k), -np.inf)
+        for i in range(k):
+            rows_i = present[:, i]
+            np.minimum.at(mn[:, i], codes[rows_i], x[rows_i, i])
+            np.maximum.at(mx[:, i], codes[rows_i], x[rows_i, i])
+
+        rows = np.bincount(codes, minlength=n_cells).astype(np.int64)
+        fingerprint = cube_fingerprint(df) if set(CUBE_SOURCE_COLUMNS) <= set(df.columns) else None
+        return cls(keys, rows, n.astype(np.int64), s, ss, sp, mn, mx, measures, fingerprint)
+
+    def _check_compatible(self, other):
+        if other.measures != self.measures:
+            raise ValueError("cubes were built with different measures")
+
+    def merge(self, other):
+        """
+        Cube over the rows of both cubes (cells with the same key are added up).
+        """
+        self._check_compatible(other)
+        dims = list(self.keys.columns)
+        keys = pd.concat([self.keys, other.keys], ignore_index=True)
+        grouped = keys.groupby(dims, dropna=False, sort=True)
+        codes = grouped.ngroup().to_numpy()
+        merged_keys = grouped.size().index.to_frame(index=False)
+        return self._regroup(codes, merged_keys, [self, other])
+
+    def update(self, new_rows):
+        """
+        Cube including new_rows (prepared like the original input), without rescanning old rows.
+        """
+        return self.merge(AggregateCube.build(new_rows, list(self.keys.columns), self.measures))
+
+    def _regroup(self, codes, keys, cubes):
+        g = len(keys)
+        cat = lambda attr: np.concatenate([getattr(c, attr) for c in cubes])
+        mn = _group_reduce(np.minimum, codes, g, cat("mn"), fill=np.inf)
+        mx = _group_reduce(np.maximum, codes, g, cat("mx"), fill=-np.inf)
+        return AggregateCube(
+            keys, _group_sum(codes, g, cat("rows")),
+            _group_sum(codes, g, cat("n")), _group_sum(codes, g, cat("s")),
+            _group_sum(codes, g, cat("ss")), _group_sum(codes, g, cat("sp")),
+            mn, mx, self.measures,
+        )
+
+    def rollup(self, by=(), dropna=True):
+        """
+        Cube with one cell per value of the by dims (one cell in total for
+        by=()). With dropna, cells whose by key is missing are left out, as in
+        DataFrame.groupby.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        cube = self
+        if dropna and by:
+            keep = self.keys[by].notna().all(axis=1).to_numpy()
+            cube = self._subset(keep)
+        if by:
+            grouped = cube.keys.groupby(by, dropna=False, sort=True)
+            codes = grouped.ngroup().to_numpy()
+            keys = grouped.size().index.to_frame(index=False)
+        else:
+            codes = np.zeros(len(cube), dtype=np.int64)
+            keys = pd.DataFrame(index=[0])
+        return cube._regroup(codes, keys, [cube])
+
+    def _subset(self, mask):
+        return AggregateCube(
+            self.keys[mask], self.rows[mask], self.n[mask], self.s[mask], self.ss[mask], self.sp[mask],
+            self.mn[mask], self.mx[mask], self.measures,
+        )
+
+    def _index(self):
+        if self.keys.shape[1] == 0:
+            return None
+        if self.keys.shape[1] == 1:
+            return pd.Index(self.keys.iloc[:, 0], name=self.keys.columns[0])
+        return pd.MultiIndex.from_frame(self.keys)
+
+    # Per-measure statistics for every cell of this cube
+
+    def count(self, m):
+        i = self.measures.index(m)
+        return self.n[:, i, i]
+
+    def mean(self, m):
+        i = self.measures.index(m)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.s[:, i, i] / self.n[:, i, i]
+
+    def std(self, m):
+        i = self.measures.index(m)
+        n, s, ss = self.n[:, i, i], self.s[:, i, i], self.ss[:, i, i]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = (ss - s * s / n) / (n - 1)
+        return np.sqrt(np.maximum(var, 0.0))
+
+    def min(self, m):
+        values = self.mn[:, self.measures.index(m)]
+        return np.where(np.isfinite(values), values, np.nan)
+
+    def max(self, m):
+        values = self.mx[:, self.measures.index(m)]
+        return np.where(np.isfinite(values), values, np.nan)
+
+    # Tables answered from the cube
+
+    def summary(self, by, measures, stats=("mean", "count")):
+        """
+        Like df.groupby(by)[measures].agg(list(stats)), for any of count, mean,
+        std, min and max.
+        """
+        cube = self.rollup(by)
+        columns = {}
+        for m in measures:
+            for stat in stats:
+                values = getattr(cube, stat)(m)
+                columns[(m, stat)] = values.astype(np.int64) if stat == "count" else values
+        return pd.DataFrame(columns, index=cube._index())
+
+    def describe(self, measures=None):
+        """
+        Like df[measures].describe().T over all rows without the quartiles,
+        with a missing_values column.
+        """
+        measures = list(measures or self.measures)
+        cube = self.rollup(())
+        rows = {}
+        for m in measures:
+            stats = {"count": cube.count(m)[0], "mean": cube.mean(m)[0], "std": cube.std(m)[0],
+                     "min": cube.min(m)[0], "max": cube.max(m)[0]}
+            stats["missing_values"] = int(cube.rows[0] - cube.count(m)[0])
+            rows[m] = stats
+        return pd.DataFrame.from_dict(rows, orient="index")
+
+    def pair_means(self, by, a, b):
+        """
+        Means of a and b per group over the rows where both are present, like
+        df.dropna(subset=[a, b]).groupby(by)[[a, b]].mean().
+        """
+        cube = self.rollup(by)
+        i, j = self.measures.index(a), self.measures.index(b)
+        n = cube.n[:, i, j]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = pd.DataFrame({a: cube.s[:, i, j] / n, b: cube.s[:, j, i] / n}, index=cube._index())
+        return out[n > 0]
+
+    def pair_corr(self, by, a, b):
+        """
+        Correlation of a and b per group over the rows where both are present,
+        like df.dropna(subset=[a, b]).groupby(by)[[a, b]].corr().unstack().
+        """
+        cube = self.rollup(by)
+        i, j = self.measures.index(a), self.measures.index(b)
+        n = cube.n[:, i, j]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_a, mean_b = cube.s[:, i, j] / n, cube.s[:, j, i] / n
+            var_a = _population_var(n, mean_a, cube.ss[:, i, j])
+            var_b = _population_var(n, mean_b, cube.ss[:, j, i])
+            r = np.clip((cube.sp[:, i, j] / n - mean_a * mean_b) / np.sqrt(var_a * var_b), -1.0, 1.0)
+        # A constant or single-row group has no correlation, not even with itself
+        diag_a = np.where((n > 1) & (var_a > 0), 1.0, np.nan)
+        diag_b = np.where((n > 1) & (var_b > 0), 1.0, np.nan)
+        r = np.where((n > 1) & (var_a > 0) & (var_b > 0), r, np.nan)
+        columns = pd.MultiIndex.from_product([[a, b], [a, b]])
+        out = pd.DataFrame(np.column_stack([diag_a, r, r, diag_b]), index=cube._index(), columns=columns)
+        return out[n > 0]
+
+    def corr(self, by=None, measures=None):
+        """
+        Pairwise-complete Pearson correlations, like df[measures].corr(), or per
+        group like df.groupby(by)[measures].corr().unstack() when by is given.
+        """
+        measures = list(measures or self.measures)
+        cube = self.rollup(by if by is not None else ())
+        idx = [self.measures.index(m) for m in measures]
+        n = cube.n[:, idx][:, :, idx]
+        s = cube.s[:, idx][:, :, idx]
+        ss = cube.ss[:, idx][:, :, idx]
+        sp = cube.sp[:, idx][:, :, idx]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_i = s / n
+            mean_j = np.swapaxes(s, 1, 2) / n
+            cov = sp / n - mean_i * mean_j
+            var_i = _population_var(n, mean_i, ss)
+            var_j = _population_var(n, mean_j, np.swapaxes(ss, 1, 2))
+            r = cov / np.sqrt(var_i * var_j)
+        r = np.where((n > 1) & (var_i > 0) & (var_j > 0), np.clip(r, -1.0, 1.0), np.nan)
+        diag = np.arange(len(measures))
+        r[:, diag, diag] = np.where(n[:, diag, diag] > 1, 1.0, np.nan)
+
+        if by is None:
+            return pd.DataFrame(r[0], index=measures, columns=measures)
+        columns = pd.MultiIndex.from_product([measures, measures])
+        return pd.DataFrame(r.reshape(len(cube), -1), index=cube._index(), columns=columns)
+
+    # Storage
+
+    def save(self, path):
+        arrays = {"rows": self.rows, "n": self.n, "s": self.s, "ss": self.ss, "sp": self.sp, "mn": self.mn, "mx": self.mx}
+        for col in self.keys.columns:
+            values = self.keys[col]
+            arrays[f"key__{col}__missing"] = values.isna().to_numpy()
+            arrays[f"key__{col}"] = np.array([str(v) for v in values.astype(object).where(values.notna(), "")], dtype=str)
+        config = {"dims": list(self.keys.columns), "measures": self.measures,
+                  "numeric_dims": [c for c in self.keys.columns if pd.api.types.is_numeric_dtype(self.keys[c])]}
+        arrays["config"] = np.array(json.dumps(config))
+        if self.fingerprint is not None:
+            arrays["fingerprint"] = np.array(self.fingerprint)
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            config = json.loads(str(data["config"]))
+            keys = {}
+            for col in config["dims"]:
+                values = pd.Series(data[f"key__{col}"], dtype=object)
+                values[data[f"key__{col}__missing"]] = None
+                if col in config["numeric_dims"]:
+                    values = pd.to_numeric(values).astype("Int64")
+                keys[col] = values
+            fingerprint = str(data["fingerprint"]) if "fingerprint" in data else None
+            return cls(pd.DataFrame(keys), data["rows"], data["n"], data["s"], data["ss"], data["sp"],
+                       data["mn"], data["mx"], config["measures"], fingerprint)
+
+
+def load_or_build_cube(path, merged):
+    """
+    The saved cube when it was built from exactly the values in merged (same
+    cube_fingerprint), otherwise a cube built from merged (e.g. in a notebook
+    run before the integration step wrote the cube, or after merged_movies
+    was replaced).
+    """
+    try:
+        cube = AggregateCube.load(path)
+        if cube.fingerprint is not None and cube.fingerprint == cube_fingerprint(merged):
+            return cube
+    except (OSError, ValueError, KeyError):
+        pass
+    return AggregateCube.build(prepare_cube_input(merged))
@@ -0,0 +1,141 @@
+"""
+Density-aggregated scatter plots for large merged tables.
+
+sns.scatterplot draws one marker per movie (and, with hue="genre_imdb", one
+legend entry per raw genre string), which is fine for the 705-film merged
+table but takes minutes and is unreadable at full-catalogue scale.
+density_scatter instead bins the points into a fixed 2-D grid with NumPy, one
+count layer per hue group, and draws the grid as a single image: each cell is
+coloured by the mix of groups in it and shaded by log(count). Binning is one
+vectorized pass over the points, and drawing costs the same for 1,000 or
+10,000,000 points because only the grid is rendered.
+
+scatterplot() is a drop-in for the sns.scatterplot calls in the Week 4 and
+Week 5 scripts: it keeps the point plot for small tables and switches to the
+density grid above DENSITY_MIN_POINTS rows (or always/never with
+mode="density"/"points", default from SCATTER_MODE in the environment).
+"""
+
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+# "auto" (points below DENSITY_MIN_POINTS, density above), "points" or "density"
+SCATTER_MODE = os.environ.get("SCATTER_MODE", "auto")
+DENSITY_MIN_POINTS = 50_000
+
+# Grid cells along x and y
+DENSITY_GRIDSIZE = (200, 150)
+
+# Hue groups beyond the most frequent ones are pooled into "Other" to keep the legend readable
+DENSITY_MAX_GROUPS = 10
+OTHER_GROUP = "Other"
+
+
+def _extent(values):
+    finite = values[np.isfinite(values)]
+    if len(finite) == 0:
+        return 0.0, 1.0
+    lo, hi = float(finite.min()), float(finite.max())
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    return lo, hi
+
+
+def _bin_index(values, lo, hi, n):
+    # Half-open bins [lo, hi) with the maximum folded into the last bin
+    idx = ((values - lo) / (hi - lo) * n).astype(np.int64)
+    return np.clip(idx, 0, n - 1)
+
+
+def density_grid(x, y, groups=None, n_groups=1, gridsize=DENSITY_GRIDSIZE, extent=None):
+    """
+    Count points per grid cell and group. x and y are float arrays, groups an
+    int array of group codes in [0, n_groups) (None for a single group).
+    Returns (counts of shape (n_groups, ny, nx), (x0, x1, y0, y1)).
+    """
+    nx, ny = gridsize
+    x0, x1, y0, y1 = extent if extent is not None else (*_extent(x), *_extent(y))
+    keep = np.isfinite(x) & np.isfinite(y)
+    if groups is None:
+        groups = np.zeros(len(x), dtype=np.int64)
+    cell = _bin_index(y[keep], y0, y1, ny) * nx + _bin_index(x[keep], x0, x1, nx)
+    flat = groups[keep].astype(np.int64) * (nx * ny) + cell
+    counts = np.bincount(flat, minlength=n_groups * nx * ny).reshape(n_groups, ny, nx)
+    return counts, (x0, x1, y0, y1)
+
+
+def shade(counts, colors, min_alpha=0.25):
+    """
+    RGBA image for a (n_groups, ny, nx) count grid: each cell's colour is the
+    count-weighted mix of its groups' colours and its opacity grows with
+    log(total count). Empty cells are transparent.
+    """
+    total = counts.sum(axis=0)
+    filled = total > 0
+    rgb = np.tensordot(counts, np.asarray(colors, dtype=float), axes=(0, 0))
+    rgb[filled] /= total[filled][:, None]
+    alpha = np.zeros(total.shape)
+    if filled.any():
+        scaled = np.log1p(total[filled]) / np.log1p(total.max())
+        alpha[filled] = min_alpha + (1 - min_alpha) * scaled
+    return np.dstack([rgb, alpha])
+
+
+def density_scatter(data, x, y, hue=None, gridsize=DENSITY_GRIDSIZE, max_groups=DENSITY_MAX_GROUPS,
+                    palette=None, cmap="viridis", ax=None):
+    """
+    Density version of sns.scatterplot(data=data, x=x, y=y, hue=hue). Rows with
+    a missing x or y are dropped, as seaborn does. Returns the Axes.
+    """
+    ax = ax if ax is not None else plt.gca()
+    data = data.dropna(subset=[x, y])
+    xs = data[x].to_numpy(dtype=float, na_value=np.nan)
+    ys = data[y].to_numpy(dtype=float, na_value=np.nan)
+    # Nothing to bin: return the empty axes, like sns.scatterplot
+    if not (np.isfinite(xs) & np.isfinite(ys)).any():
+        return ax
+
+    if hue is None:
+        counts, extent = density_grid(xs, ys, gridsize=gridsize)
+        grid = np.ma.masked_equal(counts[0], 0)
+        image = ax.imshow(grid, origin="lower", extent=extent, aspect="auto",
+                          interpolation="nearest", cmap=cmap, norm="log")
+        plt.colorbar(image, ax=ax, label="movies per cell")
+    else:
+        # Most frequent groups first; the rest (and missing hue values) become "Other"
+        labels = data[hue].astype(object).where(data[hue].notna(), OTHER_GROUP)
+        top = labels.value_counts().index[:max_groups]
+        if len(top) < labels.nunique():
+            labels = labels.where(labels.isin(top), OTHER_GROUP)
+        codes, names = pd.factorize(labels, sort=False)
+        colors = sns.color_palette(palette, len(names))
+
+        counts, extent = density_grid(xs, ys, codes, len(names), gridsize=gridsize)
+        ax.imshow(shade(counts, colors), origin="lower", extent=extent, aspect="auto", interpolation="nearest")
+        # Empty labelled artists, so plt.legend() and plt.legend().remove() work as with seaborn
+        for name, color in zip(names, colors):
+            ax.scatter([], [], color=color, marker="s", label=name)
+        ax.legend(title=hue)
+
+    # Grid lines would cut through the cells
+    ax.grid(False)
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    return ax
+
+
+def scatterplot(data, x, y, hue=None, mode=SCATTER_MODE, **kwargs):
+    """
+    sns.scatterplot for small tables, density_scatter for large ones (see
+    SCATTER_MODE). Point-only keyword arguments such as alpha are ignored in
+    density mode.
+    """
+    if mode not in ("auto", "points", "density"):
+        raise ValueError(f"unknown scatter mode {mode!r}")
+    if mode == "points" or (mode == "auto" and len(data) < DENSITY_MIN_POINTS):
+        return sns.scatterplot(data=data, x=x, y=y, hue=hue, **kwargs)
+    return density_scatter(data, x, y, hue=hue, ax=kwargs.get("ax"))
@@ -0,0 +1,28 @@
+"""
+The columns the Week 5 analysis derives from merged_movies: a simplified
+genre per movie (genre_simple), log10 budget and revenue (log_budget,
+log_revenue) and the return on investment (roi = revenue / budget).
+
+They live here rather than in the Week 5 script so the benchmark suite can
+time them on tables of any size (benchmarks/bench_suite.py).
+"""
+
+import numpy as np
+
+from pipeline.genres import encode_genres
+
+
+def add_derived_columns(df):
+    """
+    df with genre_simple, log_budget, log_revenue and roi added, plus the
+    GenreEncoding of genre_imdb (its stats() gives per-genre summaries).
+    """
+    encoding = encode_genres(df["genre_imdb"])
+    df = df.assign(
+        genre_simple=encoding.labels(),
+        # 1e-6 keeps a zero budget or revenue finite
+        log_budget=np.log10(df["budget_in_millions"] + 1e-6),
+        log_revenue=np.log10(df["revenue_in_millions"] + 1e-6),
+        roi=df["revenue_in_millions"] / df["budget_in_millions"],
+    )
+    return df, encoding
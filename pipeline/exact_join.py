@@ -0,0 +1,178 @@
+"""
+Exact (title_norm, release_year) join on 64-bit integer keys.
+
+pd.merge on the string title plus the nullable year hashes every title string
+again inside the join and, with copies of both inputs, dominates the exact
+match stage on large tables. Here each row's (title_norm, release_year) pair
+is hashed once into a uint64 key; the join itself is a stable argsort of the
+TMDB keys and two searchsorted calls, and the TMDB columns are gathered by
+position afterwards. Matched pairs are checked against the real titles and
+years, so a 64-bit hash collision can never produce a false match.
+
+Missing years are equal to each other, as in pd.merge.
+
+asof_match is the year-tolerant tier after it: for rows without an exact
+partner it finds a TMDB row with the same title_norm whose release year is
+within +/- tolerance years (the nearest one), with pd.merge_asof on the
+title hash and the year.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Odd 64-bit multiplier that spreads the year hash before it is mixed with the title hash
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def match_keys(title_norm, release_year):
+    """
+    uint64 key per row from a normalized title Series and a release year Series.
+    The key only depends on the values, so keys of two tables can be compared.
+    """
+    # categorize=False: titles are mostly distinct, so factorizing them first only adds a hash table
+    titles = pd.util.hash_array(title_norm.to_numpy(dtype=object), categorize=False)
+    years = pd.util.hash_array(pd.array(release_year, dtype="Float64").to_numpy(dtype="float64", na_value=np.nan))
+    return titles ^ (years * _MIX)
+
+
+def title_keys(title_norm):
+    """
+    uint64 key per row from a normalized title Series (no year), for asof_match.
+    """
+    return pd.util.hash_array(title_norm.to_numpy(dtype=object), categorize=False)
+
+
+def join_positions(left_keys, right_keys):
+    """
+    Row positions of a left join on the keys: (left_pos, right_pos), one entry
+    per output row, with right_pos -1 where a left row has no match. Output
+    rows follow the left order, and several matches of one left row follow
+    the right order, like pd.merge(how="left").
+    """
+    left_keys = np.asarray(left_keys, dtype=np.uint64)
+    right_keys = np.asarray(right_keys, dtype=np.uint64)
+    order = np.argsort(right_keys, kind="stable")
+    sorted_keys = right_keys[order]
+    # Looking up the left keys in sorted order walks sorted_keys front to back (a sorted merge),
+    # which is much more cache-friendly than searching for them in row order
+    left_order = np.argsort(left_keys)
+    queries = left_keys[left_order]
+    lo = np.empty(len(left_keys), dtype=np.int64)
+    hi = np.empty(len(left_keys), dtype=np.int64)
+    lo[left_order] = np.searchsorted(sorted_keys, queries, side="left")
+    hi[left_order] = np.searchsorted(sorted_keys, queries, side="right")
+    matches = hi - lo
+    per_left = np.maximum(matches, 1)
+
+    left_pos = np.repeat(np.arange(len(left_keys)), per_left)
+    starts = np.repeat(np.cumsum(per_left) - per_left, per_left)
+    offset = np.arange(len(left_pos)) - starts
+    matched = np.repeat(matches, per_left) > 0
+    right_pos = np.full(len(left_pos), -1, dtype=np.int64)
+    right_pos[matched] = order[np.repeat(lo, per_left)[matched] + offset[matched]]
+    return left_pos, right_pos
+
+
+def _equal(a, b):
+    # Elementwise a == b for two pandas arrays, with missing equal to missing (pd.merge joins NA keys)
+    equal = a == b
+    equal = equal.to_numpy(dtype=bool, na_value=False) if hasattr(equal, "to_numpy") else np.asarray(equal, dtype=bool)
+    return equal | (pd.isna(a) & pd.isna(b))
+
+
+def verified_join_positions(left, right, on, left_keys, right_keys):
+    """
+    join_positions, then drop any matched pair whose on columns differ (a hash
+    collision). Left rows that lose all their matches become unmatched rows.
+    """
+    left_pos, right_pos = join_positions(left_keys, right_keys)
+    matched = np.flatnonzero(right_pos >= 0)
+    ok = np.ones(len(matched), dtype=bool)
+    for column in on:
+        ok &= _equal(left[column].array.take(left_pos[matched]), right[column].array.take(right_pos[matched]))
+    if ok.all():
+        return left_pos, right_pos
+
+    keep = np.ones(len(left_pos), dtype=bool)
+    keep[matched[~ok]] = False
+    left_pos, right_pos = left_pos[keep], right_pos[keep]
+    # Put back left rows whose only matches were collisions, as unmatched rows
+    lost = np.setdiff1d(np.arange(len(left)), left_pos)
+    left_pos = np.concatenate([left_pos, lost])
+    right_pos = np.concatenate([right_pos, np.full(len(lost), -1, dtype=np.int64)])
+    order = np.argsort(left_pos, kind="stable")
+    return left_pos[order], right_pos[order]
+
+
+def left_join(left, right, on, left_keys, right_keys, suffixes=("_x", "_y"), indicator=False):
+    """
+    pd.merge(left, right, how="left", on=on, suffixes=suffixes, indicator=indicator)
+    computed from precomputed match_keys of both sides. Only the right columns
+    are gathered (and filled with missing values for unmatched rows); the on
+    columns come from the left rows.
+    """
+    left_pos, right_pos = verified_join_positions(left, right, on, left_keys, right_keys)
+    right_cols = [c for c in right.columns if c not in on]
+    overlap = set(right_cols) & (set(left.columns) - set(on))
+
+    left_part = left.iloc[left_pos].reset_index(drop=True)
+    left_part.columns = [f"{c}{suffixes[0]}" if c in overlap else c for c in left.columns]
+    # reindex fills -1 (no match) with missing values and upcasts like pd.merge does
+    right_part = right[right_cols].reset_index(drop=True).reindex(right_pos).reset_index(drop=True)
+    right_part.columns = [f"{c}{suffixes[1]}" if c in overlap else c for c in right_cols]
+
+    merged = pd.concat([left_part, right_part], axis=1)
+    if indicator:
+        merged["_merge"] = pd.Categorical.from_codes(
+            np.where(right_pos >= 0, 2, 0), categories=["left_only", "right_only", "both"]
+        )
+    return merged
+
+
+def asof_match(left, right, tolerance, left_keys=None, right_keys=None):
+    """
+    For each left row, the right row with the same title_norm and the nearest
+    release_year at most tolerance years away (ties go to the earlier year;
+    rows without a year never match). left_keys/right_keys are title_keys of both sides, computed here
+    when not given. Returns a DataFrame of left_pos, right_pos and year_gap
+    (right year - left year), one row per matched left row.
+    """
+    if left_keys is None:
+        left_keys = title_keys(left["title_norm"])
+    if right_keys is None:
+        right_keys = title_keys(right["title_norm"])
+    empty = pd.DataFrame({"left_pos": np.zeros(0, dtype=np.int64), "right_pos": np.zeros(0, dtype=np.int64),
+                          "year_gap": np.zeros(0, dtype=np.int64)})
+    left_years = pd.array(left["release_year"], dtype="Int64")
+    right_years = pd.array(right["release_year"], dtype="Int64")
+    left_has, right_has = ~pd.isna(left_years), ~pd.isna(right_years)
+    if not left_has.any() or not right_has.any():
+        return empty
+
+    # merge_asof wants both sides sorted by the "on" column
+    lhs = pd.DataFrame({
+        "key": np.asarray(left_keys, dtype=np.uint64)[left_has],
+        "year": left_years[left_has].to_numpy(dtype=np.int64),
+        "left_pos": np.flatnonzero(left_has),
+    }).sort_values("year", kind="stable")
+    rhs = pd.DataFrame({
+        "key": np.asarray(right_keys, dtype=np.uint64)[right_has],
+        "right_year": right_years[right_has].to_numpy(dtype=np.int64),
+        "right_pos": np.flatnonzero(right_has),
+    }).sort_values("right_year", kind="stable")
+    rhs["year"] = rhs["right_year"]
+
+    joined = pd.merge_asof(lhs, rhs, on="year", by="key", direction="nearest", tolerance=int(tolerance))
+    joined = joined.dropna(subset=["right_pos"])
+    if joined.empty:
+        return empty
+    out = pd.DataFrame({
+        "left_pos": joined["left_pos"].to_numpy(dtype=np.int64),
+        "right_pos": joined["right_pos"].to_numpy(dtype=np.int64),
+        "year_gap": (joined["right_year"] - joined["year"]).to_numpy(dtype=np.int64),
+    }).sort_values("left_pos", kind="stable").reset_index(drop=True)
+
+    # Drop pairs that only share a title hash, not the title
+    same = _equal(left["title_norm"].array.take(out["left_pos"].to_numpy()),
+                  right["title_norm"].array.take(out["right_pos"].to_numpy()))
+    return out[same].reset_index(drop=True)
@@ -0,0 +1,146 @@
+"""
+Content-addressed cache for rendered figures.
+
+A figure's key is a hash of everything its image depends on: the values and
+dtypes of the exact columns the spec reads (FigureSpec.columns), its plotting
+parameters, figure size, output formats and DPI, and the source of its draw
+function. When a key is already in the cache the stored files are copied into
+place instead of drawing the figure again, so rerunning the Week 5 script
+after a change that only touches a few columns redraws only the figures that
+read them.
+
+The cache lives in a folder of <key>.<fmt> files and is bounded in size: after
+each run the least recently used entries are deleted until it fits in
+max_bytes. Hit and miss counts are kept per run and across runs (stats.json).
+
+Helpers the draw function calls (e.g. financial_subset in Week 5) are not part
+of the key; clear the cache folder after changing one of them.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Default size bound for one script's figure cache
+FIGURE_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+STATS_NAME = "stats.json"
+
+
+def _draw_source(draw):
+    try:
+        return inspect.getsource(draw)
+    except (OSError, TypeError):
+        # Functions defined in an interactive session have no source file
+        return draw.__code__.co_code.hex() + repr(draw.__code__.co_consts)
+
+
+def figure_key(spec, df, formats, dpi):
+    """
+    Hash of the columns spec reads from df (all columns when spec.columns is
+    None) plus everything else that changes the rendered files.
+    """
+    columns = spec.columns if spec.columns is not None else list(df.columns)
+    data = df[columns]
+
+    digest = hashlib.sha1()
+    digest.update(json.dumps([[c, str(data[c].dtype)] for c in columns]).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    digest.update(json.dumps({
+        "name": spec.name,
+        "params": spec.params,
+        "figsize": list(spec.figsize),
+        "formats": list(formats),
+        "dpi": dpi,
+    }, sort_keys=True, default=repr).encode())
+    digest.update(_draw_source(spec.draw).encode())
+    return digest.hexdigest()
+
+
+class FigureCache:
+    """
+    A folder of rendered figures addressed by figure_key, with LRU eviction
+    (by file modification time, refreshed on every hit) once it exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir, max_bytes=FIGURE_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _paths(self, key, formats):
+        return [self.cache_dir / f"{key}.{fmt}" for fmt in formats]
+
+    def fetch(self, key, name, out_dir, formats):
+        """
+        Copy the cached files for key to out_dir/<name>.<fmt>. Returns the file
+        names on a hit, None on a miss.
+        """
+        cached = self._paths(key, formats)
+        if not all(p.exists() for p in cached):
+            self.misses += 1
+            return None
+        now = time.time()
+        files = []
+        for fmt, path in zip(formats, cached):
+            target = Path(out_dir) / f"{name}.{fmt}"
+            shutil.copyfile(path, target)
+            os.utime(path, (now, now))
+            files.append(target.name)
+        self.hits += 1
+        return files
+
+    def store(self, key, name, out_dir, formats):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        for fmt, path in zip(formats, self._paths(key, formats)):
+            shutil.copyfile(Path(out_dir) / f"{name}.{fmt}", path)
+
+    def evict(self):
+        """
+        Delete least recently used files until the cache fits in max_bytes.
+        Returns the number of files removed.
+        """
+        if not self.cache_dir.exists():
+            return 0
+        entries = [p for p in self.cache_dir.iterdir() if p.is_file() and p.name != STATS_NAME]
+        entries.sort(key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in entries)
+        removed = 0
+        for path in entries:
+            if total <= self.max_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink()
+            removed += 1
+        return removed
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def record_stats(self):
+        """
+        Add this run's hits and misses to the running totals in stats.json and
+        return the totals.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        stats_path = self.cache_dir / STATS_NAME
+        totals = {"hits": 0, "misses": 0}
+        if stats_path.exists():
+            with open(stats_path) as f:
+                totals.update(json.load(f))
+        totals["hits"] += self.hits
+        totals["misses"] += self.misses
+        lookups = totals["hits"] + totals["misses"]
+        totals["hit_rate"] = round(totals["hits"] / lookups, 4) if lookups else 0.0
+        with open(stats_path, "w") as f:
+            json.dump(totals, f, indent=2)
+        return totals
@@ -0,0 +1,219 @@
+"""
+Named figure specs for the Week 4 and Week 5 scripts, drawn either inline
+(notebook / interactive use, ending in plt.show()) or rendered in batch.
+
+Each figure is a function that draws onto the current matplotlib figure from
+the merged movies DataFrame, registered under a name with the columns it
+reads and its size:
+
+    FIGURES = FigureRegistry(WEEK5_FIGURES_DIR)
+
+    @FIGURES.figure("log_budget_vs_log_revenue", columns=[...], figsize=(7, 6))
+    def log_budget_vs_log_revenue(df):
+        sns.scatterplot(...)
+
+    FIGURES.show("log_budget_vs_log_revenue", df)   # in the notebook cell
+    FIGURES.render_all(df)                          # at the end of the script
+
+In batch mode (RENDER_FIGURES=1, which run_all.py sets) show() does nothing
+and render_all() draws every spec with the non-interactive Agg backend in a
+pool of worker processes, saving each one as PNG/SVG and printing its render
+time. The workers are forked after the data is loaded, so they share the
+DataFrame instead of receiving a pickled copy; a full refresh then takes about
+as long as the slowest figure rather than the sum of all of them.
+
+Batch renders go through a content-addressed cache (pipeline/figure_cache.py)
+in figures/.cache/, so only figures whose columns, parameters or draw code
+changed are drawn again. FIGURE_CACHE=0 turns it off.
+"""
+
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import matplotlib
+
+from pipeline.figure_cache import FigureCache, figure_key
+
+# Opt-in: RENDER_FIGURES=1 python data_visualizations/Week_5_Final_Visualizations.py
+BATCH_RENDER = os.environ.get("RENDER_FIGURES", "") not in ("", "0")
+
+# File formats written per figure, e.g. RENDER_FORMATS=png,svg
+FIGURE_FORMATS = tuple(f.strip() for f in os.environ.get("RENDER_FORMATS", "png").split(",") if f.strip())
+FIGURE_DPI = 120
+
+# Cache rendered figures by the data and parameters they depend on (FIGURE_CACHE=0 to always redraw)
+FIGURE_CACHE = os.environ.get("FIGURE_CACHE", "1") not in ("", "0")
+FIGURE_CACHE_DIR_NAME = ".cache"
+
+# Written last by render_all, so run_all.py can use it as the stage's output
+MANIFEST_NAME = "manifest.json"
+
+# Set in the parent right before the pool forks; the workers read it instead of unpickling the data
+_RENDER_STATE = {}
+
+
+class FigureSpec:
+    """
+    One named figure: the function that draws it, the DataFrame columns it
+    reads, its size and any keyword parameters passed to the draw function.
+    """
+
+    def __init__(self, name, draw, columns=None, figsize=(8, 6), params=None):
+        self.name = name
+        self.draw = draw
+        self.columns = list(columns) if columns is not None else None
+        self.figsize = figsize
+        self.params = dict(params or {})
+
+    def __repr__(self):
+        return f"FigureSpec({self.name!r})"
+
+
+def draw_figure(spec, df):
+    """
+    Draw spec onto a new figure and return it (the caller shows, saves or closes it).
+    """
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=spec.figsize)
+    spec.draw(df, **spec.params)
+    return fig
+
+
+def _render_one(spec, df, out_dir, formats, dpi):
+    import matplotlib.pyplot as plt
+
+    start = time.perf_counter()
+    fig = draw_figure(spec, df)
+    paths = []
+    for fmt in formats:
+        path = Path(out_dir) / f"{spec.name}.{fmt}"
+        fig.savefig(path, dpi=dpi, bbox_inches="tight")
+        paths.append(path.name)
+    plt.close(fig)
+    return {"name": spec.name, "seconds": time.perf_counter() - start, "files": paths, "cached": False}
+
+
+def _render_in_worker(name):
+    state = _RENDER_STATE
+    return _render_one(state["specs"][name], state["df"], state["out_dir"], state["formats"], state["dpi"])
+
+
+def render_figures(specs, df, out_dir, formats=FIGURE_FORMATS, dpi=FIGURE_DPI, workers=None, cache=None):
+    """
+    Render every spec to out_dir/<name>.<fmt> with the Agg backend, spreading the
+    specs over a pool of forked worker processes. Returns one dict per figure
+    (name, seconds, files, cached) in spec order. With a FigureCache, figures
+    whose key is cached are copied from it and only the misses are drawn.
+    """
+    import matplotlib.pyplot as plt
+
+    plt.switch_backend("Agg")
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    specs = list(specs)
+    if cache is None:
+        return _render_uncached(specs, df, out_dir, formats, dpi, workers)
+
+    results, keys, misses = {}, {}, []
+    for spec in specs:
+        start = time.perf_counter()
+        keys[spec.name] = figure_key(spec, df, formats, dpi)
+        files = cache.fetch(keys[spec.name], spec.name, out_dir, formats)
+        if files is None:
+            misses.append(spec)
+        else:
+            results[spec.name] = {"name": spec.name, "seconds": time.perf_counter() - start, "files": files, "cached": True}
+
+    for result in _render_uncached(misses, df, out_dir, formats, dpi, workers):
+        cache.store(keys[result["name"]], result["name"], out_dir, formats)
+        results[result["name"]] = result
+    cache.evict()
+    return [results[spec.name] for spec in specs]
+
+
+def _render_uncached(specs, df, out_dir, formats, dpi, workers):
+    """
+    Draw every spec, in a pool of forked workers when there is more than one
+    figure and CPU, otherwise (or where fork is unavailable) in this process.
+    """
+    workers = workers or min(len(specs), os.cpu_count() or 1)
+
+    if workers <= 1 or len(specs) <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        return [_render_one(spec, df, out_dir, formats, dpi) for spec in specs]
+
+    _RENDER_STATE.update(specs={s.name: s for s in specs}, df=df, out_dir=out_dir, formats=formats, dpi=dpi)
+    try:
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            return list(pool.map(_render_in_worker, [s.name for s in specs]))
+    finally:
+        _RENDER_STATE.clear()
+
+
+class FigureRegistry:
+    """
+    The figures of one script, in the order they are registered.
+    """
+
+    def __init__(self, out_dir, formats=FIGURE_FORMATS, batch=BATCH_RENDER, cache=FIGURE_CACHE):
+        self.out_dir = Path(out_dir)
+        self.formats = tuple(formats)
+        self.batch = batch
+        self.cache = FigureCache(self.out_dir / FIGURE_CACHE_DIR_NAME) if cache else None
+        self.specs = {}
+
+    def figure(self, name, columns=None, figsize=(8, 6), **params):
+        """
+        Decorator registering a draw function under name.
+        """
+        def register(draw):
+            if name in self.specs:
+                raise ValueError(f"figure {name!r} is already registered")
+            self.specs[name] = FigureSpec(name, draw, columns=columns, figsize=figsize, params=params)
+            return draw
+        return register
+
+    def show(self, name, df):
+        """
+        Draw one figure inline (notebook / interactive runs). In batch mode the
+        figure is left to render_all instead.
+        """
+        if self.batch:
+            return
+        import matplotlib.pyplot as plt
+
+        draw_figure(self.specs[name], df)
+        plt.show()
+
+    def render_all(self, df, workers=None):
+        """
+        In batch mode, render every registered figure to out_dir, print the
+        render time per figure and write out_dir/manifest.json. Returns the
+        per-figure results (an empty list outside batch mode).
+        """
+        if not self.batch:
+            return []
+        start = time.perf_counter()
+        results = render_figures(self.specs.values(), df, self.out_dir, formats=self.formats, workers=workers, cache=self.cache)
+        wall = time.perf_counter() - start
+
+        for result in results:
+            print(f"  {result['name']:<40} {result['seconds']:6.2f} s{'  (cached)' if result['cached'] else ''}")
+        slowest = max((r["seconds"] for r in results), default=0.0)
+        total = sum(r["seconds"] for r in results)
+        print(f"Rendered {len(results)} figures to {self.out_dir} in {wall:.2f} s "
+              f"(slowest figure {slowest:.2f} s, sum of all figures {total:.2f} s)")
+
+        manifest = {"backend": matplotlib.get_backend(), "wall_s": round(wall, 3), "figures": results}
+        if self.cache is not None:
+            totals = self.cache.record_stats()
+            print(f"Figure cache: {self.cache.hits} hits, {self.cache.misses} misses this run "
+                  f"(hit rate {self.cache.hit_rate:.0%}, {totals['hit_rate']:.0%} over all runs)")
+            manifest["cache"] = {"hits": self.cache.hits, "misses": self.cache.misses, "hit_rate": round(self.cache.hit_rate, 4)}
+        with open(self.out_dir / MANIFEST_NAME, "w") as f:
+            json.dump(manifest, f, indent=2)
+        return results
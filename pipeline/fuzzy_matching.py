@@ -0,0 +1,388 @@
+"""
+Batched fuzzy title matching for the integration stage.
+
+The original rapidfuzz fallback in fuzzy_link_remaining scored one IMDb row
+against one TMDB row at a time. Here every release_year block is scored as a
+single matrix with rapidfuzz.process.cdist, which runs in C and uses all cores,
+and the best candidate per IMDb row is picked with numpy.
+
+Both linkers take an optional SimilarityCache (pipeline/similarity_cache.py).
+With it, only IMDb titles that were never scored against their current
+candidates are scored (with the cache's floor as cutoff), every score above
+the floor is kept on disk, and the best pair per row is picked from the
+cached scores, so changing the threshold doesn't rescore anything.
+
+The year-block linker treats each block as a unit of work: with a
+BlockCheckpoint (pipeline/checkpoint.py) every finished block's matches are
+written to disk and an interrupted run resumes after the last finished block;
+with a similarity cache the cache itself is saved every save_every seconds
+and plays that role. With progress=True a tqdm bar (on a terminal) shows the
+title pairs scored per second and the ETA.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from pipeline.checkpoint import block_key
+from pipeline.similarity_cache import grouped_set_digests, query_keys, scorer_name, title_hashes
+
+try:
+    from tqdm import tqdm
+except ImportError:  # progress bars are optional
+    tqdm = None
+
+# Upper bound on the number of cells in one score matrix (rows x candidates).
+# Large year blocks are split into query chunks so memory stays bounded.
+MAX_MATRIX_CELLS = 20_000_000
+
+# With a similarity cache, save it at most this often while blocks are being scored (the resume point)
+CACHE_SAVE_SECONDS = 30
+
+
+def _year_key(year):
+    # Same rule as the old loop: missing years form their own block
+    return None if pd.isna(year) else int(year)
+
+
+def _year_blocks(df):
+    """
+    Group row positions by release_year, keeping rows in their original order.
+    """
+    keys = [_year_key(y) for y in df["release_year"].tolist()]
+    blocks = {}
+    for pos, key in enumerate(keys):
+        blocks.setdefault(key, []).append(pos)
+    return blocks
+
+
+# Block code of a missing release_year in the cached linkers (missing years form their own block)
+_MISSING_YEAR_BLOCK = np.iinfo(np.int64).min
+
+
+def _year_codes(df):
+    return pd.array(df["release_year"], dtype="Int64").to_numpy(dtype=np.int64, na_value=_MISSING_YEAR_BLOCK)
+
+
+def _progress_bar(total, progress, desc="fuzzy link"):
+    """
+    tqdm bar counting title pairs (rate in pairs/s, ETA), or None when progress
+    is off or tqdm is missing. disable=None hides it when output isn't a terminal.
+    """
+    if not progress or tqdm is None:
+        return None
+    return tqdm(total=int(total), unit="pairs", unit_scale=True, desc=desc, disable=None, smoothing=0.1)
+
+
+def _check_threshold(cache, threshold):
+    if threshold < cache.floor:
+        raise ValueError(f"threshold {threshold} is below the similarity cache floor {cache.floor}")
+
+
+def best_matches(queries, choices, threshold=0.90, scorer=fuzz.token_sort_ratio, workers=-1):
+    """
+    Score every query against every choice and return the best choice per query.
+
+    Returns two numpy arrays (best_choice_position, best_score) with one entry per
+    query. best_score is on a 0-1 scale and is 0.0 where nothing reached the
+    threshold. Ties go to the first choice, like the original loop.
+    """
+    n_queries = len(queries)
+    best_pos = np.full(n_queries, -1, dtype=np.int64)
+    best_score = np.zeros(n_queries, dtype=np.float64)
+    if n_queries == 0 or len(choices) == 0:
+        return best_pos, best_score
+
+    chunk = max(1, MAX_MATRIX_CELLS // len(choices))
+    for start in range(0, n_queries, chunk):
+        stop = min(start + chunk, n_queries)
+        scores = process.cdist(
+            queries[start:stop],
+            choices,
+            scorer=scorer,
+            score_cutoff=threshold * 100,
+            dtype=np.float64,
+            workers=workers,
+        )
+        pos = scores.argmax(axis=1)
+        top = scores[np.arange(stop - start), pos] / 100.0
+        found = top >= threshold
+        best_pos[start:stop] = np.where(found, pos, -1)
+        best_score[start:stop] = np.where(found, top, 0.0)
+
+    return best_pos, best_score
+
+
+def link_by_year_blocks(left, right, threshold=0.90, scorer=fuzz.token_sort_ratio, workers=-1, cache=None,
+                        checkpoint=None, progress=False, save_every=CACHE_SAVE_SECONDS):
+    """
+    Fuzzy link left rows (IMDb) to right rows (TMDB) within the same release_year.
+
+    left needs columns imdb_index, title_norm, release_year and right needs
+    tmdb_index, title_norm, release_year. Returns a DataFrame with columns
+    imdb_index, tmdb_index and score, in the same row order as left.
+    With a SimilarityCache, the scores come from scored_year_block_pairs (and
+    checkpoint is not used). Otherwise, with a BlockCheckpoint, blocks finished
+    by an earlier (interrupted) run are read from it and every new block is
+    added to it.
+    """
+    if cache is not None:
+        _check_threshold(cache, threshold)
+        scored = scored_year_block_pairs(left, right, cache, scorer=scorer, workers=workers,
+                                         progress=progress, save_every=save_every)
+        # Same rule as the cdist score_cutoff in best_matches
+        return best_scored_pairs(scored, scored["raw"].to_numpy() >= threshold * 100)
+
+    right_blocks = _year_blocks(right)
+    left_blocks = _year_blocks(left)
+
+    left_titles = left["title_norm"].astype(str).tolist()
+    right_titles = right["title_norm"].astype(str).tolist()
+    left_ids = left["imdb_index"].to_numpy()
+    right_ids = right["tmdb_index"].to_numpy()
+
+    # A block's key covers everything its matches depend on, so a checkpoint from other data is never reused
+    blocks = []
+    for year, left_pos in left_blocks.items():
+        right_pos = right_blocks.get(year)
+        if not right_pos:
+            continue
+        key = None
+        if checkpoint is not None:
+            key = block_key(year, threshold, scorer_name(scorer), left_ids[left_pos], [left_titles[p] for p in left_pos],
+                            right_ids[right_pos], [right_titles[p] for p in right_pos])
+        blocks.append((key, left_pos, right_pos))
+
+    todo_pairs = sum(len(l) * len(r) for key, l, r in blocks if checkpoint is None or key not in checkpoint)
+    bar = _progress_bar(todo_pairs, progress)
+    found_left = []
+    found_right = []
+    found_score = []
+    try:
+        for key, left_pos, right_pos in blocks:
+            saved = checkpoint.get(key) if checkpoint is not None else None
+            if saved is not None:
+                hit_left, hit_right, hit_score = saved["query"], saved["choice"], saved["score"]
+            else:
+                queries = [left_titles[p] for p in left_pos]
+                choices = [right_titles[p] for p in right_pos]
+                pos, score = best_matches(queries, choices, threshold=threshold, scorer=scorer, workers=workers)
+                hit = pos >= 0
+                # Positions inside the block, which are fixed by the block key
+                hit_left, hit_right, hit_score = np.flatnonzero(hit), pos[hit], score[hit]
+                if checkpoint is not None:
+                    checkpoint.record(key, query=hit_left, choice=hit_right, score=hit_score)
+                if bar is not None:
+                    bar.update(len(queries) * len(choices))
+            found_left.append(np.asarray(left_pos)[hit_left])
+            found_right.append(np.asarray(right_pos)[hit_right])
+            found_score.append(hit_score)
+    finally:
+        if bar is not None:
+            bar.close()
+
+    if not found_left:
+        return pd.DataFrame(columns=["imdb_index", "tmdb_index", "score"])
+
+    left_pos = np.concatenate(found_left)
+    order = np.argsort(left_pos, kind="stable")
+    return pd.DataFrame({
+        "imdb_index": left_ids[left_pos[order]],
+        "tmdb_index": right_ids[np.concatenate(found_right)[order]],
+        "score": np.concatenate(found_score)[order],
+    })
+
+
+def link_candidate_pairs(left, right, pairs, threshold=0.90, scorer=fuzz.token_sort_ratio, workers=-1, cache=None):
+    """
+    Fuzzy link using an explicit candidate set instead of exact year blocks.
+
+    pairs has columns imdb_index and tmdb_index (for example from
+    pipeline.title_index.TitleIndex.candidate_pairs). Each pair is scored once with
+    rapidfuzz.process.cpdist and the best pair per IMDb row is kept when it reaches
+    the threshold; ties go to the TMDB row that comes first in right.
+    With a SimilarityCache, the scores come from scored_candidate_pairs.
+    """
+    if len(pairs) == 0:
+        return pd.DataFrame(columns=["imdb_index", "tmdb_index", "score"])
+    if cache is not None:
+        _check_threshold(cache, threshold)
+        scored = scored_candidate_pairs(left, right, pairs, cache, scorer=scorer, workers=workers)
+        return best_scored_pairs(scored, scored["raw"].to_numpy() / 100.0 >= threshold)
+
+    left_titles = left.set_index("imdb_index")["title_norm"].astype(str)
+    right_pos = pd.Series(np.arange(len(right)), index=right["tmdb_index"])
+    right_titles = right.set_index("tmdb_index")["title_norm"].astype(str)
+
+    scores = process.cpdist(
+        left_titles.loc[pairs["imdb_index"]].tolist(),
+        right_titles.loc[pairs["tmdb_index"]].tolist(),
+        scorer=scorer,
+        dtype=np.float64,
+        workers=workers,
+    ) / 100.0
+
+    scored = pd.DataFrame({
+        "imdb_index": pairs["imdb_index"].to_numpy(),
+        "tmdb_index": pairs["tmdb_index"].to_numpy(),
+        "score": scores,
+        "_right_pos": right_pos.loc[pairs["tmdb_index"]].to_numpy(),
+    })
+    scored = scored[scored["score"] >= threshold]
+    best = (
+        scored.sort_values(["score", "_right_pos"], ascending=[False, True], kind="stable")
+              .drop_duplicates("imdb_index")
+    )
+
+    # Keep the IMDb row order of left, like link_by_year_blocks
+    left_pos = pd.Series(np.arange(len(left)), index=left["imdb_index"])
+    best = best.assign(_left_pos=left_pos.loc[best["imdb_index"]].to_numpy()).sort_values("_left_pos")
+    return best[["imdb_index", "tmdb_index", "score"]].reset_index(drop=True)
+
+
+def best_scored_pairs(scored, keep):
+    """
+    Best pair per IMDb row among the scored pairs where keep is True (highest
+    score, ties to the TMDB row that comes first in right), as imdb_index,
+    tmdb_index and score in the row order of left.
+    """
+    hits = scored[keep]
+    if hits.empty:
+        return pd.DataFrame(columns=["imdb_index", "tmdb_index", "score"])
+    best = (
+        hits.sort_values(["_left_pos", "raw", "_right_pos"], ascending=[True, False, True], kind="stable")
+            .drop_duplicates("_left_pos")
+    )
+    return pd.DataFrame({
+        "imdb_index": best["imdb_index"].to_numpy(),
+        "tmdb_index": best["tmdb_index"].to_numpy(),
+        "score": best["raw"].to_numpy() / 100.0,
+    })
+
+
+def _scored_frame(left, right, scored):
+    # scored has _left_pos, _right_pos and raw; add the row ids of both sides
+    return pd.DataFrame({
+        "imdb_index": left["imdb_index"].to_numpy()[scored["_left_pos"].to_numpy(dtype=np.int64)],
+        "tmdb_index": right["tmdb_index"].to_numpy()[scored["_right_pos"].to_numpy(dtype=np.int64)],
+        "raw": scored["raw"].to_numpy(dtype=np.float64),
+        "_left_pos": scored["_left_pos"].to_numpy(dtype=np.int64),
+        "_right_pos": scored["_right_pos"].to_numpy(dtype=np.int64),
+    })
+
+
+def scored_year_block_pairs(left, right, cache, scorer=fuzz.token_sort_ratio, workers=-1, progress=False,
+                            save_every=None):
+    """
+    Every same-release_year (left row, right row) pair whose score reaches the
+    cache floor, as a DataFrame of imdb_index, tmdb_index, raw (0-100 scorer
+    output), _left_pos and _right_pos.
+
+    A left title counts as scored when it was scored against the same set of
+    TMDB titles in its year before; only the other titles are scored (each
+    distinct title once per block) and added to the cache. With save_every,
+    the cache is saved at most every save_every seconds during scoring, so an
+    interrupted run resumes from the blocks scored up to the last save.
+    """
+    left_titles = left["title_norm"].astype(str).to_numpy(dtype=object)
+    right_titles = right["title_norm"].astype(str).to_numpy(dtype=object)
+    left_keys, right_keys = title_hashes(left_titles), title_hashes(right_titles)
+    block_years, right_block = np.unique(_year_codes(right), return_inverse=True)
+    left_years = _year_codes(left)
+
+    # Which left rows have a TMDB block, and the query key of each (title + the block's title set)
+    left_block = np.minimum(np.searchsorted(block_years, left_years), max(len(block_years) - 1, 0))
+    has_block = (block_years[left_block] == left_years) if len(block_years) else np.zeros(len(left), dtype=bool)
+    rows = np.flatnonzero(has_block)
+    keys = query_keys(left_keys[rows], grouped_set_digests(right_block, right_keys)[left_block[rows]])
+    todo = rows[~cache.complete(keys)]
+
+    if len(todo):
+        right_order = np.argsort(right_block, kind="stable")
+        right_starts = np.searchsorted(right_block[right_order], np.arange(len(block_years) + 1))
+        todo_keys = dict(zip(rows.tolist(), keys.tolist()))
+        units = []
+        for block in np.unique(left_block[todo]):
+            block_rows = todo[left_block[todo] == block]
+            query_titles, query_first = np.unique(left_keys[block_rows], return_index=True)
+            choice_rows = right_order[right_starts[block]:right_starts[block + 1]]
+            choice_titles, choice_first = np.unique(right_keys[choice_rows], return_index=True)
+            units.append((block_rows, query_titles, query_first, choice_rows, choice_titles, choice_first))
+
+        bar = _progress_bar(sum(len(u[1]) * len(u[4]) for u in units), progress)
+        last_save = time.monotonic()
+        try:
+            for block_rows, query_titles, query_first, choice_rows, choice_titles, choice_first in units:
+                queries = left_titles[block_rows[query_first]].tolist()
+                choices = right_titles[choice_rows[choice_first]].tolist()
+                chunk = max(1, MAX_MATRIX_CELLS // len(choices))
+                for start in range(0, len(queries), chunk):
+                    scores = process.cdist(queries[start:start + chunk], choices, scorer=scorer,
+                                           score_cutoff=cache.cutoff, dtype=np.float64, workers=workers)
+                    q, c = np.nonzero(scores >= cache.cutoff)
+                    cache.add(query_titles[start + q], choice_titles[c], scores[q, c], queries=[])
+                    if bar is not None:
+                        bar.update(len(scores) * len(choices))
+                # The block's queries only count as complete once all of their chunks are in
+                cache.add([], [], [], queries=[todo_keys[r] for r in block_rows.tolist()])
+                if save_every is not None and time.monotonic() - last_save >= save_every:
+                    cache.save()
+                    last_save = time.monotonic()
+        except BaseException:
+            # Interrupted (e.g. Ctrl-C): keep the blocks finished so far
+            if save_every is not None:
+                cache.save()
+            raise
+        finally:
+            if bar is not None:
+                bar.close()
+
+    # Cached pairs of each left title, kept where the right title is in the row's own year block
+    # (joining on the stored pairs, not on every pair of the block)
+    scored = (
+        pd.DataFrame({"_left_pos": rows, "left_key": left_keys[rows], "_block": left_block[rows]})
+          .merge(cache.pairs_for(left_keys[rows]), on="left_key")
+          .merge(pd.DataFrame({"_right_pos": np.arange(len(right)), "right_key": right_keys, "_block": right_block}),
+                 on=["right_key", "_block"])
+    )
+    return _scored_frame(left, right, scored)
+
+
+def scored_candidate_pairs(left, right, pairs, cache, scorer=fuzz.token_sort_ratio, workers=-1):
+    """
+    scored_year_block_pairs for an explicit candidate set (columns imdb_index
+    and tmdb_index): the pairs whose score reaches the cache floor. A left
+    title counts as scored when it was scored against the same set of
+    candidate titles before.
+    """
+    left_titles = left["title_norm"].astype(str).to_numpy(dtype=object)
+    right_titles = right["title_norm"].astype(str).to_numpy(dtype=object)
+    left_keys, right_keys = title_hashes(left_titles), title_hashes(right_titles)
+    left_pos = pd.Series(np.arange(len(left)), index=left["imdb_index"]).loc[pairs["imdb_index"]].to_numpy()
+    right_pos = pd.Series(np.arange(len(right)), index=right["tmdb_index"]).loc[pairs["tmdb_index"]].to_numpy()
+
+    rows = np.unique(left_pos)
+    keys = query_keys(left_keys[rows], grouped_set_digests(left_pos, right_keys[right_pos])[rows])
+    todo = rows[~cache.complete(keys)]
+    if len(todo):
+        # Each distinct (left title, right title) pair of the unscored rows is scored once
+        new = pd.DataFrame({"left_key": left_keys[left_pos], "right_key": right_keys[right_pos],
+                            "_left_pos": left_pos, "_right_pos": right_pos})
+        new = new[np.isin(left_pos, todo)].drop_duplicates(["left_key", "right_key"])
+        scores = process.cpdist(
+            left_titles[new["_left_pos"].to_numpy()].tolist(),
+            right_titles[new["_right_pos"].to_numpy()].tolist(),
+            scorer=scorer,
+            score_cutoff=cache.cutoff,
+            dtype=np.float64,
+            workers=workers,
+        )
+        cache.add(new["left_key"].to_numpy(), new["right_key"].to_numpy(), scores,
+                  queries=keys[np.isin(rows, todo)])
+
+    scored = pd.DataFrame({"_left_pos": left_pos, "_right_pos": right_pos,
+                           "left_key": left_keys[left_pos], "right_key": right_keys[right_pos]})
+    scored = scored.merge(cache.pairs_for(left_keys[rows]), on=["left_key", "right_key"])
+    return _scored_frame(left, right, scored)
@@ -0,0 +1,220 @@
+"""
+Genre decoding shared by the cleaning, integration and visualization stages.
+
+TMDB stores genres as a JSON list such as
+'[{"id": 28, "name": "Action"}, {"id": 12, "name": "Adventure"}]', while IMDb
+(and the cleaned TMDB table) use a comma-joined string such as
+"Action, Adventure". The same few hundred combinations repeat across thousands
+of rows, so each distinct raw string is decoded once (LRU-memoized) and the
+result is mapped back onto the rows.
+
+encode_genres applies the same idea to comma-joined genre columns: a
+GenreEncoding keeps one integer code per row, the multi-hot genre matrix of
+the distinct strings only, and the Week 5 priority label of each distinct
+string. Per-genre statistics are then a weighted bincount by code followed by
+one small matrix product, instead of a groupby over a derived string column.
+"""
+
+import ast
+import json
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+GENRE_SEPARATOR = ", "
+
+# Upper bound on the number of distinct raw genre strings kept in the memo
+GENRE_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=GENRE_CACHE_SIZE)
+def parse_genre_json(raw):
+    """
+    Canonical genre string for one raw TMDB genres value: the genre names,
+    alphabetized and comma-joined. Returns None for empty or unreadable values.
+    """
+    try:
+        items = json.loads(raw)
+    except (TypeError, ValueError):
+        # Some exports use Python-literal quoting instead of JSON
+        try:
+            items = ast.literal_eval(raw)
+        except (ValueError, SyntaxError, TypeError):
+            return None
+    try:
+        names = sorted(d["name"] for d in items)
+    except (TypeError, KeyError):
+        return None
+    return GENRE_SEPARATOR.join(names) if names else None
+
+
+def decode_genres(raw):
+    """
+    Canonical genre strings for a Series of raw TMDB genres values. Each
+    distinct raw value is parsed once; missing or empty lists become NaN.
+    """
+    codes, uniques = pd.factorize(raw, use_na_sentinel=True)
+    decoded = [parse_genre_json(str(u)) for u in uniques]
+    decoded = np.array([np.nan if d is None else d for d in decoded] + [np.nan], dtype=object)
+    # code -1 (missing) picks the trailing NaN
+    return pd.Series(decoded[codes], index=raw.index, dtype=object)
+
+
+def multi_hot(genres, sep=GENRE_SEPARATOR):
+    """
+    Multi-hot genre matrix for a Series of comma-joined genre strings (IMDb or
+    cleaned TMDB). Returns a boolean DataFrame with one column per genre,
+    sorted by name, aligned with the input index. Missing values get no genre.
+    """
+    return encode_genres(genres, sep).dense()
+
+
+# Week 5's simplified genre categories, checked in this order: the first one found in the
+# lowercased genre string wins ("sci" catches "Sci-Fi" and "Science Fiction")
+GENRE_PRIORITY = [
+    ("drama", "Drama"),
+    ("action", "Action"),
+    ("comedy", "Comedy"),
+    ("romance", "Romance"),
+    ("thriller", "Thriller"),
+    ("sci", "Sci-Fi"),
+    ("fantasy", "Fantasy"),
+    ("animation", "Animation"),
+    ("horror", "Horror"),
+    ("crime", "Crime"),
+]
+OTHER_GENRE = "Other"
+
+
+def simplify_genre(genre):
+    """
+    Simplified category for one genre string (see GENRE_PRIORITY).
+    """
+    genre = str(genre).lower()
+    for needle, label in GENRE_PRIORITY:
+        if needle in genre:
+            return label
+    return OTHER_GENRE
+
+
+def simplify_genre_series(genres):
+    """
+    simplify_genre for every value of a Series, evaluated once per distinct string.
+    """
+    return encode_genres(genres).labels()
+
+
+@lru_cache(maxsize=GENRE_CACHE_SIZE)
+def _split_genres(genre, sep):
+    return tuple(g.strip() for g in genre.split(sep.strip()) if g.strip())
+
+
+class GenreEncoding:
+    """
+    A genre column factorized into its distinct strings:
+
+    - codes: one int per row indexing the distinct strings (len(uniques) for missing)
+    - uniques: the distinct strings
+    - names: every genre that occurs, sorted
+    - matrix: boolean (distinct strings x genres) multi-hot matrix
+    - unique_labels: simplify_genre of each distinct string
+
+    The row-level multi-hot matrix is matrix[codes]; it is only materialized
+    by dense() and csr().
+    """
+
+    def __init__(self, codes, uniques, names, matrix, unique_labels, index):
+        self.codes = codes
+        self.uniques = uniques
+        self.names = names
+        self.matrix = matrix
+        self.unique_labels = unique_labels
+        self.index = index
+
+    def __len__(self):
+        return len(self.codes)
+
+    def labels(self):
+        """
+        The priority label (simplify_genre) of every row; missing genres are "Other".
+        """
+        labels = np.append(self.unique_labels, simplify_genre(np.nan)).astype(object)
+        return pd.Series(labels[self.codes], index=self.index)
+
+    def dense(self):
+        """
+        Boolean DataFrame with one column per genre, aligned with the rows.
+        """
+        padded = np.vstack([self.matrix, np.zeros((1, len(self.names)), dtype=bool)])
+        return pd.DataFrame(padded[self.codes], index=self.index, columns=self.names)
+
+    def csr(self):
+        """
+        The row-level multi-hot matrix in compressed sparse row form, as
+        (indptr, indices) arrays: the genres of row r are
+        names[indices[indptr[r]:indptr[r + 1]]].
+        """
+        per_unique = np.append(self.matrix.sum(axis=1), 0)
+        indptr = np.r_[0, np.cumsum(per_unique[self.codes])]
+        unique_cols = [np.flatnonzero(row) for row in self.matrix] + [np.zeros(0, dtype=np.int64)]
+        unique_start = np.r_[0, np.cumsum([len(c) for c in unique_cols])]
+        flat = np.concatenate(unique_cols).astype(np.int64)
+        # Each row copies its distinct string's column run; gather them all in one index expression
+        offsets = np.arange(indptr[-1]) - np.repeat(indptr[:-1], per_unique[self.codes])
+        indices = flat[np.repeat(unique_start[self.codes], per_unique[self.codes]) + offsets]
+        return indptr, indices
+
+    def _per_unique(self, mask, weights=None):
+        # Row totals per distinct string; the trailing bin (missing genre) is dropped
+        w = None if weights is None else weights[mask]
+        return np.bincount(self.codes[mask], weights=w, minlength=len(self.uniques) + 1)[:-1]
+
+    def counts(self):
+        """
+        Number of rows carrying each genre (a movie counts once per genre it has).
+        """
+        per_unique = self._per_unique(np.ones(len(self.codes), dtype=bool))
+        return pd.Series(per_unique @ self.matrix, index=self.names, name="count")
+
+    def stats(self, values):
+        """
+        Count and mean of each column of values (aligned with the rows) per
+        genre, counting a movie under every genre it has; missing values are
+        skipped. Returns a DataFrame indexed by genre with (column, "count")
+        and (column, "mean") columns.
+        """
+        matrix = self.matrix.astype(float)
+        out = {}
+        for column in values.columns:
+            x = values[column].to_numpy(dtype=float, na_value=np.nan)
+            present = np.isfinite(x)
+            n = self._per_unique(present) @ matrix
+            total = self._per_unique(present, x) @ matrix
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out[(column, "count")] = n.astype(np.int64)
+                out[(column, "mean")] = total / n
+        return pd.DataFrame(out, index=pd.Index(self.names, name="genre"))
+
+
+def encode_genres(genres, sep=GENRE_SEPARATOR):
+    """
+    GenreEncoding of a Series of comma-joined genre strings. Each distinct
+    string is split and labelled once (and memoized across calls).
+    """
+    codes, uniques = pd.factorize(genres, use_na_sentinel=True)
+    uniques = [str(u) for u in uniques]
+    split = [_split_genres(u, sep) for u in uniques]
+    names = sorted({g for parts in split for g in parts})
+    column = {name: i for i, name in enumerate(names)}
+
+    matrix = np.zeros((len(uniques), len(names)), dtype=bool)
+    for row, parts in enumerate(split):
+        matrix[row, [column[g] for g in parts]] = True
+    unique_labels = np.array([_simplify_genre_cached(u) for u in uniques], dtype=object)
+    # Missing values (code -1) index the padding row/label appended by labels(), dense() and csr()
+    codes = np.where(codes < 0, len(uniques), codes).astype(np.int64)
+    return GenreEncoding(codes, uniques, names, matrix, unique_labels, genres.index)
+
+
+_simplify_genre_cached = lru_cache(maxsize=GENRE_CACHE_SIZE)(simplify_genre)
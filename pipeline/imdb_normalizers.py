@@ -0,0 +1,94 @@
+"""
+Single-pass normalizers for the formatted IMDb columns.
+
+The scraped IMDb list stores numbers as display text: release_year as "(1994)"
+or "(I) (2016)", runtime as "142 min" and gross as "$28.34M". Each field has one
+precompiled pattern that pulls out the number in a single vectorized
+str.extract, followed by one cast to the final dtype. Values that are present
+but don't match the pattern are counted as rejected (and become missing), so
+the cleaning log can show how much was lost per field.
+"""
+
+import re
+
+import pandas as pd
+
+# pyarrow runs the extraction and the cast in C++ (RE2); without it pandas str.extract is used
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    ARROW_AVAILABLE = True
+except Exception:
+    ARROW_AVAILABLE = False
+
+# "(1994)", "1994", "(I) (2016)", "(II) (2018)": the Roman numeral only disambiguates titles
+RELEASE_YEAR_PATTERN = re.compile(r"^\s*(?:\([IVXLC]+\)\s*)?\(?\s*(?P<value>\d{4})\s*\)?\s*$")
+
+# "142 min" or "142"
+RUNTIME_PATTERN = re.compile(r"^\s*(?P<value>\d+)\s*(?:min)?\s*$")
+
+# "$28.34M", "28.34M", "28.34" (millions of dollars)
+GROSS_PATTERN = re.compile(r"^\s*\$?\s*(?P<value>\d+(?:\.\d*)?|\.\d+)\s*M?\s*$")
+
+
+def _extract(raw, pattern, dtype):
+    """
+    Extract the "value" group of pattern from every value and cast it to dtype
+    ("Int64" or "Float64"). Returns (values, rejected) where rejected counts
+    non-missing values that did not match.
+    """
+    if ARROW_AVAILABLE:
+        # Arrow-backed string columns convert without a copy; anything else is cast to text first
+        text = pa.array(raw, from_pandas=True)
+        if not (pa.types.is_string(text.type) or pa.types.is_large_string(text.type)):
+            text = pc.cast(text, pa.string())
+        # flatten() keeps non-matches as nulls (field() would expose empty strings)
+        matched = pc.extract_regex(text, pattern.pattern).flatten()[0]
+        rejected = matched.null_count - text.null_count
+        target = pa.int64() if dtype == "Int64" else pa.float64()
+        values = pc.cast(matched, target).to_pandas(types_mapper={target: pd.api.types.pandas_dtype(dtype)}.get)
+        values.index = raw.index
+        return values.rename(raw.name), int(rejected)
+
+    text = raw.astype("string")
+    extracted = text.str.extract(pattern, expand=False)
+    rejected = int((extracted.isna() & text.notna()).sum())
+    return extracted.astype(dtype).rename(raw.name), rejected
+
+
+def normalize_release_year(raw):
+    return _extract(raw, RELEASE_YEAR_PATTERN, "Int64")
+
+
+def normalize_runtime(raw):
+    return _extract(raw, RUNTIME_PATTERN, "Int64")
+
+
+def normalize_gross(raw):
+    return _extract(raw, GROSS_PATTERN, "Float64")
+
+
+# Raw IMDb column -> (normalizer, cleaned column name)
+IMDB_NORMALIZERS = {
+    "release_year": (normalize_release_year, "release_year"),
+    "runtime": (normalize_runtime, "runtime_in_minutes"),
+    "gross": (normalize_gross, "gross_in_millions"),
+}
+
+
+def normalize_imdb_fields(imdb):
+    """
+    Run every normalizer in IMDB_NORMALIZERS on a raw IMDb frame. Returns a new
+    frame with the cleaned columns in place of the raw ones and a dict with the
+    number of rejected values per raw column.
+    """
+    out = imdb.copy()
+    rejected = {}
+    for raw_col, (normalize, clean_col) in IMDB_NORMALIZERS.items():
+        if raw_col not in out.columns:
+            continue
+        values, rejected[raw_col] = normalize(out[raw_col])
+        if clean_col != raw_col:
+            out = out.drop(columns=[raw_col])
+        out[clean_col] = values
+    return out, rejected
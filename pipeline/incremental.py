@@ -0,0 +1,168 @@
+"""
+Incremental integration: work out which IMDb rows can reuse last run's output.
+
+Every cleaned row is hashed with hashlib. The link table saved next to
+merge_log.json remembers, for each row of merged_movies.csv, which IMDb row it
+came from and digests of the TMDB rows its result depended on:
+
+- exact_digest: the TMDB rows with the same (title_norm, release_year) key,
+  which decide the exact merge.
+- block_digest: the TMDB rows in the IMDb row's release_year block (or year
+  window), in order, which decide the fuzzy match.
+
+An IMDb row is reused when its own hash and both digests are unchanged, so only
+new or changed rows, and rows whose TMDB candidates changed, are re-linked.
+Every row also stores config_digest, a digest of the linking settings
+(thresholds, year windows, backend and scorer). A link table written under
+other settings is discarded as a whole, so changing a setting re-links
+everything.
+Reused rows are read back from the previous merged table and cast to the
+dtypes of the freshly linked rows, so a patched output matches a full run.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline.storage import PARQUET_AVAILABLE, table_paths
+
+LINK_COLUMNS = ["imdb_key", "exact_digest", "block_digest", "_merge_status", "config_digest"]
+
+
+def row_hashes(df):
+    """
+    sha1 hex digest of every row (column names included so a schema change
+    invalidates everything).
+    """
+    header = "\x1f".join(map(str, df.columns))
+    values = [df[c].astype(str).tolist() for c in df.columns]
+    return pd.Series(
+        [hashlib.sha1((header + "\x1e" + "\x1f".join(row)).encode("utf-8")).hexdigest() for row in zip(*values)],
+        index=df.index,
+    )
+
+
+def row_keys(hashes):
+    """
+    Unique key per row: the row hash plus its occurrence number, so identical
+    duplicate rows still get separate keys.
+    """
+    occurrence = hashes.groupby(hashes, sort=False).cumcount()
+    return hashes + "#" + occurrence.astype(str)
+
+
+def _digest(parts):
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def config_digest(settings):
+    """
+    sha1 hex digest of a dict of linking settings (order-independent).
+    """
+    return _digest([json.dumps(settings, sort_keys=True, default=str)])
+
+
+def _year_key(year):
+    return "" if pd.isna(year) else str(int(year))
+
+
+def dependency_digests(imdb, tmdb, tmdb_hashes, year_window=None):
+    """
+    exact_digest and block_digest for every IMDb row (see the module docstring).
+    Both frames need normalized title_norm and release_year columns.
+    """
+    exact_groups = {}
+    block_groups = {}
+    for title, year, row_hash in zip(tmdb["title_norm"], tmdb["release_year"], tmdb_hashes):
+        exact_groups.setdefault((title, _year_key(year)), []).append(row_hash)
+        block_groups.setdefault(_year_key(year), []).append(row_hash)
+    exact_digests = {key: _digest(hashes) for key, hashes in exact_groups.items()}
+    block_digests = {key: _digest(hashes) for key, hashes in block_groups.items()}
+
+    window = year_window or 0
+    empty = _digest([])
+    exact_col = []
+    block_col = []
+    for title, year in zip(imdb["title_norm"], imdb["release_year"]):
+        exact_col.append(exact_digests.get((title, _year_key(year)), empty))
+        if pd.isna(year):
+            years = [""]
+        else:
+            years = [str(y) for y in range(int(year) - window, int(year) + window + 1)]
+        block_col.append(_digest(block_digests.get(y, empty) for y in years))
+
+    return pd.DataFrame({"exact_digest": exact_col, "block_digest": block_col}, index=imdb.index)
+
+
+def load_previous(merged_stem, link_csv, config):
+    """
+    Last run's merged table and link table, or (None, None) if either is
+    missing, they do not line up, or the links were made with settings other
+    than config (a config_digest).
+    """
+    parquet_path, csv_path = table_paths(merged_stem)
+    if not Path(link_csv).exists():
+        return None, None
+    if PARQUET_AVAILABLE and parquet_path.exists():
+        merged = pd.read_parquet(parquet_path)
+    elif csv_path.exists():
+        # round_trip keeps every float exactly as it was written
+        merged = pd.read_csv(csv_path, float_precision="round_trip")
+    else:
+        return None, None
+    links = pd.read_csv(link_csv, dtype=str, keep_default_na=False)
+    if len(merged) != len(links) or list(links.columns) != LINK_COLUMNS:
+        return None, None
+    if (links["config_digest"] != config).any():
+        return None, None
+    return merged, links
+
+
+def reusable_rows(keys, deps, previous_links):
+    """
+    Boolean mask over the IMDb rows: True where the previous output can be reused.
+    """
+    if previous_links is None:
+        return pd.Series(False, index=keys.index)
+    previous = previous_links.drop_duplicates("imdb_key").set_index("imdb_key")[["exact_digest", "block_digest"]]
+    before = previous.reindex(keys.to_numpy())
+    same_exact = before["exact_digest"].to_numpy() == deps["exact_digest"].to_numpy()
+    same_block = before["block_digest"].to_numpy() == deps["block_digest"].to_numpy()
+    return pd.Series(same_exact & same_block, index=keys.index)
+
+
+def assemble(keys, deps, reuse, previous_merged, previous_links, new_final, new_keys, config):
+    """
+    Patch the merged output: rows of reused IMDb rows are copied from the
+    previous output (cast to the dtypes of new_final), rows of re-linked IMDb
+    rows come from new_final (whose rows belong to the IMDb keys in new_keys).
+    Rows are ordered by IMDb row, like a full run. Returns (merged, link_table),
+    with config (a config_digest) in every link row.
+    """
+    position = pd.Series(range(len(keys)), index=keys.to_numpy())
+    deps_by_key = deps.set_index(keys.to_numpy())
+    new_links = pd.DataFrame({
+        "imdb_key": new_keys.to_numpy(),
+        "exact_digest": deps_by_key.loc[new_keys.to_numpy(), "exact_digest"].to_numpy(),
+        "block_digest": deps_by_key.loc[new_keys.to_numpy(), "block_digest"].to_numpy(),
+        "_merge_status": new_final["_merge_status"].astype(str).to_numpy(),
+        "config_digest": config,
+    })
+
+    merged_parts = [new_final.reset_index(drop=True)]
+    link_parts = [new_links]
+    if previous_links is not None and reuse.any():
+        keep = previous_links["imdb_key"].isin(keys[reuse]).to_numpy()
+        reused = previous_merged[new_final.columns][keep].astype(new_final.dtypes.to_dict())
+        merged_parts.insert(0, reused.reset_index(drop=True))
+        link_parts.insert(0, previous_links[keep])
+
+    merged = pd.concat(merged_parts, ignore_index=True)
+    links = pd.concat(link_parts, ignore_index=True)
+    order = position.loc[links["imdb_key"]].to_numpy().argsort(kind="stable")
+    return merged.iloc[order].reset_index(drop=True), links.iloc[order].reset_index(drop=True)
@@ -0,0 +1,210 @@
+"""
+Per-stage timing and memory records for the cleaning and integration scripts.
+
+A StageProfiler times each named stage of a script (wall time, CPU time, peak
+RSS and rows in/out) and appends one JSON object per stage to a JSON-lines
+file, so runs can be compared with a few lines of pandas:
+
+    pd.read_json("profiles/integration.jsonl", lines=True)
+
+peak_rss_mb is the stage's own peak: on Linux the kernel's high-water mark
+(VmHWM) is reset when a stage starts, through /proc/self/clear_refs. Where that
+is not possible only the process-lifetime peak (ru_maxrss) is known, and it is
+recorded as process_peak_rss_mb instead.
+
+With profiling switched on (PIPELINE_PROFILE=1 in the environment) every stage
+also runs under cProfile, and the stats of the slowest stage are saved as a
+.prof file (readable with pstats or snakeviz) and summarized on screen.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pipeline.paths import PROFILE_DIR
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Opt-in: PIPELINE_PROFILE=1 python run_all.py
+PROFILE_SLOWEST = os.environ.get("PIPELINE_PROFILE", "") not in ("", "0")
+
+# Number of functions shown from the slowest stage's profile
+PROFILE_TOP_N = 20
+
+
+PROC_STATUS = Path("/proc/self/status")
+CLEAR_REFS = Path("/proc/self/clear_refs")
+
+
+def status_mb(field):
+    """
+    A memory field of /proc/self/status (VmRSS, VmHWM, ...) in MB.
+    """
+    for line in PROC_STATUS.read_text().splitlines():
+        if line.startswith(field + ":"):
+            return int(line.split()[1]) / 1024
+    raise KeyError(field)
+
+
+def _reset_peak():
+    # Writing 5 to clear_refs resets VmHWM to the current RSS (Linux only)
+    try:
+        CLEAR_REFS.write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+PEAK_RESET_AVAILABLE = PROC_STATUS.exists() and _reset_peak()
+
+# Peak windows that are still open. Resetting VmHWM for a new window would lose the peak an
+# enclosing window reached so far, so it is folded into every open window first.
+_open_windows = []
+
+
+def start_peak_window():
+    """
+    Start measuring peak RSS from now: a dict with the current RSS ("start")
+    and the peak so far ("peak"), to be passed to end_peak_window. Windows can
+    be nested. Returns None where VmHWM can't be reset.
+    """
+    if not PEAK_RESET_AVAILABLE:
+        return None
+    high = status_mb("VmHWM")
+    for window in _open_windows:
+        window["peak"] = max(window["peak"], high)
+    _reset_peak()
+    current = status_mb("VmRSS")
+    window = {"start": current, "peak": current}
+    _open_windows.append(window)
+    return window
+
+
+def end_peak_window(window):
+    """
+    Peak RSS in MB since start_peak_window returned window.
+    """
+    # By identity: two windows can hold equal numbers
+    _open_windows[:] = [w for w in _open_windows if w is not window]
+    return max(window["peak"], status_mb("VmHWM"))
+
+
+def process_peak_rss_mb():
+    """
+    Peak resident set size of this process so far, in MB (None where unavailable).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class StageProfiler:
+    """
+    Collects one record per stage of a script. Use either
+
+        with profiler.stage("exact_merge", rows_in=len(imdb)) as record:
+            merged = exact_merge(imdb, tmdb)
+            record["rows_out"] = len(merged)
+
+    or, in notebook-style scripts, profiler.start(name, rows_in) / profiler.stop(rows_out).
+    Stages are sequential; starting a stage while another is open is an error.
+    """
+
+    def __init__(self, script, log_path=None, profile=PROFILE_SLOWEST):
+        self.script = script
+        self.log_path = log_path if log_path is not None else PROFILE_DIR / f"{script}.jsonl"
+        self.profile = profile
+        self.run_id = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        self.records = []
+        self._profiles = {}
+        self._open = None
+
+    def start(self, name, rows_in=None):
+        if self._open is not None:
+            raise RuntimeError(f"stage {self._open['record']['stage']!r} is still running")
+        profiler = None
+        if self.profile:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        self._open = {
+            "record": {"run_id": self.run_id, "script": self.script, "stage": name, "rows_in": rows_in, "rows_out": None},
+            "wall": time.perf_counter(),
+            "cpu": time.process_time(),
+            "peak_window": start_peak_window(),
+            "profiler": profiler,
+        }
+        return self._open["record"]
+
+    def stop(self, rows_out=None):
+        opened, self._open = self._open, None
+        if opened is None:
+            raise RuntimeError("no stage is running")
+        if opened["profiler"] is not None:
+            opened["profiler"].disable()
+        record = opened["record"]
+        record["wall_s"] = round(time.perf_counter() - opened["wall"], 6)
+        record["cpu_s"] = round(time.process_time() - opened["cpu"], 6)
+        window = opened["peak_window"]
+        if window is not None:
+            peak = end_peak_window(window)
+            record["peak_rss_mb"] = round(peak, 1)
+            record["rss_growth_mb"] = round(peak - window["start"], 1)
+        else:
+            peak = process_peak_rss_mb()
+            record["process_peak_rss_mb"] = None if peak is None else round(peak, 1)
+        if rows_out is not None:
+            record["rows_out"] = rows_out
+        self.records.append(record)
+        if opened["profiler"] is not None:
+            self._profiles[len(self.records) - 1] = opened["profiler"]
+        return record
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        record = self.start(name, rows_in)
+        try:
+            yield record
+        finally:
+            self.stop()
+
+    def summary(self):
+        """
+        The records without the run/script columns, for merge_log.json.
+        """
+        return [{k: v for k, v in r.items() if k not in ("run_id", "script")} for r in self.records]
+
+    def write(self):
+        """
+        Append this run's records to the JSON-lines log and, when profiling,
+        dump the slowest stage's cProfile stats. Returns the log path.
+        """
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.log_path, "a") as f:
+            for record in self.records:
+                f.write(json.dumps(record) + "\n")
+        if self._profiles:
+            self._dump_slowest()
+        return self.log_path
+
+    def _dump_slowest(self):
+        slowest = max(self._profiles, key=lambda i: self.records[i]["wall_s"])
+        name = self.records[slowest]["stage"]
+        prof_path = self.log_path.with_name(f"{self.script}_{name}.prof")
+        self._profiles[slowest].dump_stats(prof_path)
+
+        text = io.StringIO()
+        pstats.Stats(self._profiles[slowest], stream=text).sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+        print(f"Slowest stage: {name} ({self.records[slowest]['wall_s']:.2f} s), profile saved to {prof_path}")
+        print(text.getvalue())
@@ -0,0 +1,924 @@
+"""
+Replay an OpenRefine operation history (the JSON from "Extract operation
+history") on a DataFrame without OpenRefine, so the semi-clean tables can be
+rebuilt from the raw files in batch.
+
+Supported operations:
+- core/column-removal and core/column-rename
+- core/mass-edit with the "value" expression
+- core/text-transform with a GREL expression built from value, string, regex and
+  number literals, toNumber, toString, replace, trim, strip, toLowercase,
+  toUppercase, split, parseJson, forEach, sort, join, length, [index],
+  .field and + - * / %
+
+Operations can be filtered by range facets. Anything else raises
+UnsupportedOperation before any row is touched.
+
+Cells are typed the way OpenRefine types them (blank, string, Long or Double)
+because the results depend on it:
+- toNumber gives a Long or a Double, and Long / Long truncates.
+- replace() turns a number back into text ("9.0" for a Double).
+- A Double that is a whole number is exported without ".0".
+- An expression that fails keeps the original cell (onError keep-original).
+
+compile_history fuses the history before anything runs:
+- All removals become one drop.
+- All renames become one rename at the end. Operations address columns by
+  their name at the start of the history.
+- Consecutive cell operations on the same column become one column program.
+- Inside a program, consecutive mass edits become one mapping, and chained
+  single-character replace()s become one str.translate.
+
+A column program evaluates each step vectorized, but only on the distinct
+combinations of the column's value and the facets' row selections. The result
+is spread back to the rows with one take, so a long run of edits costs one
+factorize and one take.
+"""
+
+import json
+import re
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BLANK, STRING, LONG, DOUBLE = 0, 1, 2, 3
+
+# Characters Java's String.strip() removes (Character.isWhitespace: no non-breaking spaces)
+_JAVA_WHITESPACE = (
+    "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006"
+    "\u2008\u2009\u200a\u2028\u2029\u205f\u3000"
+)
+# What Double.parseDouble ignores around a number
+_JAVA_TRIM = "".join(map(chr, range(33)))
+# \p{Zs} is not understood by Python's re
+_ZS = "\\u0020\\u00a0\\u1680\\u2000-\\u200a\\u202f\\u205f\\u3000"
+
+# What Long.parseLong and Double.parseDouble accept (hex floats are not supported)
+_LONG_RE = re.compile(r"[+-]?[0-9]+")
+_DOUBLE_RE = re.compile(r"[+-]?(?:NaN|Infinity|(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?)[fFdD]?")
+_LONG_MIN, _LONG_MAX = -(2 ** 63), 2 ** 63 - 1
+
+
+class UnsupportedOperation(ValueError):
+    pass
+
+
+class _Error:
+    # An evaluation error (OpenRefine's EvalError)
+    def __repr__(self):
+        return "<error>"
+
+
+ERROR = _Error()
+
+
+class _Regex:
+    def __init__(self, source):
+        self.source = source
+        self.pattern = re.compile(source.replace("\\p{Zs}", _ZS), re.ASCII)
+
+
+# --- Java formatting and parsing ------------------------------------------------------------
+
+def java_double_str(x):
+    """
+    Double.toString: plain decimals from 1e-3 up to 1e7, "1.0E7"-style outside.
+    """
+    if x != x:
+        return "NaN"
+    if abs(x) == float("inf"):
+        return "Infinity" if x > 0 else "-Infinity"
+    if x == 0 or 1e-3 <= abs(x) < 1e7:
+        return repr(x)
+    # repr gives the shortest digits that round-trip, like Java
+    sign, digits, exponent = Decimal(repr(x)).as_tuple()
+    digits = "".join(map(str, digits))
+    exponent += len(digits) - 1
+    digits = digits.rstrip("0") or "0"
+    return f"{'-' if sign else ''}{digits[0]}.{digits[1:] or '0'}E{exponent}"
+
+
+def java_str(value):
+    """
+    String form of a cell value, as OpenRefine's toString and mass edits see it.
+    """
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return java_double_str(value)
+    return value
+
+
+def _parse_number(text):
+    # Long.parseLong, then Double.parseDouble (which ignores surrounding control characters and spaces)
+    if _LONG_RE.fullmatch(text):
+        value = int(text)
+        if _LONG_MIN <= value <= _LONG_MAX:
+            return value
+    stripped = text.strip(_JAVA_TRIM)
+    if _DOUBLE_RE.fullmatch(stripped):
+        return float(stripped.rstrip("fFdD").replace("Infinity", "inf"))
+    return ERROR
+
+
+# --- Typed cells --------------------------------------------------------------------------
+
+class Cells:
+    """
+    A column of typed cells: kind (BLANK, STRING, LONG or DOUBLE) per cell and
+    the value in text, long or double.
+    """
+
+    def __init__(self, kind, text, long, double):
+        self.kind = kind
+        self.text = text
+        self.long = long
+        self.double = double
+
+    def __len__(self):
+        return len(self.kind)
+
+    @classmethod
+    def empty(cls, n):
+        return cls(np.zeros(n, dtype=np.int8), np.full(n, None, dtype=object),
+                   np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.float64))
+
+    @classmethod
+    def from_strings(cls, values):
+        """
+        Cells of an imported text column; empty strings and missing values are blank.
+        """
+        text = pd.Series(values, dtype=object).to_numpy(dtype=object, copy=True)
+        blank = pd.isna(text) | (text == "")
+        cells = cls.empty(len(text))
+        cells.kind[~blank] = STRING
+        cells.text[~blank] = text[~blank]
+        return cells
+
+    @classmethod
+    def from_values(cls, values):
+        """
+        Cells from Python scalars (None, str, int, float); anything else is an
+        error, returned as the second value (a boolean mask).
+        """
+        cells = cls.empty(len(values))
+        error = np.zeros(len(values), dtype=bool)
+        for i, value in enumerate(values):
+            if value is None or value == "":
+                continue
+            if isinstance(value, bool):
+                cells.kind[i], cells.text[i] = STRING, java_str(value)
+            elif isinstance(value, str):
+                cells.kind[i], cells.text[i] = STRING, value
+            elif isinstance(value, int) and _LONG_MIN <= value <= _LONG_MAX:
+                cells.kind[i], cells.long[i] = LONG, value
+            elif isinstance(value, (int, float)):
+                cells.kind[i], cells.double[i] = DOUBLE, float(value)
+            else:
+                error[i] = True
+        return cells, error
+
+    def values(self):
+        """
+        The cells as Python scalars (None for blank).
+        """
+        out = np.full(len(self), None, dtype=object)
+        for kind, source in ((STRING, self.text), (LONG, self.long), (DOUBLE, self.double)):
+            mask = self.kind == kind
+            out[mask] = source[mask].tolist() if kind != STRING else source[mask]
+        return out
+
+    def strings(self, doubles=java_double_str):
+        """
+        Object array of each cell's string form (None for blank).
+        """
+        out = np.full(len(self), None, dtype=object)
+        mask = self.kind == STRING
+        out[mask] = self.text[mask]
+        mask = self.kind == LONG
+        out[mask] = self.long[mask].astype(str)
+        mask = self.kind == DOUBLE
+        out[mask] = [doubles(x) for x in self.double[mask].tolist()]
+        return out
+
+    def export(self):
+        """
+        The column as OpenRefine's CSV export writes it: blank is "", and whole Doubles lose their ".0".
+        """
+        def double_str(x):
+            return str(int(x)) if x.is_integer() and abs(x) < 2 ** 63 else java_double_str(x)
+
+        out = self.strings(double_str)
+        out[self.kind == BLANK] = ""
+        return out
+
+    def take(self, index):
+        return Cells(self.kind[index], self.text[index], self.long[index], self.double[index])
+
+    def put(self, index, other):
+        """
+        Copy with the cells at index replaced by other (aligned with index).
+        """
+        out = Cells(self.kind.copy(), self.text.copy(), self.long.copy(), self.double.copy())
+        out.kind[index], out.text[index] = other.kind, other.text
+        out.long[index], out.double[index] = other.long, other.double
+        return out
+
+    def where(self, mask, other):
+        """
+        other where mask is True, these cells elsewhere.
+        """
+        return Cells(np.where(mask, other.kind, self.kind), np.where(mask, other.text, self.text),
+                     np.where(mask, other.long, self.long), np.where(mask, other.double, self.double))
+
+
+# --- GREL parsing -------------------------------------------------------------------------
+
+_TOKEN = re.compile(r"""\s*(?:
+    (?P<num>[0-9]+(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?)
+  | (?P<str>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<regex>/(?:[^/\\]|\\.)*/)
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<punct>[().,\[\]+\-*/%])
+)""", re.VERBOSE)
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+FUNCTIONS = {"toNumber", "toString", "replace", "trim", "strip", "toLowercase", "toUppercase",
+             "split", "parseJson", "sort", "join", "length"}
+
+
+def _unescape(literal):
+    def sub(match):
+        escape = match.group(1)
+        if escape.startswith("u"):
+            return chr(int(escape[1:], 16))
+        return _ESCAPES.get(escape, escape)
+
+    return re.sub(r"\\(u[0-9a-fA-F]{4}|.)", sub, literal[1:-1])
+
+
+def _tokenize(expression):
+    tokens, pos = [], 0
+    while pos < len(expression):
+        if not expression[pos:].strip():
+            break
+        match = _TOKEN.match(expression, pos)
+        # A / after an operand is division, not the start of a regex
+        operand = tokens and (tokens[-1][0] in ("num", "str", "regex", "name") or tokens[-1][1] in (")", "]"))
+        if match and match.lastgroup == "regex" and operand:
+            match = re.compile(r"\s*(?P<punct>/)").match(expression, pos)
+        if not match:
+            raise UnsupportedOperation(f"cannot parse GREL expression {expression!r} at {expression[pos:]!r}")
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    # Recursive descent over the tokens; nodes are tuples (see parse_grel)
+
+    def __init__(self, expression):
+        self.expression = expression
+        self.tokens = _tokenize(expression)
+        self.pos = 0
+        self.scope = {"value"}
+
+    def fail(self, message):
+        raise UnsupportedOperation(f"{message} in GREL expression {self.expression!r}")
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, text=None):
+        kind, token = self.peek()
+        if kind is None or (text is not None and token != text):
+            self.fail(f"expected {text or 'more'}")
+        self.pos += 1
+        return kind, token
+
+    def parse(self):
+        node = self.additive()
+        if self.pos != len(self.tokens):
+            self.fail(f"unexpected {self.peek()[1]!r}")
+        return node
+
+    def additive(self):
+        node = self.multiplicative()
+        while self.peek()[1] in ("+", "-"):
+            node = ("op", self.take()[1], node, self.multiplicative())
+        return node
+
+    def multiplicative(self):
+        node = self.unary()
+        while self.peek()[1] in ("*", "/", "%"):
+            node = ("op", self.take()[1], node, self.unary())
+        return node
+
+    def unary(self):
+        if self.peek()[1] == "-":
+            self.take()
+            return ("op", "-", ("num", 0), self.unary())
+        return self.postfix(self.primary())
+
+    def args(self):
+        self.take("(")
+        args = []
+        while self.peek()[1] != ")":
+            args.append(self.additive())
+            if self.peek()[1] != ")":
+                self.take(",")
+        self.take(")")
+        return args
+
+    def call(self, name, args):
+        if name not in FUNCTIONS:
+            self.fail(f"unsupported function {name}()")
+        return ("call", name, args)
+
+    def postfix(self, node):
+        while self.peek()[1] in (".", "["):
+            if self.take()[1] == "[":
+                node = ("index", node, self.additive())
+                self.take("]")
+                continue
+            kind, name = self.take()
+            if kind != "name":
+                self.fail("expected a name after '.'")
+            node = self.call(name, [node] + self.args()) if self.peek()[1] == "(" else ("field", node, name)
+        return node
+
+    def primary(self):
+        kind, token = self.take()
+        if kind == "num":
+            return ("num", float(token) if any(c in token for c in ".eE") else int(token))
+        if kind == "str":
+            return ("str", _unescape(token))
+        if kind == "regex":
+            return ("regex", _Regex(token[1:-1]))
+        if token == "(":
+            node = self.additive()
+            self.take(")")
+            return node
+        if kind != "name":
+            self.fail(f"unexpected {token!r}")
+        if token == "forEach" and self.peek()[1] == "(":
+            self.take("(")
+            array = self.additive()
+            self.take(",")
+            var_kind, var = self.take()
+            if var_kind != "name":
+                self.fail("forEach needs a variable name")
+            self.take(",")
+            self.scope.add(var)
+            body = self.additive()
+            self.scope.discard(var)
+            self.take(")")
+            return ("foreach", array, var, body)
+        if self.peek()[1] == "(":
+            return self.call(token, self.args())
+        if token not in self.scope:
+            self.fail(f"unsupported variable {token}")
+        return ("value",) if token == "value" else ("var", token)
+
+
+def parse_grel(expression):
+    """
+    Syntax tree of a GREL expression ("grel:" prefix optional). Nodes are tuples:
+    ("value",), ("var", name), ("str", s), ("num", n), ("regex", r), ("call",
+    name, args), ("index", node, i), ("field", node, name), ("op", symbol, a, b),
+    ("foreach", array, name, body), and ("translate", node, table) from fusion.
+    """
+    if ":" in expression.split("(")[0] and not expression.startswith("grel:"):
+        raise UnsupportedOperation(f"only GREL expressions are supported, got {expression!r}")
+    return _Parser(expression[5:] if expression.startswith("grel:") else expression).parse()
+
+
+def _fuse_replaces(node):
+    # replace(replace(x, "(", ""), ")", "") -> one translate of x, when every find is one literal character
+    tag = node[0]
+    if tag == "call":
+        node = ("call", node[1], [_fuse_replaces(arg) for arg in node[2]])
+    elif tag in ("index", "field", "op", "foreach"):
+        node = tuple(_fuse_replaces(part) if isinstance(part, tuple) else part for part in node)
+    if tag != "call" or node[1] != "replace" or len(node[2]) != 3:
+        return node
+    base, find, repl = node[2]
+    if not (find[0] == repl[0] == "str" and len(find[1]) == 1 and len(repl[1]) <= 1):
+        return node
+    table = {}
+    if base[0] == "translate":
+        base, table = base[1], base[2]
+    # Later replacements apply to the output of earlier ones
+    table = {k: (repl[1] if v == find[1] else v) for k, v in table.items()}
+    table.setdefault(find[1], repl[1])
+    return ("translate", base, table)
+
+
+# --- Scalar evaluation (per distinct value) ---------------------------------------------------
+
+def _java_replacement(repl):
+    # Matcher.replaceAll syntax ($1, \$) to Python's (\g<1>)
+    out, i = [], 0
+    while i < len(repl):
+        c = repl[i]
+        if c == "\\" and i + 1 < len(repl):
+            out.append(repl[i + 1].replace("\\", "\\\\"))
+            i += 2
+        elif c == "$":
+            digits = re.match(r"[0-9]+", repl[i + 1:])
+            if not digits:
+                raise UnsupportedOperation(f"unsupported replacement {repl!r}")
+            out.append(f"\\g<{digits.group()}>")
+            i += 1 + len(digits.group())
+        else:
+            out.append("\\\\" if c == "\\" else c)
+            i += 1
+    return "".join(out)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _arith(symbol, a, b):
+    # Long op Long stays a Long (truncating division, Java remainder); anything with a Double is a Double
+    if _is_number(a) and _is_number(b):
+        if isinstance(a, int) and isinstance(b, int):
+            if symbol in ("/", "%") and b == 0:
+                return ERROR
+            if symbol == "/":
+                return abs(a) // abs(b) * (1 if (a < 0) == (b < 0) else -1)
+            if symbol == "%":
+                return abs(a) % abs(b) * (1 if a >= 0 else -1)
+        a, b = float(a), float(b)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if symbol == "/":
+                return float(np.float64(a) / np.float64(b))
+            if symbol == "%":
+                return float(np.fmod(a, b))
+        return {"+": a + b, "-": a - b, "*": a * b}[symbol]
+    if symbol == "+" and a is not None and b is not None:
+        return java_str(a) + java_str(b)
+    return None
+
+
+def _call(name, args):
+    head = args[0]
+    if name == "toNumber":
+        if _is_number(head):
+            return head
+        return _parse_number(head) if isinstance(head, str) and head else ERROR
+    if name == "length":
+        return len(head.encode("utf-16-le")) // 2 if isinstance(head, str) else len(head) if isinstance(head, list) else ERROR
+    if name in ("trim", "strip"):
+        return head.strip(_JAVA_WHITESPACE) if isinstance(head, str) else ERROR
+    if name == "parseJson":
+        try:
+            return json.loads(head) if isinstance(head, str) else ERROR
+        except ValueError:
+            return ERROR
+    if name == "sort":
+        if not isinstance(head, list):
+            return ERROR
+        try:
+            return sorted(head, key=lambda v: v.encode("utf-16-be") if isinstance(v, str) else v)
+        except TypeError:
+            return ERROR
+    if name == "join":
+        if not isinstance(head, list) or not isinstance(args[1], str):
+            return ERROR
+        return args[1].join(java_str(v) for v in head if v is not None)
+    # The rest work on the string form of strings and numbers
+    if head is None or isinstance(head, (list, dict)):
+        return ERROR
+    text = java_str(head)
+    if name == "toString":
+        return text
+    if name == "toLowercase":
+        return text.lower()
+    if name == "toUppercase":
+        return text.upper()
+    if name == "replace":
+        find, repl = args[1], args[2]
+        if not isinstance(repl, str):
+            return ERROR
+        if isinstance(find, _Regex):
+            return find.pattern.sub(_java_replacement(repl), text)
+        return text.replace(find, repl) if isinstance(find, str) else ERROR
+    if name == "split":
+        sep = args[1]
+        if isinstance(sep, _Regex):
+            parts = sep.pattern.split(text)
+            while parts and parts[-1] == "":
+                parts.pop()
+            return parts
+        return [part for part in text.split(sep) if part] if isinstance(sep, str) and sep else ERROR
+    raise UnsupportedOperation(f"unsupported function {name}()")
+
+
+def evaluate(node, value, env=None):
+    """
+    Value of a parsed GREL expression for one cell value (ERROR on failure).
+    """
+    tag = node[0]
+    if tag == "value":
+        return value
+    if tag == "var":
+        return env[node[1]]
+    if tag in ("str", "num", "regex"):
+        return node[1]
+    if tag == "foreach":
+        array = evaluate(node[1], value, env)
+        if not isinstance(array, list):
+            return ERROR
+        return [evaluate(node[3], value, {**(env or {}), node[2]: item}) for item in array]
+    if tag == "translate":
+        base = evaluate(node[1], value, env)
+        if base is ERROR or base is None or isinstance(base, (list, dict)):
+            return ERROR
+        return java_str(base).translate(str.maketrans({k: v or None for k, v in node[2].items()}))
+    children = {"call": node[2], "op": node[2:], "field": node[1:2], "index": node[1:]}[tag]
+    args = [evaluate(arg, value, env) for arg in children]
+    if any(arg is ERROR for arg in args):
+        return ERROR
+    if tag == "call":
+        return _call(node[1], args)
+    if tag == "op":
+        return _arith(node[1], *args)
+    if tag == "field":
+        return args[0].get(node[2]) if isinstance(args[0], dict) else ERROR
+    if tag == "index":
+        target, index = args
+        if isinstance(target, dict):
+            return target.get(index) if isinstance(index, str) else ERROR
+        if not isinstance(target, (list, str)) or not isinstance(index, int):
+            return ERROR
+        index = index + len(target) if index < 0 else index
+        return target[index] if 0 <= index < len(target) else None
+    raise UnsupportedOperation(f"cannot evaluate {tag}")
+
+
+# --- Vectorized evaluation -------------------------------------------------------------------
+
+def _scalar_over(node, cells):
+    results = [evaluate(node, value) for value in cells.values()]
+    error = np.fromiter((r is ERROR for r in results), dtype=bool, count=len(results))
+    out, bad = Cells.from_values([None if r is ERROR else r for r in results])
+    return out, error | bad
+
+
+def _text_cells(values, n):
+    cells = Cells.empty(n)
+    values = np.asarray(values, dtype=object)
+    nonblank = values != ""
+    cells.kind[nonblank] = STRING
+    cells.text[nonblank] = values[nonblank]
+    return cells
+
+
+def _string_kernel(node, cells, error):
+    # Kernels that stringify their input (blank and errors stay errors)
+    ok = ~error & (cells.kind != BLANK)
+    if node[0] == "call" and node[1] in ("trim", "strip"):
+        ok &= cells.kind == STRING
+    text = pd.Series(cells.strings()[ok], dtype=object)
+    if node[0] == "translate":
+        text = text.str.translate(str.maketrans({k: v or None for k, v in node[2].items()}))
+    elif node[1] == "replace":
+        find, repl = node[2][1][1], node[2][2][1]
+        if isinstance(find, _Regex):
+            text = text.str.replace(find.pattern, _java_replacement(repl), regex=True)
+        else:
+            text = text.str.replace(find, repl, regex=False)
+    elif node[1] in ("trim", "strip"):
+        text = text.str.strip(_JAVA_WHITESPACE)
+    elif node[1] == "toLowercase":
+        text = text.str.lower()
+    elif node[1] == "toUppercase":
+        text = text.str.upper()
+    out = Cells.empty(len(cells))
+    out = out.put(np.flatnonzero(ok), _text_cells(text.to_numpy(dtype=object), int(ok.sum())))
+    return out, ~ok
+
+
+def _to_number_kernel(cells, error):
+    out = cells.take(np.arange(len(cells)))
+    bad = error | (cells.kind == BLANK)
+    strings = np.flatnonzero(~error & (cells.kind == STRING))
+    text = pd.Series(cells.text[strings], dtype=object)
+    # Up to 18 digits always fits a Long; longer digit strings go through the scalar parser
+    is_long = text.str.fullmatch(r"[+-]?[0-9]{1,18}").to_numpy(dtype=bool)
+    stripped = text.str.strip(_JAVA_TRIM)
+    is_double = ~is_long & stripped.str.fullmatch(_DOUBLE_RE.pattern).to_numpy(dtype=bool)
+    is_double &= ~text.str.fullmatch(_LONG_RE.pattern).to_numpy(dtype=bool)
+    rows = strings[is_long]
+    out.kind[rows], out.text[rows] = LONG, None
+    out.long[rows] = text[is_long].astype(np.int64).to_numpy()
+    rows = strings[is_double]
+    out.kind[rows], out.text[rows] = DOUBLE, None
+    out.double[rows] = stripped[is_double].str.rstrip("fFdD").str.replace("Infinity", "inf").astype(np.float64)
+    rest = strings[~is_long & ~is_double]
+    parsed, failed = Cells.from_values([_parse_number(t) for t in cells.text[rest]])
+    bad[rest] = failed
+    return out.put(rest[~failed], parsed.take(~failed)), bad
+
+
+def _op_kernel(symbol, left, right):
+    (a, a_err), (b, b_err) = left, right
+    numeric = np.isin(a.kind, (LONG, DOUBLE)) & np.isin(b.kind, (LONG, DOUBLE))
+    out = Cells.empty(len(a))
+    error = a_err | b_err
+    both_long = numeric & (a.kind == LONG) & (b.kind == LONG)
+    if symbol in ("/", "%"):
+        error |= both_long & (b.long == 0)
+        both_long &= b.long != 0
+    x, y = a.long[both_long], b.long[both_long]
+    if symbol == "/":
+        result = np.abs(x) // np.abs(y) * np.where((x < 0) == (y < 0), 1, -1)
+    elif symbol == "%":
+        result = np.abs(x) % np.abs(y) * np.where(x >= 0, 1, -1)
+    else:
+        result = {"+": np.add, "-": np.subtract, "*": np.multiply}[symbol](x, y)
+    out.kind[both_long], out.long[both_long] = LONG, result
+    mixed = numeric & ~both_long & ~error
+    x = np.where(a.kind == LONG, a.long, a.double)[mixed].astype(np.float64)
+    y = np.where(b.kind == LONG, b.long, b.double)[mixed].astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = {"+": np.add, "-": np.subtract, "*": np.multiply, "/": np.divide, "%": np.fmod}[symbol](x, y)
+    out.kind[mixed], out.double[mixed] = DOUBLE, result
+    return out, error
+
+
+def evaluate_cells(node, cells):
+    """
+    The expression over a column: (result Cells, boolean error mask). Common
+    string and number functions run vectorized, everything else per cell.
+    """
+    tag = node[0]
+    if tag == "value":
+        return cells, np.zeros(len(cells), dtype=bool)
+    if tag in ("str", "num"):
+        return Cells.from_values([node[1]] * len(cells))
+    if tag == "translate" or (tag == "call" and node[1] in ("trim", "strip", "toLowercase", "toUppercase")
+                              and len(node[2]) == 1):
+        return _string_kernel(node, *evaluate_cells(node[1] if tag == "translate" else node[2][0], cells))
+    if (tag == "call" and node[1] == "replace" and len(node[2]) == 3 and node[2][1][0] in ("str", "regex")
+            and node[2][2][0] == "str"):
+        return _string_kernel(node, *evaluate_cells(node[2][0], cells))
+    if tag == "call" and node[1] == "toNumber" and len(node[2]) == 1:
+        return _to_number_kernel(*evaluate_cells(node[2][0], cells))
+    if tag == "op":
+        left, right = evaluate_cells(node[2], cells), evaluate_cells(node[3], cells)
+        # "+" with text concatenates, per cell; everything else on text gives blank
+        text = (left[0].kind == STRING) | (right[0].kind == STRING)
+        if node[1] != "+" or not (text & (left[0].kind != BLANK) & (right[0].kind != BLANK)).any():
+            return _op_kernel(node[1], left, right)
+    return _scalar_over(node, cells)
+
+
+# --- Facets ---------------------------------------------------------------------------------
+
+def _facet_mask(facet, cells):
+    # Row-based range facet on the column's own values: from <= v < to for numbers, plus the
+    # blank / error / non-numeric rows it selects
+    number = np.where(cells.kind == LONG, cells.long, cells.double).astype(np.float64)
+    is_number = np.isin(cells.kind, (LONG, DOUBLE))
+    finite = is_number & np.isfinite(number)
+    in_range = finite & (number >= facet["from"]) & (number < facet["to"])
+    mask = np.where(finite, in_range & facet.get("selectNumeric", True), False)
+    mask |= (is_number & ~finite) & facet.get("selectError", True)
+    mask |= (cells.kind == BLANK) & facet.get("selectBlank", True)
+    mask |= (cells.kind == STRING) & facet.get("selectNonNumeric", True)
+    return mask
+
+
+def _facets(op, column_names):
+    config = op.get("engineConfig") or {}
+    if config.get("mode", "row-based") != "row-based":
+        raise UnsupportedOperation(f"{op['op']}: only row-based facets are supported")
+    facets = []
+    for facet in config.get("facets", []):
+        if facet.get("type") != "range" or facet.get("expression", "value") != "value":
+            raise UnsupportedOperation(f"{op['op']}: unsupported facet {facet.get('type')!r} "
+                                       f"on {facet.get('columnName')!r}")
+        if facet.get("columnName") not in column_names:
+            raise UnsupportedOperation(f"{op['op']}: facet on unknown column {facet.get('columnName')!r}")
+        facets.append({**facet, "columnName": column_names[facet["columnName"]]})
+    return tuple(sorted(facets, key=json.dumps))
+
+
+# --- Compiling and replaying -------------------------------------------------------------------
+
+class Transform:
+    """
+    One text transform: a parsed expression, its facets and onError handling.
+    """
+
+    def __init__(self, node, facets, on_error):
+        if on_error not in ("keep-original", "set-to-blank"):
+            raise UnsupportedOperation(f"core/text-transform: unsupported onError {on_error!r}")
+        self.node, self.facets, self.on_error = node, facets, on_error
+
+
+class MassEdit:
+    """
+    One or more composed mass edits: string form -> new string, plus the
+    replacement for blank cells (None: blanks are left alone).
+    """
+
+    def __init__(self, mapping, blank_to, facets):
+        self.mapping, self.blank_to, self.facets = mapping, blank_to, facets
+
+    def then(self, other):
+        """
+        This edit followed by other, as one MassEdit.
+        """
+        def after(new):
+            # An edit to "" leaves a blank cell, which other's blank edit applies to
+            if new == "":
+                return other.blank_to if other.blank_to is not None else ""
+            return other.mapping.get(new, new)
+
+        mapping = {k: after(v) for k, v in self.mapping.items()}
+        for k, v in other.mapping.items():
+            mapping.setdefault(k, v)
+        blank_to = other.blank_to if self.blank_to is None else after(self.blank_to)
+        return MassEdit(mapping, blank_to, self.facets)
+
+
+class ColumnProgram:
+    """
+    Consecutive cell operations (Transform / MassEdit) on one column.
+    """
+
+    def __init__(self, column):
+        self.column = column
+        self.steps = []
+
+    def add(self, step):
+        last = self.steps[-1] if self.steps else None
+        own_facet = any(f["columnName"] == self.column for f in step.facets)
+        if isinstance(step, MassEdit) and isinstance(last, MassEdit) and last.facets == step.facets and not own_facet:
+            self.steps[-1] = last.then(step)
+        else:
+            self.steps.append(step)
+
+
+def load_history(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _mass_edit(op, facets):
+    if op.get("expression", "value") not in ("value", "grel:value"):
+        raise UnsupportedOperation(f"core/mass-edit: unsupported expression {op['expression']!r}")
+    mapping, blank_to = {}, None
+    for edit in op["edits"]:
+        for source in edit.get("from", []):
+            mapping.setdefault(source, edit["to"])
+        if edit.get("fromBlank") and blank_to is None:
+            blank_to = edit["to"]
+    return MassEdit(mapping, blank_to, facets)
+
+
+def compile_history(ops, columns, fuse=True):
+    """
+    Plan of the operations for a table with the given columns: a dict with drop
+    (columns removed before anything runs), programs (ColumnPrograms, in
+    order), drop_after (removed columns that are edited or read by a facet
+    first) and rename (starting name -> final name). With fuse=False every
+    cell operation is its own program and expressions are left as written.
+    """
+    current = {c: c for c in columns}          # name now -> starting name
+    removed, programs, read_by_facet = [], [], set()
+    for op in ops:
+        kind = op.get("op")
+        if kind == "core/column-removal":
+            removed.append(current.pop(op["columnName"]))
+        elif kind == "core/column-rename":
+            current[op["newColumnName"]] = current.pop(op["oldColumnName"])
+        elif kind in ("core/text-transform", "core/mass-edit"):
+            if op["columnName"] not in current:
+                raise UnsupportedOperation(f"{kind}: no column {op['columnName']!r}")
+            column, facets = current[op["columnName"]], _facets(op, current)
+            read_by_facet.update(f["columnName"] for f in facets)
+            if kind == "core/mass-edit":
+                step = _mass_edit(op, facets)
+            else:
+                node = parse_grel(op["expression"])
+                step = Transform(_fuse_replaces(node) if fuse else node, facets, op.get("onError", "keep-original"))
+                if op.get("repeat"):
+                    raise UnsupportedOperation("core/text-transform: repeat is not supported")
+            if not fuse or not programs or programs[-1].column != column:
+                programs.append(ColumnProgram(column))
+            programs[-1].add(step)
+        else:
+            raise UnsupportedOperation(f"unsupported operation {kind!r}")
+    return {
+        "drop": [c for c in removed if c not in read_by_facet and all(p.column != c for p in programs)],
+        "programs": programs,
+        "drop_after": [c for c in removed if c in read_by_facet or any(p.column == c for p in programs)],
+        "rename": {start: now for now, start in current.items() if start != now},
+    }
+
+
+def _encode(values):
+    # A text column as its distinct cells plus the code of each row
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    return Cells.from_strings(uniques), codes
+
+
+def _run_program(program, state):
+    distinct, codes = state[program.column]
+    # Rows each step's facets on other columns select (those columns don't change inside the program)
+    row_masks = []
+    for step in program.steps:
+        mask = None
+        for facet in step.facets:
+            if facet["columnName"] != program.column:
+                cells, other_codes = state[facet["columnName"]]
+                selected = _facet_mask(facet, cells)[other_codes]
+                mask = selected if mask is None else mask & selected
+        row_masks.append(mask)
+
+    # Distinct (value, selection) combinations, each evaluated once
+    groups, first, cells = codes, None, distinct
+    masks = {m.tobytes(): m for m in row_masks if m is not None}
+    if masks:
+        for mask in masks.values():
+            groups = pd.factorize(groups * 2 + mask)[0]
+        first = np.unique(groups, return_index=True)[1]
+        cells = distinct.take(codes[first])
+
+    for step, mask in zip(program.steps, row_masks):
+        selected = np.ones(len(cells), dtype=bool) if mask is None else mask[first]
+        for facet in step.facets:
+            if facet["columnName"] == program.column:
+                selected &= _facet_mask(facet, cells)
+        index = np.flatnonzero(selected)
+        if not len(index):
+            continue
+        before = cells.take(index)
+        if isinstance(step, MassEdit):
+            after = _apply_mass_edit(step, before)
+        else:
+            after, error = evaluate_cells(step.node, before)
+            fallback = before if step.on_error == "keep-original" else Cells.empty(len(index))
+            after = after.where(error, fallback)
+        cells = cells.put(index, after)
+    return cells, groups
+
+
+def _apply_mass_edit(step, cells):
+    strings = pd.Series(cells.strings(), dtype=object)
+    new = strings.map(step.mapping).to_numpy(dtype=object)
+    if step.blank_to is not None:
+        new[cells.kind == BLANK] = step.blank_to
+    edited = np.flatnonzero(pd.notna(new))
+    return cells.put(edited, _text_cells(new[edited], len(edited)))
+
+
+def replay(df, ops, fuse=True):
+    """
+    The DataFrame after the history ops (a list of operation dicts). df is read
+    as text (dtype=str, keep_default_na=False); the result has text columns in
+    the form OpenRefine exports them. fuse=False runs every operation on its
+    own (see compile_history), for comparison.
+    """
+    plan = compile_history(ops, df.columns, fuse)
+    df = df.drop(columns=plan["drop"])
+    # Each edited column is kept as (distinct cells, code per row) until the export
+    state = {}
+    for program in plan["programs"]:
+        for column in {program.column} | {f["columnName"] for s in program.steps for f in s.facets}:
+            if column not in state:
+                state[column] = _encode(df[column])
+        state[program.column] = _run_program(program, state)
+    out = df.drop(columns=plan["drop_after"]).copy()
+    for column, (cells, codes) in state.items():
+        if column in out.columns:
+            out[column] = pd.Series(pd.array(cells.export(), dtype="str").take(codes), index=out.index)
+    return out.rename(columns=plan["rename"])
+
+
+def read_raw(path):
+    """
+    A raw CSV as OpenRefine imports it: every cell text, empty cells blank.
+    """
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def replay_csv(raw_path, history_path, out_path=None):
+    """
+    Replay the history file on the raw CSV, optionally writing the result.
+    """
+    df = replay(read_raw(raw_path), load_history(history_path))
+    if out_path is not None:
+        Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(out_path, index=False)
+    return df
@@ -0,0 +1,53 @@
+"""
+Where every stage reads and writes its files, relative to the repository root.
+
+The scripts used to rely on the current working directory ('imdb_cleaned.csv',
+'integration_output/...'), so they only worked when started from the right
+folder. Using these paths, each script works from anywhere, and the pipeline
+runner can declare the same files as stage inputs and outputs.
+"""
+
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Raw downloads (see data_documentation/README.md)
+RAW_DIR = ROOT / "data_documentation"
+IMDB_RAW = RAW_DIR / "imdb_raw.csv"
+TMDB_RAW = RAW_DIR / "tmdb_5000_movies.csv"
+
+# The official IMDb non-commercial datasets (datasets.imdbws.com), read by pipeline/imdb_dumps.py.
+# Not in the repository: download the four files into this folder to use them.
+IMDB_DUMPS_DIR = RAW_DIR / "imdb_dumps"
+IMDB_TITLE_BASICS = IMDB_DUMPS_DIR / "title.basics.tsv.gz"
+IMDB_TITLE_RATINGS = IMDB_DUMPS_DIR / "title.ratings.tsv.gz"
+IMDB_TITLE_CREW = IMDB_DUMPS_DIR / "title.crew.tsv.gz"
+IMDB_NAME_BASICS = IMDB_DUMPS_DIR / "name.basics.tsv.gz"
+
+# OpenRefine operation histories and the semi-clean tables exported from them (see pipeline/openrefine.py)
+OPENREFINE_DIR = ROOT / "data_cleaning" / "OpenRefine_History"
+IMDB_OPENREFINE_HISTORY = OPENREFINE_DIR / "IMDB_OpenRefine_History.json"
+TMDB_OPENREFINE_HISTORY = OPENREFINE_DIR / "TMDB_OpenRefine_History.json"
+IMDB_SEMI_CLEAN = OPENREFINE_DIR / "IMDB_OpenRefine_Semi_Clean.csv"
+TMDB_SEMI_CLEAN = OPENREFINE_DIR / "TMDB_OpenRefine_Semi_Clean.csv"
+
+# Cleaned tables (stems: storage.write_table adds .parquet / .csv)
+CLEANED_DIR = ROOT / "data_cleaning" / "Cleaned_Data"
+IMDB_CLEANED = CLEANED_DIR / "imdb_cleaned"
+TMDB_CLEANED = CLEANED_DIR / "tmdb_cleaned"
+
+# Integration outputs
+INTEGRATION_OUTPUT_DIR = ROOT / "data_integration" / "integration_output"
+MERGED_MOVIES = INTEGRATION_OUTPUT_DIR / "merged_movies"
+MERGE_LOG = INTEGRATION_OUTPUT_DIR / "merge_log.json"
+
+# One stamp per run_all.py stage: the command that last wrote its outputs (see pipeline/runner.py)
+STAMP_DIR = ROOT / ".stage_stamps"
+
+# Per-stage timing/memory logs and cProfile dumps (see pipeline/instrumentation.py)
+PROFILE_DIR = ROOT / "profiles"
+
+# Figures rendered in batch mode by the Week 4 and Week 5 scripts (see pipeline/figures.py)
+WEEK4_FIGURES_DIR = ROOT / "data_analysis" / "Week_4_EDA_plots" / "figures"
+WEEK5_FIGURES_DIR = ROOT / "data_visualizations" / "figures"
+AGGREGATE_CUBE = INTEGRATION_OUTPUT_DIR / "aggregate_cube.npz"
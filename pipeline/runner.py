@@ -0,0 +1,240 @@
+"""
+A small make-style runner for the project's stages.
+
+Each Stage names the script it runs and the files it reads and writes. A
+stage depends on every other stage that writes one of its inputs, so the
+order comes from the file lists rather than from the order the stages are
+written in. Stages whose dependencies are done run at the same time (each in
+its own python process), a stage is skipped when all its outputs exist and
+are newer than its inputs, its own script and the pipeline/ modules the script
+imports, and the first failure stops the run: stages that are still going are
+terminated and nothing new is started.
+
+After a stage succeeds, a stamp file records its command and the modification
+time of every output it wrote. A stage whose stamp is missing, whose command
+changed, or whose outputs were rewritten since (for example by the stage that
+replaces it under run_all.py --imdb-dumps) is not up to date.
+"""
+
+import ast
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from pipeline.paths import STAMP_DIR
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+
+
+def pipeline_modules(script):
+    """
+    The pipeline/*.py files a script imports, directly or through other
+    pipeline modules (found with ast, so nothing is executed).
+    """
+    found, todo = set(), [Path(script)]
+    while todo:
+        try:
+            tree = ast.parse(todo.pop().read_text(encoding="utf-8"))
+        except (OSError, SyntaxError, UnicodeDecodeError):
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                # "from pipeline import storage" names a module too
+                names = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+            else:
+                continue
+            for name in names:
+                parts = name.split(".")
+                if parts[0] != PACKAGE_DIR.name:
+                    continue
+                for module in (PACKAGE_DIR / "__init__.py", PACKAGE_DIR.joinpath(*parts[1:]).with_suffix(".py")):
+                    if module.exists() and module not in found:
+                        found.add(module)
+                        todo.append(module)
+    return sorted(found)
+
+
+class Stage:
+    """
+    One step of the pipeline: a python script plus the files it reads and writes,
+    and any extra environment variables it runs with. The pipeline/ modules the
+    script imports are added to its inputs. A stage without outputs is never
+    considered up to date.
+    """
+
+    def __init__(self, name, script, inputs=(), outputs=(), env=None, stamp_dir=STAMP_DIR):
+        self.name = name
+        self.script = Path(script)
+        self.inputs = [Path(p) for p in inputs]
+        self.inputs += [p for p in pipeline_modules(self.script) if p not in self.inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.env = dict(env or {})
+        self.stamp_path = Path(stamp_dir) / f"{name}.json"
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+    def command(self):
+        return {"script": str(self.script), "env": self.env}
+
+    def _stamp(self):
+        return {
+            "stage": self.name,
+            "command": self.command(),
+            "outputs": {str(p): p.stat().st_mtime_ns for p in self.outputs},
+        }
+
+    def write_stamp(self):
+        """
+        Record that this stage (with its current command) wrote its outputs as they are now.
+        """
+        if all(p.exists() for p in self.outputs):
+            self.stamp_path.parent.mkdir(parents=True, exist_ok=True)
+            self.stamp_path.write_text(json.dumps(self._stamp(), indent=2) + "\n")
+
+    def is_up_to_date(self):
+        if not self.outputs or not all(p.exists() for p in self.outputs):
+            return False
+        try:
+            stamp = json.loads(self.stamp_path.read_text())
+        except (OSError, ValueError):
+            return False
+        # Written by another stage or command since this stage last ran
+        if stamp != self._stamp():
+            return False
+        sources = [p for p in self.inputs + [self.script] if p.exists()]
+        newest_input = max((p.stat().st_mtime for p in sources), default=0)
+        oldest_output = min(p.stat().st_mtime for p in self.outputs)
+        return oldest_output >= newest_input
+
+
+class StageFailed(RuntimeError):
+    pass
+
+
+def dependencies(stages):
+    """
+    Map each stage name to the names of the stages that produce its inputs.
+    """
+    producers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if output in producers:
+                raise ValueError(f"{output} is written by both {producers[output]} and {stage.name}")
+            producers[output] = stage.name
+    return {
+        stage.name: {producers[p] for p in stage.inputs if p in producers and producers[p] != stage.name}
+        for stage in stages
+    }
+
+
+def _check_acyclic(deps):
+    done, visiting = set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"dependency cycle through stage {name}")
+        visiting.add(name)
+        for dep in deps[name]:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in deps:
+        visit(name)
+
+
+def run_pipeline(stages, max_workers=None, force=False, verbose=False, env=None):
+    """
+    Run the stages in dependency order, independent ones in parallel.
+    Returns a dict of stage name -> "ran" / "skipped". Raises StageFailed on
+    the first stage that exits non-zero (its output is printed first).
+    force=True reruns every stage regardless of timestamps; verbose=True also
+    prints the output of stages that succeed.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    deps = dependencies(stages)
+    _check_acyclic(deps)
+
+    # Run the plotting scripts headless: under Agg plt.show() returns immediately
+    env = dict(os.environ if env is None else env)
+    env.setdefault("MPLBACKEND", "Agg")
+
+    status = {}
+    # A stage has to rerun when anything upstream of it reran
+    reran = set()
+    pending = dict(deps)
+    running = {}
+    processes = {}
+    stopping = threading.Event()
+
+    def launch(pool, name):
+        stage = by_name[name]
+        if not force and not (deps[name] & reran) and stage.is_up_to_date():
+            print(f"[skip] {name} (outputs are up to date)")
+            status[name] = "skipped"
+            return
+        print(f"[run]  {name}")
+        running[pool.submit(_run_stage, stage, env, processes, stopping)] = name
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1) as pool:
+        while pending or running:
+            # Start (or skip) everything whose dependencies have finished
+            progress = True
+            while progress:
+                progress = False
+                for name in [n for n, d in pending.items() if d <= status.keys()]:
+                    del pending[name]
+                    launch(pool, name)
+                    progress = True
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                returncode, seconds, output = future.result()
+                if returncode != 0:
+                    stopping.set()
+                    for other in processes.values():
+                        if other.poll() is None:
+                            other.terminate()
+                    print(output, end="", file=sys.stderr)
+                    raise StageFailed(f"stage {name} failed with exit code {returncode}")
+                if verbose:
+                    print(output, end="")
+                print(f"[done] {name} in {seconds:.1f} s")
+                by_name[name].write_stamp()
+                status[name] = "ran"
+                reran.add(name)
+    return status
+
+
+def _run_stage(stage, env, processes, stopping):
+    """
+    Run one stage's script from its own folder and capture its output, so the
+    logs of parallel stages don't interleave.
+    """
+    start = time.perf_counter()
+    if stopping.is_set():
+        return -1, 0.0, ""
+    process = subprocess.Popen(
+        [sys.executable, str(stage.script)],
+        cwd=stage.script.parent,
+        env={**env, **stage.env},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    processes[stage.name] = process
+    output, _ = process.communicate()
+    return process.returncode, time.perf_counter() - start, output
@@ -0,0 +1,63 @@
+"""
+Declared column types of the integration output (merged_movies).
+
+Read back with a plain pd.read_csv, the merged table has 64-bit integers and
+floats and one Python string per cell, although the text columns repeat a lot
+(a few hundred genre combinations and directors, three match statuses) and
+years, runtimes and scores fit in 16 bits. MERGED_SCHEMA fixes the compact
+layout once: repeated strings are categoricals (stored dictionary-encoded in
+Parquet), years, runtimes and scores are Int16, and the match provenance is
+an enum with a fixed set of categories. The integration script writes the
+table with it and every reader loads it through read_table(..., schema=MERGED_SCHEMA).
+"""
+
+import pandas as pd
+
+# Every value _merge_status can take, in a fixed order: exact match, same title within a few
+# years (as-of tier), fuzzy title match, no TMDB match
+MERGE_STATUSES = ["both", "asof", "fuzzy", "left_only"]
+
+MERGE_STATUS_DTYPE = pd.CategoricalDtype(MERGE_STATUSES)
+
+MERGED_SCHEMA = {
+    "title": "string",
+    "release_year": "Int16",
+    "director": "category",
+    "genre_imdb": "category",
+    "genre_tmdb": "category",
+    "rating_imdb": "Float64",
+    "vote_average_tmdb": "Float64",
+    "vote_count_tmdb": "Int32",
+    "budget_in_millions": "Float64",
+    "revenue_in_millions": "Float64",
+    "gross_in_millions": "Float64",
+    "popularity": "Float64",
+    "runtime_imdb": "Int16",
+    "runtime_tmdb": "Int16",
+    "metascore": "Int16",
+    "_merge_status": MERGE_STATUS_DTYPE,
+}
+
+
+def apply_schema(df, schema):
+    """
+    df with every column named in schema cast to its declared dtype (columns
+    the schema doesn't mention are left as they are). Raises ValueError if a
+    value doesn't fit, e.g. an unknown _merge_status.
+    """
+    casts = {c: t for c, t in schema.items() if c in df.columns and df[c].dtype != t}
+    for column, dtype in casts.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            unknown = ~df[column].isin(dtype.categories) & df[column].notna()
+            if unknown.any():
+                raise ValueError(f"{column} has values outside {list(dtype.categories)}: "
+                                 f"{sorted(df.loc[unknown, column].astype(str).unique())[:5]}")
+    return df.astype(casts) if casts else df
+
+
+def csv_dtypes(schema, columns=None):
+    """
+    The schema as a read_csv dtype argument, so the CSV is parsed straight into
+    the compact dtypes instead of being converted afterwards.
+    """
+    return {c: t for c, t in schema.items() if columns is None or c in columns}
@@ -0,0 +1,188 @@
+"""
+Persistent store of fuzzy title similarity scores, keyed by both normalized titles.
+
+Every change to the fuzzy cutoff used to mean scoring every candidate title
+pair again. SimilarityCache keeps the raw scorer output (0-100) of every
+(IMDb title_norm, TMDB title_norm) pair that reaches SIMILARITY_FLOOR, keyed
+by 64-bit hashes of the two titles, in one .npz file next to the integration
+outputs. Pairs below the floor are not stored (a full year block is quadratic
+in size); instead the cache remembers which "queries" are complete, i.e.
+which IMDb titles have been scored against which set of candidate titles, so
+a pair missing from a complete query is known to score below the floor.
+
+The scorer name and rapidfuzz version are stored with the scores, and a cache
+written with another scorer or floor is ignored. Any cutoff at or above the
+floor can then be applied, or swept (see pipeline/threshold_sweep.py), from
+the cached scores without calling the scorer again.
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Lowest score (0-1 scale) that is stored; thresholds below it cannot be evaluated from the cache
+SIMILARITY_FLOOR = 0.60
+
+
+def title_hashes(titles):
+    """
+    uint64 key per title (a Series or list of normalized titles).
+    """
+    return pd.util.hash_array(np.asarray(titles, dtype=object), categorize=False)
+
+
+def _mix(keys):
+    # splitmix64 finalizer, so XOR-ing mixed keys doesn't cancel related hashes
+    keys = np.asarray(keys, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        keys = (keys ^ (keys >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        keys = (keys ^ (keys >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return keys ^ (keys >> np.uint64(31))
+
+
+def set_digest(keys):
+    """
+    Order-independent uint64 digest of a set of title keys (duplicates ignored).
+    """
+    return np.bitwise_xor.reduce(_mix(np.unique(keys)), initial=np.uint64(0))
+
+
+def grouped_set_digests(groups, keys):
+    """
+    set_digest of the keys of each group: groups is an int array of group codes
+    in [0, n), one per key. Returns one digest per code 0..groups.max().
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    if len(groups) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    frame = pd.DataFrame({"group": groups, "key": np.asarray(keys, dtype=np.uint64)}).drop_duplicates()
+    frame = frame.sort_values("group", kind="stable")
+    mixed = _mix(frame["key"].to_numpy())
+    starts = np.flatnonzero(np.r_[True, np.diff(frame["group"].to_numpy()) != 0])
+    digests = np.zeros(int(groups.max()) + 1, dtype=np.uint64)
+    digests[frame["group"].to_numpy()[starts]] = np.bitwise_xor.reduceat(mixed, starts)
+    return digests
+
+
+def query_keys(left_keys, digests):
+    """
+    Key of "this IMDb title scored against this candidate set" for each row.
+    """
+    return _mix(np.asarray(left_keys, dtype=np.uint64) ^ _mix(digests))
+
+
+def scorer_name(scorer):
+    import rapidfuzz
+
+    return f"{scorer.__module__}.{scorer.__qualname__} rapidfuzz {rapidfuzz.__version__}"
+
+
+class SimilarityCache:
+    """
+    Scored title pairs (left key, right key, raw score) sorted by left key, plus
+    the sorted keys of the complete queries. hits/misses count query lookups in
+    this process.
+    """
+
+    def __init__(self, path, scorer, floor=SIMILARITY_FLOOR):
+        self.path = Path(path)
+        self.scorer = scorer_name(scorer) if callable(scorer) else str(scorer)
+        self.floor = float(floor)
+        self.left = np.zeros(0, dtype=np.uint64)
+        self.right = np.zeros(0, dtype=np.uint64)
+        self.raw = np.zeros(0, dtype=np.float64)
+        self.queries = np.zeros(0, dtype=np.uint64)
+        self.hits = 0
+        self.misses = 0
+        self._pending = []
+        self._pending_queries = []
+
+    @classmethod
+    def open(cls, path, scorer, floor=SIMILARITY_FLOOR):
+        """
+        The cache saved at path, or an empty one when there is none or it was
+        written with a different scorer or floor.
+        """
+        cache = cls(path, scorer, floor)
+        if cache.path.exists():
+            try:
+                with np.load(cache.path, allow_pickle=False) as data:
+                    if str(data["scorer"]) == cache.scorer and float(data["floor"]) == cache.floor:
+                        cache.left, cache.right = data["left"], data["right"]
+                        cache.raw, cache.queries = data["raw"], data["queries"]
+            except (OSError, ValueError, KeyError):
+                pass
+        return cache
+
+    @property
+    def cutoff(self):
+        """
+        The floor on the scorer's 0-100 scale (the score_cutoff to score with).
+        """
+        return self.floor * 100
+
+    def __len__(self):
+        return len(self.left) + sum(len(p[0]) for p in self._pending)
+
+    def complete(self, keys):
+        """
+        Boolean mask of the query keys that were already scored.
+        """
+        self._flush()
+        keys = np.asarray(keys, dtype=np.uint64)
+        found = np.zeros(len(keys), dtype=bool)
+        if len(self.queries):
+            pos = np.minimum(np.searchsorted(self.queries, keys), len(self.queries) - 1)
+            found = self.queries[pos] == keys
+        self.hits += int(found.sum())
+        self.misses += int((~found).sum())
+        return found
+
+    def add(self, left_keys, right_keys, raw, queries):
+        """
+        Record scored pairs (only those reaching the floor are kept) and mark
+        the queries they came from as complete.
+        """
+        raw = np.asarray(raw, dtype=np.float64)
+        keep = raw >= self.cutoff
+        self._pending.append((np.asarray(left_keys, dtype=np.uint64)[keep],
+                              np.asarray(right_keys, dtype=np.uint64)[keep], raw[keep]))
+        self._pending_queries.append(np.asarray(queries, dtype=np.uint64))
+
+    def _flush(self):
+        if not self._pending and not self._pending_queries:
+            return
+        left = np.concatenate([self.left] + [p[0] for p in self._pending])
+        right = np.concatenate([self.right] + [p[1] for p in self._pending])
+        raw = np.concatenate([self.raw] + [p[2] for p in self._pending])
+        order = np.lexsort((right, left))
+        left, right, raw = left[order], right[order], raw[order]
+        unique = np.r_[True, (left[1:] != left[:-1]) | (right[1:] != right[:-1])]
+        self.left, self.right, self.raw = left[unique], right[unique], raw[unique]
+        self.queries = np.unique(np.concatenate([self.queries] + self._pending_queries))
+        self._pending, self._pending_queries = [], []
+
+    def pairs_for(self, left_keys):
+        """
+        Every stored pair whose left title is one of left_keys, as a DataFrame
+        with columns left_key, right_key, raw.
+        """
+        self._flush()
+        wanted = np.unique(np.asarray(left_keys, dtype=np.uint64))
+        lo = np.searchsorted(self.left, wanted, side="left")
+        hi = np.searchsorted(self.left, wanted, side="right")
+        counts = hi - lo
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        rows = starts + np.arange(counts.sum())
+        return pd.DataFrame({"left_key": self.left[rows], "right_key": self.right[rows], "raw": self.raw[rows]})
+
+    def save(self):
+        self._flush()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, scorer=np.array(self.scorer), floor=np.array(self.floor),
+                     left=self.left, right=self.right, raw=self.raw, queries=self.queries)
+        os.replace(tmp, self.path)
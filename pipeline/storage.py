@@ -0,0 +1,136 @@
+"""
+Typed intermediate tables passed between pipeline stages.
+
+Each stage used to hand the next one a CSV, which meant every reader parsed the
+text again and re-inferred every dtype (convert_dtypes, to_numeric, ...). Tables
+are now written as Parquet with their final pandas dtypes, and readers load
+those directly. The CSV is still written next to it by default because the
+cleaned and merged CSVs are deliverables of the project; set csv=False to skip it.
+
+If pyarrow is not installed, everything falls back to CSV only.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline.schema import apply_schema, csv_dtypes
+
+# First I will try to import pyarrow, if not, tables are only written/read as CSV
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except Exception:
+    PARQUET_AVAILABLE = False
+
+# Whether stages also export a CSV copy of every table they write
+WRITE_CSV = True
+
+
+def table_paths(stem):
+    """
+    Parquet and CSV paths for a table stem such as integration_output/merged_movies.
+    """
+    stem = Path(stem)
+    if stem.suffix in (".csv", ".parquet"):
+        stem = stem.with_suffix("")
+    return stem.with_suffix(".parquet"), stem.with_suffix(".csv")
+
+
+def write_table(df, stem, csv=None, dtypes=None):
+    """
+    Write df as Parquet (typed) and, unless disabled, as CSV.
+    Dtypes are settled here once with convert_dtypes, so readers don't have to.
+    With dtypes (as for TableWriter) df is cast to those instead, so the table
+    has the same schema as one streamed with them.
+    """
+    parquet_path, csv_path = table_paths(stem)
+    parquet_path.parent.mkdir(parents=True, exist_ok=True)
+    if dtypes is not None:
+        df = df.astype(dtypes)
+    if PARQUET_AVAILABLE:
+        (df if dtypes is not None else df.convert_dtypes()).to_parquet(parquet_path, index=False)
+    if csv or (csv is None and WRITE_CSV) or not PARQUET_AVAILABLE:
+        df.to_csv(csv_path, index=False)
+    return parquet_path if PARQUET_AVAILABLE else csv_path
+
+
+def read_table(stem, columns=None, schema=None):
+    """
+    Load a table written by write_table. The Parquet file is preferred because
+    it already carries the dtypes; a CSV-only table is parsed and converted the
+    way load_and_preview used to do it. With a schema (see pipeline/schema.py)
+    the declared columns come back in their declared dtypes either way.
+    """
+    parquet_path, csv_path = table_paths(stem)
+    if PARQUET_AVAILABLE and parquet_path.exists():
+        df = pd.read_parquet(parquet_path, columns=columns)
+    elif schema is not None:
+        # pyarrow's CSV reader fills the masked/categorical dtypes several times faster than the C parser
+        engine = "pyarrow" if PARQUET_AVAILABLE else None
+        df = pd.read_csv(csv_path, usecols=columns, dtype=csv_dtypes(schema, columns), engine=engine).convert_dtypes()
+    else:
+        return pd.read_csv(csv_path, usecols=columns).convert_dtypes()
+    return apply_schema(df, schema) if schema is not None else df
+
+
+class TableWriter:
+    """
+    Append chunks to a table (Parquet + optional CSV) without holding the whole
+    table in memory. Every chunk is cast to the same dtypes so the Parquet
+    schema stays fixed: the dtypes passed in, or else those convert_dtypes
+    picks for the first chunk.
+
+        with TableWriter("tmdb_cleaned") as writer:
+            for chunk in chunks:
+                writer.append(clean(chunk))
+    """
+
+    def __init__(self, stem, dtypes=None, csv=None):
+        self.parquet_path, self.csv_path = table_paths(stem)
+        self.parquet_path.parent.mkdir(parents=True, exist_ok=True)
+        self.dtypes = dtypes
+        self.write_csv = bool(csv or (csv is None and WRITE_CSV) or not PARQUET_AVAILABLE)
+        self.rows = 0
+        self._parquet = None
+        self._csv_started = False
+        # Don't let readers pick up a table left over from an earlier run
+        for path in (self.parquet_path, self.csv_path):
+            path.unlink(missing_ok=True)
+
+    def append(self, chunk):
+        if self.dtypes is None:
+            self.dtypes = chunk.convert_dtypes().dtypes.to_dict()
+        chunk = chunk.astype(self.dtypes)
+        if PARQUET_AVAILABLE:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.parquet_path, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        if self.write_csv:
+            chunk.to_csv(self.csv_path, mode="a" if self._csv_started else "w", header=not self._csv_started, index=False)
+            self._csv_started = True
+        self.rows += len(chunk)
+
+    def close(self):
+        # Nothing appended: still write the table, with no rows and the declared dtypes
+        if self._parquet is None and not self._csv_started and self.dtypes is not None:
+            self.append(pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in self.dtypes.items()}))
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        elif self._parquet is not None:
+            # A failed run keeps what it wrote rather than an empty table
+            self._parquet.close()
+            self._parquet = None
+        return False
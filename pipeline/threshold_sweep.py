@@ -0,0 +1,78 @@
+"""
+Evaluate many fuzzy-match thresholds in one pass over cached similarity scores.
+
+The fuzzy linker keeps the best candidate of each IMDb row when its score
+reaches the threshold, and the best candidate doesn't depend on the
+threshold. So once the candidate scores are cached (pipeline/similarity_cache.py),
+the result at every threshold follows from one sorted array of best scores:
+the matches at threshold t are the rows whose best score is >= t, counted
+for all thresholds at once with searchsorted.
+
+With a labelled sample (pairs of normalized IMDb and TMDB titles marked as a
+true or false match), the sweep also reports precision (labelled predicted
+pairs that are true) and recall (rows with a labelled true partner that are
+matched to it).
+"""
+
+import numpy as np
+import pandas as pd
+
+# 0.60, 0.62, ..., 1.00
+DEFAULT_THRESHOLDS = np.round(np.arange(0.60, 1.0001, 0.02), 2)
+
+
+def best_candidates(scored):
+    """
+    Best scored pair per IMDb row (ties to the TMDB row that comes first), from
+    the output of scored_year_block_pairs / scored_candidate_pairs.
+    """
+    return (
+        scored.sort_values(["_left_pos", "raw", "_right_pos"], ascending=[True, False, True], kind="stable")
+              .drop_duplicates("_left_pos")
+              .reset_index(drop=True)
+    )
+
+
+def _count_at_least(values, cuts):
+    # Number of values >= each cut
+    values = np.sort(values)
+    return len(values) - np.searchsorted(values, cuts, side="left")
+
+
+def sweep(scored, thresholds=DEFAULT_THRESHOLDS, labels=None, imdb_titles=None):
+    """
+    One row per threshold with the number of IMDb rows matched at it. scored
+    needs title_norm_imdb and title_norm_tmdb columns when labels (a DataFrame
+    of title_norm_imdb, title_norm_tmdb and a boolean is_match) are given; the
+    table then also has true_positives, false_positives, precision and recall.
+    imdb_titles are the title_norm of every swept IMDb row, including rows
+    without any candidate above the cache floor (default: the rows in scored).
+
+    A threshold t accepts scores >= t * 100 on the scorer's scale, like the
+    score_cutoff of the fuzzy linker.
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    cuts = thresholds * 100
+    best = best_candidates(scored)
+    table = pd.DataFrame({"threshold": thresholds, "matches": _count_at_least(best["raw"].to_numpy(), cuts)})
+    if labels is None:
+        return table
+
+    labels = labels.assign(is_match=labels["is_match"].astype(bool))
+    labels = labels.drop_duplicates(["title_norm_imdb", "title_norm_tmdb"], keep="last")
+    judged = best.merge(labels, on=["title_norm_imdb", "title_norm_tmdb"], how="left")
+    true_raw = judged.loc[judged["is_match"].eq(True), "raw"].to_numpy()
+    false_raw = judged.loc[judged["is_match"].eq(False), "raw"].to_numpy()
+
+    # Positives: swept rows whose IMDb title has a labelled true partner, matched to it or not
+    positive_titles = labels.loc[labels["is_match"], "title_norm_imdb"]
+    if imdb_titles is None:
+        imdb_titles = scored.drop_duplicates("_left_pos")["title_norm_imdb"]
+    positives = int(pd.Series(imdb_titles).isin(positive_titles).sum())
+
+    table["true_positives"] = _count_at_least(true_raw, cuts)
+    table["false_positives"] = _count_at_least(false_raw, cuts)
+    judged_count = table["true_positives"] + table["false_positives"]
+    table["precision"] = (table["true_positives"] / judged_count).where(judged_count > 0)
+    table["recall"] = table["true_positives"] / positives if positives else np.nan
+    return table
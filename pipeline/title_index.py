@@ -0,0 +1,198 @@
+"""
+Persistent character-trigram index over TMDB title_norm.
+
+Exact release_year blocking misses titles whose IMDb and TMDB years are one
+apart, but dropping the year block makes fuzzy scoring quadratic. This index
+keeps one posting list per trigram, sorted by release year, so a query only
+touches the postings inside its year window and returns a bounded top-K
+candidate set for the fuzzy scorer.
+
+The index is saved as a single .npz file together with a fingerprint of the
+TMDB titles/years it was built from, and is rebuilt only when that changes.
+"""
+
+import hashlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Stored in place of a missing release_year. It sorts before every real year and
+# is further than any sensible window from them, so missing years only match
+# other missing years (same rule as the exact-year blocks).
+MISSING_YEAR = -10_000
+
+
+def trigrams(title):
+    """
+    Distinct character trigrams of a normalized title, padded so that the
+    first and last characters get their own grams.
+    """
+    padded = f"  {title} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def fingerprint(titles, years, ids):
+    digest = hashlib.sha1()
+    for title, year, row_id in zip(titles, years, ids):
+        digest.update(f"{row_id}\x1f{title}\x1f{year}\x1e".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _encode_years(years):
+    return np.array([MISSING_YEAR if pd.isna(y) else int(y) for y in years], dtype=np.int32)
+
+
+class TitleIndex:
+    """
+    Trigram inverted index with year-sorted posting lists.
+
+    Postings are stored CSR-style: the rows for gram g are
+    post_rows[offsets[g]:offsets[g + 1]], sorted by post_years.
+    """
+
+    def __init__(self, grams, offsets, post_rows, post_years, gram_counts, ids, fingerprint):
+        self.grams = grams
+        self.offsets = offsets
+        self.post_rows = post_rows
+        self.post_years = post_years
+        self.gram_counts = gram_counts
+        self.ids = ids
+        self.fingerprint = fingerprint
+        self._gram_ids = {g: i for i, g in enumerate(grams.tolist())}
+
+    @classmethod
+    def build(cls, titles, years, ids=None):
+        titles = [str(t) for t in titles]
+        year_codes = _encode_years(years)
+        ids = np.arange(len(titles)) if ids is None else np.asarray(ids)
+
+        gram_ids = {}
+        entry_grams = []
+        entry_rows = []
+        gram_counts = np.zeros(len(titles), dtype=np.int32)
+        for row, title in enumerate(titles):
+            grams = trigrams(title)
+            gram_counts[row] = len(grams)
+            for gram in grams:
+                entry_grams.append(gram_ids.setdefault(gram, len(gram_ids)))
+                entry_rows.append(row)
+
+        entry_grams = np.asarray(entry_grams, dtype=np.int32)
+        entry_rows = np.asarray(entry_rows, dtype=np.int32)
+        # Sort postings by gram, then year, then row so each gram's list is year-ordered
+        order = np.lexsort((entry_rows, year_codes[entry_rows], entry_grams))
+        post_rows = entry_rows[order]
+        offsets = np.zeros(len(gram_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(entry_grams, minlength=len(gram_ids)), out=offsets[1:])
+
+        grams = np.empty(len(gram_ids), dtype=object)
+        for gram, gid in gram_ids.items():
+            grams[gid] = gram
+
+        return cls(
+            grams=grams.astype(str),
+            offsets=offsets,
+            post_rows=post_rows,
+            post_years=year_codes[post_rows],
+            gram_counts=gram_counts,
+            ids=ids,
+            fingerprint=fingerprint(titles, years, ids.tolist()),
+        )
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                grams=self.grams,
+                offsets=self.offsets,
+                post_rows=self.post_rows,
+                post_years=self.post_years,
+                gram_counts=self.gram_counts,
+                ids=self.ids,
+                fingerprint=np.array(self.fingerprint),
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                grams=data["grams"],
+                offsets=data["offsets"],
+                post_rows=data["post_rows"],
+                post_years=data["post_years"],
+                gram_counts=data["gram_counts"],
+                ids=data["ids"],
+                fingerprint=str(data["fingerprint"]),
+            )
+
+    def query(self, title, year, window=1, top_k=10):
+        """
+        Return (row_positions, similarity) for the top_k indexed titles that share
+        the most trigrams with title and whose year is within +/- window of year.
+        Similarity is the Dice coefficient of the two trigram sets.
+        """
+        query_grams = [self._gram_ids[g] for g in trigrams(str(title)) if g in self._gram_ids]
+        if not query_grams:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        year_code = MISSING_YEAR if pd.isna(year) else int(year)
+        low, high = year_code - window, year_code + window
+        slices = []
+        for gid in query_grams:
+            start, stop = self.offsets[gid], self.offsets[gid + 1]
+            years = self.post_years[start:stop]
+            lo = start + np.searchsorted(years, low, side="left")
+            hi = start + np.searchsorted(years, high, side="right")
+            if hi > lo:
+                slices.append(self.post_rows[lo:hi])
+        if not slices:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        rows, overlap = np.unique(np.concatenate(slices), return_counts=True)
+        n_query = len(trigrams(str(title)))
+        similarity = 2.0 * overlap / (n_query + self.gram_counts[rows])
+        if len(rows) > top_k:
+            keep = np.argpartition(-similarity, top_k - 1)[:top_k]
+            rows, similarity = rows[keep], similarity[keep]
+        order = np.lexsort((rows, -similarity))
+        return rows[order], similarity[order]
+
+    def candidate_pairs(self, left, window=1, top_k=10):
+        """
+        Candidate (imdb_index, tmdb_index) pairs for every row of left, which needs
+        columns imdb_index, title_norm and release_year. tmdb_index values are the
+        ids the index was built with.
+        """
+        found_left = []
+        found_right = []
+        for imdb_idx, title, year in zip(left["imdb_index"], left["title_norm"], left["release_year"]):
+            rows, _ = self.query(title, year, window=window, top_k=top_k)
+            found_left.append(np.full(len(rows), imdb_idx))
+            found_right.append(self.ids[rows])
+        if not found_left:
+            return pd.DataFrame(columns=["imdb_index", "tmdb_index"])
+        return pd.DataFrame({
+            "imdb_index": np.concatenate(found_left),
+            "tmdb_index": np.concatenate(found_right),
+        })
+
+
+def load_or_build(path, tmdb):
+    """
+    Load the saved index for tmdb (columns tmdb_index, title_norm, release_year),
+    building and saving it first if it is missing or was built from other data.
+    """
+    path = Path(path)
+    titles = tmdb["title_norm"].astype(str).tolist()
+    years = tmdb["release_year"].tolist()
+    ids = tmdb["tmdb_index"].to_numpy()
+    if path.exists():
+        index = TitleIndex.load(path)
+        if index.fingerprint == fingerprint(titles, years, ids.tolist()):
+            return index
+    index = TitleIndex.build(titles, years, ids=ids)
+    index.save(path)
+    return index
@@ -3,34 +3,126 @@
 run_all.py
 
 Automates the full workflow for the project:
-1. Data cleaning
+1. Data cleaning (IMDb and TMDB, in parallel)
 2. Data integration
-3. Week 4 EDA analysis
-4. Week 5 Final Visualizations
+3. Week 4 EDA analysis and Week 5 Final Visualizations (in parallel), with every
+   figure saved as a PNG in Week_4_EDA_plots/figures/ and data_visualizations/figures/
+
+Each stage lists the files it reads and writes, so pipeline/runner.py can work
+out the order, run independent stages at the same time, skip stages whose
+outputs are already newer than their inputs (including the pipeline/ modules
+their script imports) and were written by that same stage, and stop at the
+first failure.
+
+Usage:
+    python run_all.py              # run what is out of date
+    python run_all.py --force      # rerun every stage
+    python run_all.py --verbose    # also show each stage's output
+    python run_all.py --imdb-dumps # build imdb_cleaned from the IMDb TSV datasets instead of imdb_raw.csv
 """
 
-import subprocess
+import argparse
+import sys
+
+from pipeline.paths import (
+    AGGREGATE_CUBE,
+    IMDB_CLEANED,
+    IMDB_NAME_BASICS,
+    IMDB_RAW,
+    IMDB_TITLE_BASICS,
+    IMDB_TITLE_CREW,
+    IMDB_TITLE_RATINGS,
+    MERGE_LOG,
+    MERGED_MOVIES,
+    ROOT,
+    TMDB_CLEANED,
+    TMDB_RAW,
+    WEEK4_FIGURES_DIR,
+    WEEK5_FIGURES_DIR,
+)
+from pipeline.figures import MANIFEST_NAME
+from pipeline.runner import Stage, StageFailed, run_pipeline
+from pipeline.storage import PARQUET_AVAILABLE, WRITE_CSV, table_paths
+
+
+def stage_outputs(stem):
+    """
+    The files write_table produces for a table stem with the current storage settings.
+    """
+    parquet_path, csv_path = table_paths(stem)
+    if not PARQUET_AVAILABLE:
+        return [csv_path]
+    return [parquet_path, csv_path] if WRITE_CSV else [parquet_path]
+
+
+STAGES = [
+    Stage(
+        "clean_imdb",
+        ROOT / "data_cleaning/python_cleaning_scripts/Week_2_Cleaning_IMDB_Data.py",
+        inputs=[IMDB_RAW],
+        outputs=stage_outputs(IMDB_CLEANED),
+    ),
+    Stage(
+        "clean_tmdb",
+        ROOT / "data_cleaning/python_cleaning_scripts/Week_2_Cleaning_TMDB_Data.py",
+        inputs=[TMDB_RAW],
+        outputs=stage_outputs(TMDB_CLEANED),
+    ),
+    Stage(
+        "integrate",
+        ROOT / "data_integration/Week_3_IMDB_TMDB_Integration.py",
+        inputs=stage_outputs(IMDB_CLEANED) + stage_outputs(TMDB_CLEANED),
+        outputs=stage_outputs(MERGED_MOVIES) + [MERGE_LOG, AGGREGATE_CUBE],
+    ),
+    # The plotting scripts run in batch mode: every figure is rendered to a PNG in a process pool,
+    # and the manifest written after the last figure marks the stage as done
+    Stage(
+        "week4_eda",
+        ROOT / "data_analysis/Week_4_EDA_plots/Week_4_Brianna's_EDA.py",
+        inputs=stage_outputs(MERGED_MOVIES) + [AGGREGATE_CUBE],
+        outputs=[WEEK4_FIGURES_DIR / MANIFEST_NAME],
+        env={"RENDER_FIGURES": "1"},
+    ),
+    Stage(
+        "week5_visualizations",
+        ROOT / "data_visualizations/Week_5_Final_Visualizations.py",
+        inputs=stage_outputs(MERGED_MOVIES) + [AGGREGATE_CUBE],
+        outputs=[WEEK5_FIGURES_DIR / MANIFEST_NAME],
+        env={"RENDER_FIGURES": "1"},
+    ),
+]
+
+
+# Replaces clean_imdb with --imdb-dumps: the same output, built from the full IMDb datasets (pipeline/imdb_dumps.py)
+INGEST_IMDB_DUMPS = Stage(
+    "ingest_imdb_dumps",
+    ROOT / "data_cleaning/python_cleaning_scripts/Week_2_Ingest_IMDB_Dumps.py",
+    inputs=[IMDB_TITLE_BASICS, IMDB_TITLE_RATINGS, IMDB_TITLE_CREW, IMDB_NAME_BASICS],
+    outputs=stage_outputs(IMDB_CLEANED),
+)
+
 
-# 1. Data Cleaning
-print("Step 1: Cleaning IMDb and TMDb datasets...")
-subprocess.run(["python", "data_cleaning/python_cleaning_scripts/Week_2_Cleaning_IMDB_Data.py"])
-subprocess.run(["python", "data_cleaning/python_cleaning_scripts/Week_2_Cleaning_TMDB_Data.py"])
-print("Data cleaning completed.\n")
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="rerun every stage")
+    parser.add_argument("--verbose", action="store_true", help="print the output of every stage")
+    parser.add_argument("--jobs", type=int, default=None, help="maximum number of stages at once")
+    parser.add_argument("--imdb-dumps", action="store_true",
+                        help="build imdb_cleaned from the IMDb TSV datasets in data_documentation/imdb_dumps/")
+    args = parser.parse_args()
 
-# 2. Data Integration
-print("Step 2: Integrating datasets...")
-subprocess.run(["python", "data_integration/Week_3_IMDB_TMDB_Integration.py"])
-print("Data integration completed.\n")
+    stages = STAGES
+    if args.imdb_dumps:
+        stages = [INGEST_IMDB_DUMPS if stage.name == "clean_imdb" else stage for stage in STAGES]
 
-# 3. Week 4 EDA Analysis
-print("Step 3: Running Week 4 EDA analysis...")
-subprocess.run(["python", "data_analysis/Week_4_Brianna's_EDA.py"])
-subprocess.run(["python", "data_analysis/Week_4_Comparisons_and_Trends.py"])
-print("Week 4 EDA completed.\n")
+    try:
+        run_pipeline(stages, max_workers=args.jobs, force=args.force, verbose=args.verbose)
+    except StageFailed as err:
+        print(f"Pipeline stopped: {err}", file=sys.stderr)
+        return 1
+    print("All steps completed! Check results folders for outputs.")
+    return 0
 
-# 4. Week 5 Final Visualizations
-print("Step 4: Generating Week 5 final visualizations...")
-subprocess.run(["python", "data_visualizations/Week_5_Final_Visualizations.py"])
-print("Week 5 analysis completed.\n")
 
-print("All steps completed! Check results folders for outputs.")
+if __name__ == "__main__":
+    sys.exit(main())